@@ -0,0 +1,129 @@
+"""
+Management command to measure what connection reuse saves on a cheap endpoint
+"""
+import copy
+import importlib.util
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+from stocka.utils.db import connection_mode
+
+PATH = '/api/auth/profile/'
+
+
+def pool_supported(settings_dict):
+    return (
+        django.VERSION >= (5, 1)
+        and settings_dict['ENGINE'] == 'django.db.backends.postgresql'
+        and importlib.util.find_spec('psycopg_pool') is not None
+    )
+
+
+def mode_settings(settings_dict, mode):
+    """A copy of the database settings using `mode` to reuse connections"""
+    settings_dict = copy.deepcopy(settings_dict)
+    options = settings_dict.setdefault('OPTIONS', {})
+    configured_pool = options.pop('pool', None)
+    if mode == 'per_request':
+        settings_dict['CONN_MAX_AGE'] = 0
+    elif mode == 'persistent':
+        settings_dict['CONN_MAX_AGE'] = settings_dict['CONN_MAX_AGE'] or 600
+        settings_dict['CONN_HEALTH_CHECKS'] = True
+    else:
+        settings_dict['CONN_MAX_AGE'] = 0
+        options['pool'] = configured_pool or {'min_size': 1, 'max_size': 2}
+    return settings_dict
+
+
+class Command(BaseCommand):
+    help = (
+        f'Request GET {PATH} repeatedly with a new connection per request, with '
+        f'persistent connections and (on PostgreSQL with Django 5.1+) with a connection '
+        f'pool, and report the latency of each'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per mode')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests before each mode')
+        parser.add_argument('--username', help='User to authenticate as (default: the first active user)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.filter(is_active=True).order_by('id')
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No such active user; create one or pass --username')
+
+        original = connections[DEFAULT_DB_ALIAS]
+        modes = ['per_request', 'persistent']
+        if pool_supported(original.settings_dict):
+            modes.append('pool')
+
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.stdout.write(
+            f"GET {PATH} as {user.username} on {original.vendor}, {options['requests']} requests per mode "
+            f"(configured: {connection_mode(original.settings_dict)})\n"
+        )
+        self.stdout.write(f"{'mode':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'connects':>10}")
+
+        original.close()
+        baseline = None
+        try:
+            for mode in modes:
+                backend = load_backend(original.settings_dict['ENGINE'])
+                connection = backend.DatabaseWrapper(mode_settings(original.settings_dict, mode), DEFAULT_DB_ALIAS)
+                connections[DEFAULT_DB_ALIAS] = connection
+                try:
+                    latencies, connects = self.measure(client, options['requests'], options['warmup'])
+                finally:
+                    connection.close()
+                    if hasattr(connection, 'close_pool'):
+                        connection.close_pool()
+                mean = statistics.fmean(latencies)
+                baseline = baseline or mean
+                self.stdout.write(
+                    f"{mode:<14}{mean:>10.2f}{statistics.median(latencies):>10.2f}"
+                    f"{statistics.quantiles(latencies, n=20)[-1]:>10.2f}{connects:>10,}"
+                    f"   {baseline / mean:.1f}x"
+                )
+        finally:
+            connections[DEFAULT_DB_ALIAS] = original
+
+    def measure(self, client, count, warmup):
+        connects = 0
+
+        def opened(**kwargs):
+            nonlocal connects
+            connects += 1
+
+        latencies = []
+        connection_created.connect(opened, dispatch_uid='benchmark_db_connections')
+        try:
+            for i in range(warmup + count):
+                if i == warmup:
+                    connects = 0
+                started = time.perf_counter()
+                # The handler calls close_old_connections on request_started and
+                # request_finished; the test client skips both
+                close_old_connections()
+                response = client.get(PATH, secure=True)
+                close_old_connections()
+                if response.status_code != 200:
+                    raise CommandError(f'GET {PATH} returned {response.status_code}')
+                if i >= warmup:
+                    latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(dispatch_uid='benchmark_db_connections')
+        return latencies, connects
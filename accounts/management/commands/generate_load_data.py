@@ -0,0 +1,41 @@
+"""
+Management command to generate a large synthetic dataset for load testing
+"""
+from django.core.management.base import BaseCommand
+from stocka.synthetic import BASE_COUNTS, SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate production-sized synthetic data (users, products, orders, deliveries, '
+        'tracking) with bulk inserts. Safe to run more than once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier for the base row counts ({})'.format(
+                ', '.join(f'{count:,} {name}' for name, count in BASE_COUNTS.items())
+            )
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for reproducible data')
+        parser.add_argument('--chunk', type=int, default=5000, help='Rows per bulk insert and transaction')
+        parser.add_argument('--days', type=int, default=180, help='Spread orders over this many past days')
+        parser.add_argument('--password', default='password123', help='Password of every generated user')
+
+    def handle(self, *args, **options):
+        generator = SyntheticDataGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            chunk=options['chunk'],
+            days=options['days'],
+            password=options['password'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            'Generating ' + ', '.join(f'{count:,} {name}' for name, count in generator.counts.items())
+        )
+        generator.generate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Synthetic data created. Users are named load-<type>-<n> with password {options['password']!r}"
+        ))
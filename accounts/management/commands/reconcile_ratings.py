@@ -0,0 +1,22 @@
+"""
+Management command to recompute rider and wholesaler rating counters
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.ratings import reconcile_rider_ratings, reconcile_wholesaler_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute rating_sum/rating_count (and rating) for riders and wholesalers '
+        'from their ratings and fix any that drifted (run periodically, e.g. nightly from cron)'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            riders = reconcile_rider_ratings()
+        with transaction.atomic():
+            wholesalers = reconcile_wholesaler_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Fixed ratings of {riders} riders and {wholesalers} wholesalers'
+        ))
@@ -0,0 +1,37 @@
+"""
+Management command to refresh a local SQLite read replica from the primary
+"""
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database over the replica file (DB_REPLICA_NAME), '
+        'standing in for replication during local development'
+    )
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if alias not in connections.settings:
+            raise CommandError('No replica configured; set DB_REPLICA_NAME')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError(
+                'Only SQLite replicas can be synced this way; for two local PostgreSQL '
+                'databases use pg_dump --clean <primary> | psql <replica>, or real streaming replication'
+            )
+
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(
+            self.style.SUCCESS(f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']}")
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+from stocka.utils.geo import geocell_for
+
+
+def populate_geocells(apps, schema_editor):
+    WholesalerProfile = apps.get_model("accounts", "WholesalerProfile")
+    profiles = list(
+        WholesalerProfile.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).only("id", "latitude", "longitude")
+    )
+    for profile in profiles:
+        profile.geocell = geocell_for(profile.latitude, profile.longitude)
+    WholesalerProfile.objects.bulk_update(profiles, ["geocell"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wholesalerprofile",
+            name="geocell",
+            field=models.IntegerField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(populate_geocells, migrations.RunPython.noop),
+    ]
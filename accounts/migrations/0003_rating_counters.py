@@ -0,0 +1,80 @@
+# Generated by Django 5.0 on 2026-10-19 09:34
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill(profiles, totals):
+    profiles = list(profiles)
+    for profile in profiles:
+        rating_sum, rating_count = totals.get(profile.pk, (0, 0))
+        profile.rating_sum = rating_sum
+        profile.rating_count = rating_count
+        profile.rating = round(rating_sum / rating_count, 2) if rating_count else 0
+    return profiles
+
+
+def populate_rating_counters(apps, schema_editor):
+    RiderProfile = apps.get_model("accounts", "RiderProfile")
+    WholesalerProfile = apps.get_model("accounts", "WholesalerProfile")
+    Delivery = apps.get_model("delivery", "Delivery")
+    ProductReview = apps.get_model("products", "ProductReview")
+
+    rider_totals = {
+        row["rider"]: (row["total"], row["count"])
+        for row in Delivery.objects.filter(
+            status="DELIVERED", rider_rating__isnull=False
+        )
+        .values("rider")
+        .annotate(total=Sum("rider_rating"), count=Count("id"))
+    }
+    wholesaler_totals = {
+        row["product__wholesaler"]: (row["total"], row["count"])
+        for row in ProductReview.objects.values("product__wholesaler").annotate(
+            total=Sum("rating"), count=Count("id")
+        )
+    }
+    fields = ["rating", "rating_sum", "rating_count"]
+    RiderProfile.objects.bulk_update(
+        backfill(RiderProfile.objects.only("id", *fields), rider_totals),
+        fields,
+        batch_size=500,
+    )
+    WholesalerProfile.objects.bulk_update(
+        backfill(WholesalerProfile.objects.only("id", *fields), wholesaler_totals),
+        fields,
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_wholesalerprofile_geocell"),
+        ("delivery", "0001_initial"),
+        ("products", "0003_productimage_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="riderprofile",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="riderprofile",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="wholesalerprofile",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="wholesalerprofile",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_counters, migrations.RunPython.noop),
+    ]
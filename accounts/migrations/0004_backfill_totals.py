@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-19 09:36
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_totals(apps, schema_editor):
+    """total_orders was never maintained; recount both totals once"""
+    WholesalerProfile = apps.get_model("accounts", "WholesalerProfile")
+    RiderProfile = apps.get_model("accounts", "RiderProfile")
+    Order = apps.get_model("orders", "Order")
+    Delivery = apps.get_model("delivery", "Delivery")
+
+    orders = dict(
+        Order.objects.values("wholesaler")
+        .annotate(total=Count("id"))
+        .values_list("wholesaler", "total")
+    )
+    wholesalers = list(WholesalerProfile.objects.only("id", "total_orders"))
+    for profile in wholesalers:
+        profile.total_orders = orders.get(profile.pk, 0)
+    WholesalerProfile.objects.bulk_update(wholesalers, ["total_orders"], batch_size=500)
+
+    deliveries = dict(
+        Delivery.objects.filter(status="DELIVERED", rider__isnull=False)
+        .values("rider")
+        .annotate(total=Count("id"))
+        .values_list("rider", "total")
+    )
+    riders = list(RiderProfile.objects.only("id", "total_deliveries"))
+    for profile in riders:
+        profile.total_deliveries = deliveries.get(profile.pk, 0)
+    RiderProfile.objects.bulk_update(riders, ["total_deliveries"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_rating_counters"),
+        ("orders", "0004_standingorder"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from stocka.utils.geo import geocell_for
 
 
 class User(AbstractUser):
@@ -48,15 +49,27 @@ class WholesalerProfile(models.Model):
     business_location = models.CharField(max_length=200)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geocell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
     business_registration = models.CharField(max_length=100)
     tax_id = models.CharField(max_length=100, blank=True)
     profile_image = models.ImageField(upload_to='profiles/wholesalers/', null=True, blank=True)
     is_verified = models.BooleanField(default=False)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    # Running totals behind rating, from reviews of the wholesaler's products (see accounts.ratings)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     total_orders = models.IntegerField(default=0)
     
     def __str__(self):
         return self.business_name
+    
+    def save(self, *args, **kwargs):
+        # Keep the indexed geocell in sync with the coordinates for proximity search
+        self.geocell = geocell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geocell'}
+        super().save(*args, **kwargs)
 
 
 class RiderProfile(models.Model):
@@ -69,6 +82,9 @@ class RiderProfile(models.Model):
     profile_image = models.ImageField(upload_to='profiles/riders/', null=True, blank=True)
     is_available = models.BooleanField(default=True)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    # Running totals behind rating, from rated deliveries (see accounts.ratings)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     total_deliveries = models.IntegerField(default=0)
     current_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     current_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
@@ -0,0 +1,89 @@
+"""
+Running rating averages for riders and wholesalers.
+
+Profiles keep rating_sum and rating_count next to the rating they display, and
+every new, changed or removed rating adjusts all three in one UPDATE built
+from F() expressions, so recording a rating costs the same however many
+ratings came before it and concurrent ratings can't overwrite each other.
+
+The counters can drift if a write path bypasses these functions (raw SQL,
+queryset.update on ratings, a crash between the two writes); the
+reconcile_ratings command recomputes them from the ratings themselves.
+"""
+from django.db.models import (
+    Case, Count, DecimalField, F, FloatField, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from delivery.models import Delivery
+from products.models import ProductReview
+from .models import RiderProfile, WholesalerProfile
+
+
+def _rating_changes(sum_delta, count_delta):
+    """UPDATE values adding sum_delta and count_delta to a profile's ratings"""
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    # All right-hand sides read the row as it was before the UPDATE
+    return {
+        'rating_sum': new_sum,
+        'rating_count': new_count,
+        'rating': Case(
+            When(rating_count__gt=-count_delta, then=Round(Cast(new_sum, FloatField()) / new_count, 2)),
+            default=Value(0),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    }
+
+
+def _record(model, profile_id, rating=None, previous=None):
+    sum_delta = (rating or 0) - (previous or 0)
+    count_delta = (rating is not None) - (previous is not None)
+    if profile_id is None or (sum_delta == 0 and count_delta == 0):
+        return
+    model.objects.filter(pk=profile_id).update(**_rating_changes(sum_delta, count_delta))
+
+
+def record_rider_rating(rider_id, rating, previous=None):
+    """Add a delivery rating to a rider, replacing `previous` if it was rated before"""
+    _record(RiderProfile, rider_id, rating, previous)
+
+
+def record_review_rating(wholesaler_id, rating=None, previous=None):
+    """
+    Apply a product review to its wholesaler: a new review (previous=None),
+    an edited one, or a deleted one (rating=None).
+    """
+    _record(WholesalerProfile, wholesaler_id, rating, previous)
+
+
+def _reconcile(model, ratings, profile_field, rating_field):
+    totals = ratings.filter(**{profile_field: OuterRef('pk')}).order_by().values(profile_field)
+    # Locked so ratings recorded meanwhile are applied on top of the fixed counters
+    profiles = model.objects.select_for_update().annotate(
+        actual_sum=Coalesce(Subquery(totals.annotate(total=Sum(rating_field)).values('total')), 0),
+        actual_count=Coalesce(Subquery(totals.annotate(total=Count('pk')).values('total')), 0),
+    ).exclude(
+        rating_sum=F('actual_sum'), rating_count=F('actual_count')
+    ).only('id', 'rating', 'rating_sum', 'rating_count')
+
+    drifted = list(profiles)
+    for profile in drifted:
+        profile.rating_sum = profile.actual_sum
+        profile.rating_count = profile.actual_count
+        profile.rating = round(profile.rating_sum / profile.rating_count, 2) if profile.rating_count else 0
+    model.objects.bulk_update(drifted, ['rating', 'rating_sum', 'rating_count'], batch_size=500)
+    return len(drifted)
+
+
+def reconcile_rider_ratings():
+    """Recompute rider rating counters that drifted; returns how many were fixed"""
+    rated = Delivery.objects.filter(
+        status=Delivery.DeliveryStatus.DELIVERED,
+        rider_rating__isnull=False
+    )
+    return _reconcile(RiderProfile, rated, 'rider', 'rider_rating')
+
+
+def reconcile_wholesaler_ratings():
+    """Recompute wholesaler rating counters that drifted; returns how many were fixed"""
+    return _reconcile(WholesalerProfile, ProductReview.objects.all(), 'product__wholesaler', 'rating')
@@ -62,7 +62,22 @@ class ShopkeeperProfileSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class WholesalerProfileSerializer(serializers.ModelSerializer):
+class CountedProfileSerializer(serializers.ModelSerializer):
+    """
+    Base for profiles whose ratings and totals are maintained with F() updates.
+
+    Updates only write the fields that were submitted, so saving a profile
+    can't overwrite a rating recorded since it was loaded.
+    """
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+class WholesalerProfileSerializer(CountedProfileSerializer):
     """Serializer for Wholesaler Profile"""
 
     user = UserSerializer(read_only=True)
@@ -70,9 +85,10 @@ class WholesalerProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = WholesalerProfile
         fields = "__all__"
+        read_only_fields = ["rating", "rating_sum", "rating_count", "total_orders"]
 
 
-class RiderProfileSerializer(serializers.ModelSerializer):
+class RiderProfileSerializer(CountedProfileSerializer):
     """Serializer for Rider Profile"""
 
     user = UserSerializer(read_only=True)
@@ -80,3 +96,4 @@ class RiderProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = RiderProfile
         fields = "__all__"
+        read_only_fields = ["rating", "rating_sum", "rating_count", "total_deliveries"]
@@ -1,9 +1,12 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from .models import ShopkeeperProfile, WholesalerProfile, RiderProfile
+from stocka.middleware import stick_to_primary
 from stocka.utils.responses import api_response
 from .serializers import (
     UserRegistrationSerializer,
@@ -27,6 +30,8 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
+        # The new user's first reads mustn't miss them on a lagging replica
+        stick_to_primary(user.pk)
 
         # Generate JWT tokens
         refresh = RefreshToken.for_user(user)
@@ -44,6 +49,19 @@ class RegisterView(generics.CreateAPIView):
         )
 
 
+class LoginView(TokenObtainPairView):
+    """Obtain a JWT pair; the user's reads then start on the primary"""
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        stick_to_primary(serializer.user.pk)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """Get and update user profile"""
 
@@ -0,0 +1,8 @@
+"""
+Endpoint benchmarks with query, response size and time budgets.
+
+Seeds a test database with a fixed-size synthetic dataset, drives the main
+endpoints through Django's test client and compares wall time, query count
+and response size with the budgets in baseline.json. Run from the project
+root with `python -m benchmarks`.
+"""
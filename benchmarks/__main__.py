@@ -0,0 +1,46 @@
+"""
+Run the endpoint benchmarks: python -m benchmarks [--update-baseline]
+"""
+import argparse
+import os
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark API endpoints against a seeded test database and check query, '
+                    'size and time budgets from benchmarks/baseline.json'
+    )
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Run only these scenarios')
+    parser.add_argument('--repeat', type=int, default=5, help='Measured runs per scenario (after a warm-up)')
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='Record the results as the new budgets instead of checking them'
+    )
+    parser.add_argument(
+        '--time-tolerance', type=float, default=2.0,
+        help='Fail when median time exceeds the budget by this factor (0 to ignore time)'
+    )
+    parser.add_argument(
+        '--bytes-tolerance', type=float, default=1.1,
+        help='Fail when a response grows beyond the budget by this factor'
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stocka.settings')
+    import django
+    django.setup()
+
+    from .runner import run
+    sys.exit(run(
+        only=args.only,
+        repeat=args.repeat,
+        update_baseline=args.update_baseline,
+        time_tolerance=args.time_tolerance,
+        bytes_tolerance=args.bytes_tolerance,
+    ))
+
+
+if __name__ == '__main__':
+    main()
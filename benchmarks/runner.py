@@ -0,0 +1,196 @@
+"""
+Seeding, measuring and comparing against the baseline.
+"""
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import ShopkeeperProfile, WholesalerProfile
+from delivery.models import Delivery
+from products.models import Product
+from stocka.synthetic import SyntheticDataGenerator
+from .scenarios import SCENARIOS
+
+User = get_user_model()
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+# The dataset budgets are recorded against; query counts and response sizes depend on it
+DATASET = {'scale': 0.02, 'seed': 2024}
+
+# Wall time below this many milliseconds over budget is treated as noise
+TIME_SLACK_MS = 5.0
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Dataset:
+    """The seeded rows and the users and objects scenarios act on"""
+
+    def __init__(self, scale, seed, log):
+        SyntheticDataGenerator(scale=scale, seed=seed, chunk=2000, log=log).generate()
+
+        self.admin = User.objects.create_user(
+            username='benchmark-admin', password='benchmark', phone_number='+10000000000',
+            user_type=User.UserType.ADMIN, is_staff=True
+        )
+        wholesaler = WholesalerProfile.objects.annotate(
+            product_count=Count('products')
+        ).order_by('-product_count', 'id').first()
+        self.wholesaler = wholesaler.user
+        self.shopkeeper = ShopkeeperProfile.objects.annotate(
+            order_count=Count('orders')
+        ).order_by('-order_count', 'id').first().user
+
+        # Products the benchmark orders: in stock for many runs at the minimum quantity
+        products = Product.objects.filter(
+            wholesaler=wholesaler, is_available=True, stock_quantity__gte=1000
+        ).order_by('id')[:3]
+        self.order_lines = {product.id: product.minimum_order_quantity for product in products}
+        if not self.order_lines:
+            raise BenchmarkError("The dataset has no products to order; use a larger scale")
+
+        popular = Product.objects.annotate(
+            item_count=Count('order_items')
+        ).order_by('-item_count', 'id').first()
+        self.popular_product_id = popular.id
+        self.search_term = popular.name.split()[0].lower()
+
+        self.delivery = Delivery.objects.filter(
+            status=Delivery.DeliveryStatus.DELIVERED
+        ).annotate(
+            points=Count('tracking_updates')
+        ).order_by('-points', 'id').select_related('order__shopkeeper__user').first()
+        self.delivery_shopkeeper = self.delivery.order.shopkeeper.user
+
+
+def measure(client, dataset, func):
+    """Run a scenario once, returning (seconds, queries, response bytes)"""
+    request = func(dataset)
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(request.user)}'}
+    body = json.dumps(request.data) if request.data is not None else ''
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.generic(
+            request.method, request.path, body, content_type='application/json', **headers
+        )
+        elapsed = time.perf_counter() - started
+    if response.status_code != request.expected_status:
+        raise BenchmarkError(
+            f"{request.method} {request.path} returned {response.status_code}, "
+            f"expected {request.expected_status}: {response.content[:500]!r}"
+        )
+    return elapsed, len(queries), len(response.content)
+
+
+def run_scenarios(dataset, names, repeat):
+    """{name: {time_ms, queries, bytes}}: median time, and the most queries and bytes seen"""
+    client = Client()
+    results = {}
+    for name in names:
+        func = SCENARIOS[name]
+        # Warm-up: caches, lazily built indexes, order number blocks
+        measure(client, dataset, func)
+        runs = [measure(client, dataset, func) for _ in range(repeat)]
+        results[name] = {
+            'time_ms': round(statistics.median(run[0] for run in runs) * 1000, 1),
+            'queries': max(run[1] for run in runs),
+            'bytes': max(run[2] for run in runs),
+        }
+    return results
+
+
+def compare(results, baseline, time_tolerance, bytes_tolerance):
+    """Budget violations as readable messages (empty when everything is within budget)"""
+    failures = []
+    budgets = baseline.get('scenarios', {})
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            continue
+        if result['queries'] > budget['queries']:
+            failures.append(f"{name}: {result['queries']} queries, budget {budget['queries']}")
+        if result['bytes'] > budget['bytes'] * bytes_tolerance:
+            failures.append(
+                f"{name}: {result['bytes']:,} bytes, budget {budget['bytes']:,} (x{bytes_tolerance})"
+            )
+        if time_tolerance and result['time_ms'] > budget['time_ms'] * time_tolerance + TIME_SLACK_MS:
+            failures.append(
+                f"{name}: {result['time_ms']} ms, budget {budget['time_ms']} ms (x{time_tolerance})"
+            )
+    return failures
+
+
+def load_baseline(path):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def write_baseline(path, results):
+    path.write_text(json.dumps({'dataset': DATASET, 'scenarios': results}, indent=2) + '\n')
+
+
+def report(results, baseline, write):
+    budgets = baseline.get('scenarios', {})
+    write(f"{'scenario':<28}{'ms':>9}{'queries':>9}{'bytes':>10}   budget (ms / queries / bytes)")
+    for name, result in results.items():
+        budget = budgets.get(name)
+        budget_text = (
+            f"{budget['time_ms']} / {budget['queries']} / {budget['bytes']:,}" if budget else 'new'
+        )
+        write(
+            f"{name:<28}{result['time_ms']:>9}{result['queries']:>9}{result['bytes']:>10,}   {budget_text}"
+        )
+
+
+def run(only=None, repeat=5, update_baseline=False, time_tolerance=2.0,
+        bytes_tolerance=1.1, baseline_path=BASELINE_PATH, write=print):
+    """Seed a test database, run the scenarios and check them against the baseline; returns an exit code"""
+    names = only or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        write(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        return 2
+    baseline = load_baseline(baseline_path)
+    if baseline and baseline.get('dataset') != DATASET and not update_baseline:
+        write("The baseline was recorded against a different dataset; rerun with --update-baseline")
+        return 2
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        write(f"Seeding dataset (scale {DATASET['scale']}, seed {DATASET['seed']})")
+        dataset = Dataset(DATASET['scale'], DATASET['seed'], write)
+        results = run_scenarios(dataset, names, repeat)
+    except BenchmarkError as exc:
+        write(f"Benchmark failed: {exc}")
+        return 1
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+    report(results, baseline, write)
+    if update_baseline:
+        merged = dict(baseline.get('scenarios', {}))
+        merged.update(results)
+        write_baseline(baseline_path, merged)
+        write(f"Baseline written to {baseline_path}")
+        return 0
+
+    failures = compare(results, baseline, time_tolerance, bytes_tolerance)
+    for failure in failures:
+        write(f"REGRESSION {failure}")
+    return 1 if failures else 0
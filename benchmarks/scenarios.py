@@ -0,0 +1,120 @@
+"""
+Benchmarked endpoints.
+
+A scenario is a function taking the Dataset and returning the Request to
+measure. Anything a request needs first (e.g. a fresh order to confirm) is
+set up inside the function, before measurement starts.
+"""
+from django.db import transaction
+from orders.models import Order
+from orders.placement import build_lines, order_quantities, place_orders
+from orders.reservations import create_reservations, lock_products
+
+SCENARIOS = {}
+
+
+class Request:
+    """An API call made as `user` through the test client"""
+
+    def __init__(self, method, path, user, data=None, expected_status=200):
+        self.method = method
+        self.path = path
+        self.user = user
+        self.data = data
+        self.expected_status = expected_status
+
+
+def scenario(name):
+    """Register a scenario; they run in registration order"""
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+@scenario('product_list')
+def product_list(dataset):
+    return Request('GET', '/api/products/', dataset.shopkeeper)
+
+
+@scenario('product_search')
+def product_search(dataset):
+    return Request('GET', f'/api/products/?search={dataset.search_term}', dataset.shopkeeper)
+
+
+@scenario('product_detail')
+def product_detail(dataset):
+    return Request('GET', f'/api/products/{dataset.popular_product_id}/', dataset.shopkeeper)
+
+
+@scenario('order_create')
+def order_create(dataset):
+    return Request('POST', '/api/orders/', dataset.shopkeeper, data={
+        'wholesaler': dataset.wholesaler.wholesaler_profile.id,
+        'delivery_address': 'Benchmark Street',
+        'delivery_location': 'Nairobi',
+        'items': [
+            {'product_id': product_id, 'quantity': quantity}
+            for product_id, quantity in dataset.order_lines.items()
+        ],
+    }, expected_status=201)
+
+
+@scenario('order_status_update')
+def order_status_update(dataset):
+    # A new pending order each time, so every run confirms one
+    with transaction.atomic():
+        products = lock_products(dataset.order_lines)
+        order = Order(
+            shopkeeper=dataset.shopkeeper.shopkeeper_profile,
+            wholesaler=dataset.wholesaler.wholesaler_profile,
+            delivery_address='Benchmark Street',
+            delivery_location='Nairobi',
+        )
+        entries = [(order, build_lines(dataset.order_lines, products))]
+        place_orders(entries)
+        create_reservations(order_quantities(entries))
+    return Request(
+        'PATCH', f'/api/orders/{order.id}/status/', dataset.wholesaler,
+        data={'status': Order.OrderStatus.CONFIRMED}
+    )
+
+
+@scenario('delivery_detail')
+def delivery_detail(dataset):
+    return Request('GET', f'/api/delivery/{dataset.delivery.id}/', dataset.delivery_shopkeeper)
+
+
+@scenario('delivery_tracking')
+def delivery_tracking(dataset):
+    return Request('GET', f'/api/delivery/{dataset.delivery.id}/tracking/', dataset.delivery_shopkeeper)
+
+
+@scenario('admin_dashboard')
+def admin_dashboard(dataset):
+    return Request('GET', '/api/admin/dashboard/', dataset.admin)
+
+
+@scenario('admin_order_analytics')
+def admin_order_analytics(dataset):
+    return Request('GET', '/api/admin/analytics/orders/', dataset.admin)
+
+
+@scenario('admin_product_analytics')
+def admin_product_analytics(dataset):
+    return Request('GET', '/api/admin/analytics/products/', dataset.admin)
+
+
+@scenario('admin_delivery_analytics')
+def admin_delivery_analytics(dataset):
+    return Request('GET', '/api/admin/analytics/deliveries/', dataset.admin)
+
+
+@scenario('admin_user_analytics')
+def admin_user_analytics(dataset):
+    return Request('GET', '/api/admin/analytics/users/', dataset.admin)
+
+
+@scenario('admin_revenue_analytics')
+def admin_revenue_analytics(dataset):
+    return Request('GET', '/api/admin/analytics/revenue/', dataset.admin)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import PeriodCounter
+
+
+@admin.register(PeriodCounter)
+class PeriodCounterAdmin(admin.ModelAdmin):
+    list_display = ['name', 'period', 'start', 'shard', 'value']
+    list_filter = ['name', 'period']
+    date_hierarchy = 'start'
@@ -0,0 +1,77 @@
+# Generated by Django 5.0 on 2026-10-19 09:36
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_current_periods(apps, schema_editor):
+    """Start today's and this week's counters from the existing rows"""
+    PeriodCounter = apps.get_model("counters", "PeriodCounter")
+    Order = apps.get_model("orders", "Order")
+    Delivery = apps.get_model("delivery", "Delivery")
+
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+
+    def since(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    counts = {
+        "orders.placed": lambda start: Order.objects.filter(
+            created_at__gte=since(start)
+        ).count(),
+        "deliveries.completed": lambda start: Delivery.objects.filter(
+            status="DELIVERED", actual_delivery_time__gte=since(start)
+        ).count(),
+    }
+    PeriodCounter.objects.bulk_create(
+        [
+            PeriodCounter(name=name, period=period, start=start, value=value)
+            for name, count in counts.items()
+            for period, start in [("DAY", today), ("WEEK", week_start)]
+            if (value := count(start))
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("orders", "0004_standingorder"),
+        ("delivery", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PeriodCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("DAY", "Day"), ("WEEK", "Week")], max_length=10
+                    ),
+                ),
+                ("start", models.DateField()),
+                ("shard", models.PositiveSmallIntegerField(default=0)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("name", "period", "start", "shard")},
+            },
+        ),
+        migrations.RunPython(seed_current_periods, migrations.RunPython.noop),
+    ]
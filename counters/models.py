@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class PeriodCounter(models.Model):
+    """
+    Running count of an event per day or week.
+
+    A count is spread over a few shard rows so concurrent transactions
+    bumping it rarely wait on the same row lock; its value is the sum of
+    its shards.
+    """
+    
+    class Period(models.TextChoices):
+        DAY = 'DAY', 'Day'
+        WEEK = 'WEEK', 'Week'
+    
+    name = models.CharField(max_length=100)
+    period = models.CharField(max_length=10, choices=Period.choices)
+    # First day of the period (Monday for weeks), in TIME_ZONE
+    start = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['name', 'period', 'start', 'shard']
+    
+    def __str__(self):
+        return f"{self.name} {self.period.lower()} of {self.start}"
@@ -0,0 +1,110 @@
+"""
+Counters kept up to date as events happen.
+
+Profile totals (WholesalerProfile.total_orders, RiderProfile.total_deliveries)
+are incremented with UPDATE ... SET total = total + n, which writes only that
+column and can't lose a concurrent increment, unlike loading the profile,
+adding one and saving every field back.
+
+Period counters (orders placed today, deliveries this week, ...) let the
+dashboard read a few rows instead of counting orders and deliveries.
+
+Call these inside the transaction that makes the change, so the counts
+commit or roll back with it.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Sum, When
+from django.utils import timezone
+from accounts.models import RiderProfile, WholesalerProfile
+from .models import PeriodCounter
+
+# Rows a period counter is spread over; see PeriodCounter
+SHARDS = 8
+
+ORDERS_PLACED = 'orders.placed'
+DELIVERIES_COMPLETED = 'deliveries.completed'
+
+# Rows changed by each UPDATE in increment_many
+INCREMENT_CHUNK_SIZE = 5000
+
+
+def increment(model, pk, field, by=1):
+    """Add `by` to one column of one row without reading or rewriting the others"""
+    return model.objects.filter(pk=pk).update(**{field: F(field) + by})
+
+
+def increment_many(model, field, amounts):
+    """Add {pk: amount} to a column of several rows, an UPDATE per chunk of rows"""
+    items = list(amounts.items())
+    updated = 0
+    # Each row binds about three parameters; chunks keep well under SQLite's limit
+    for start in range(0, len(items), INCREMENT_CHUNK_SIZE):
+        chunk = dict(items[start:start + INCREMENT_CHUNK_SIZE])
+        updated += model.objects.filter(pk__in=chunk).update(**{
+            field: Case(
+                *[When(pk=pk, then=F(field) + amount) for pk, amount in chunk.items()],
+                default=F(field),
+            )
+        })
+    return updated
+
+
+def period_starts(when=None):
+    """First day of the day and week containing `when` (default now), in TIME_ZONE"""
+    day = timezone.localdate(when)
+    return {
+        PeriodCounter.Period.DAY: day,
+        PeriodCounter.Period.WEEK: day - timedelta(days=day.weekday()),
+    }
+
+
+def bump(name, by=1, when=None):
+    """Count `by` occurrences of `name` in the day and week containing `when`"""
+    shard = random.randrange(SHARDS)
+    for period, start in period_starts(when).items():
+        counter = PeriodCounter.objects.filter(name=name, period=period, start=start, shard=shard)
+        if counter.update(value=F('value') + by):
+            continue
+        try:
+            with transaction.atomic():
+                PeriodCounter.objects.create(name=name, period=period, start=start, shard=shard, value=by)
+        except IntegrityError:
+            # A concurrent transaction created the row first
+            counter.update(value=F('value') + by)
+
+
+def period_totals(names, when=None):
+    """{name: {'today': n, 'this_week': n}} for the day and week containing `when`"""
+    starts = period_starts(when)
+    totals = {name: {'today': 0, 'this_week': 0} for name in names}
+    rows = PeriodCounter.objects.filter(
+        Q(period=PeriodCounter.Period.DAY, start=starts[PeriodCounter.Period.DAY])
+        | Q(period=PeriodCounter.Period.WEEK, start=starts[PeriodCounter.Period.WEEK]),
+        name__in=names
+    ).values('name', 'period').annotate(total=Sum('value')).order_by()
+    for row in rows:
+        key = 'today' if row['period'] == PeriodCounter.Period.DAY else 'this_week'
+        totals[row['name']][key] = row['total']
+    return totals
+
+
+def record_orders_placed(orders):
+    """Count newly placed orders for their wholesalers and the period counters"""
+    if not orders:
+        return
+    increment_many(
+        WholesalerProfile, 'total_orders',
+        Counter(order.wholesaler_id for order in orders)
+    )
+    bump(ORDERS_PLACED, len(orders))
+
+
+def record_delivery_completed(delivery):
+    """Count a delivery that was just marked delivered"""
+    if delivery.rider_id is not None:
+        increment(RiderProfile, delivery.rider_id, 'total_deliveries')
+    bump(DELIVERIES_COMPLETED, when=delivery.actual_delivery_time)
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Avg
+from django.db import transaction
 from .models import Delivery, DeliveryTracking, DeliveryStatusHistory
 from .serializers import (
     DeliveryListSerializer,
@@ -15,11 +15,15 @@ from .serializers import (
     RiderRatingSerializer,
 )
 from accounts.models import RiderProfile
+from accounts.ratings import record_rider_rating
+from counters.tally import record_delivery_completed
 from accounts.serializers import RiderProfileSerializer
 from orders.models import Order
+from outbox.messages import enqueue
+from stocka.utils.conditional import ConditionalListMixin, ConditionalRetrieveMixin
 
 
-class DeliveryListCreateView(generics.ListCreateAPIView):
+class DeliveryListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     """List deliveries or create new delivery"""
 
     permission_classes = [permissions.IsAuthenticated]
@@ -59,11 +63,21 @@ class DeliveryListCreateView(generics.ListCreateAPIView):
         return Delivery.objects.none()
 
 
-class DeliveryDetailView(generics.RetrieveAPIView):
+class DeliveryDetailView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
     """Retrieve delivery details"""
 
     serializer_class = DeliveryDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # The order is embedded (see OrderDetailView); tracking rows are only added
+    validator_lookups = (
+        "updated_at",
+        "tracking_updates__created_at",
+        "order__updated_at",
+        "order__items__product__updated_at",
+        "order__shopkeeper__user__updated_at",
+        "order__wholesaler__user__updated_at",
+        "rider__user__updated_at",
+    )
 
     def get_queryset(self):
         user = self.request.user
@@ -85,6 +99,7 @@ class AssignRiderView(APIView):
 
     permission_classes = [permissions.IsAuthenticated]
 
+    @transaction.atomic
     def post(self, request, pk):
         try:
             delivery = Delivery.objects.get(pk=pk)
@@ -137,6 +152,11 @@ class AssignRiderView(APIView):
             # Update order status
             delivery.order.status = Order.OrderStatus.OUT_FOR_DELIVERY
             delivery.order.save()
+            enqueue(
+                "orders.status_changed",
+                order_id=delivery.order_id,
+                status=delivery.order.status,
+            )
 
             # Create status history
             DeliveryStatusHistory.objects.create(
@@ -165,9 +185,11 @@ class UpdateDeliveryStatusView(APIView):
 
     permission_classes = [permissions.IsAuthenticated]
 
+    @transaction.atomic
     def patch(self, request, pk):
         try:
-            delivery = Delivery.objects.get(pk=pk)
+            # Locked so a delivery can't be completed (and counted) twice
+            delivery = Delivery.objects.select_for_update().get(pk=pk)
 
             # Only assigned rider or admins can update status
             if hasattr(request.user, "rider_profile"):
@@ -204,10 +226,14 @@ class UpdateDeliveryStatusView(APIView):
                 delivery.order.status = Order.OrderStatus.DELIVERED
                 delivery.order.delivered_at = timezone.now()
                 delivery.order.save()
+                enqueue(
+                    "orders.status_changed",
+                    order_id=delivery.order_id,
+                    status=delivery.order.status,
+                )
 
-                # Update rider stats
-                delivery.rider.total_deliveries += 1
-                delivery.rider.save()
+                if old_status != Delivery.DeliveryStatus.DELIVERED:
+                    record_delivery_completed(delivery)
 
                 # Handle delivery proof uploads
                 if "delivery_photo" in request.FILES:
@@ -305,9 +331,11 @@ class RateRiderView(APIView):
 
     permission_classes = [permissions.IsAuthenticated]
 
+    @transaction.atomic
     def post(self, request, pk):
         try:
-            delivery = Delivery.objects.get(pk=pk)
+            # Locked so a concurrent re-rating can't apply the same previous rating twice
+            delivery = Delivery.objects.select_for_update().get(pk=pk)
 
             # Only shopkeeper who received the order can rate
             if not hasattr(request.user, "shopkeeper_profile"):
@@ -332,23 +360,14 @@ class RateRiderView(APIView):
             serializer = RiderRatingSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
 
+            previous_rating = delivery.rider_rating
             delivery.rider_rating = serializer.validated_data["rating"]
             delivery.rider_feedback = serializer.validated_data.get("feedback", "")
             delivery.save()
 
-            # Update rider's average rating
-            rider = delivery.rider
-            completed_deliveries = Delivery.objects.filter(
-                rider=rider,
-                status=Delivery.DeliveryStatus.DELIVERED,
-                rider_rating__isnull=False,
+            record_rider_rating(
+                delivery.rider_id, delivery.rider_rating, previous=previous_rating
             )
-            avg_rating = completed_deliveries.aggregate(Avg("rider_rating"))[
-                "rider_rating__avg"
-            ]
-            if avg_rating:
-                rider.rating = round(avg_rating, 2)
-                rider.save()
 
             return Response(
                 {"message": "Rating submitted successfully"}, status=status.HTTP_200_OK
@@ -0,0 +1,155 @@
+"""
+Pub/sub backends behind events.bus.
+
+A backend fans messages (JSON strings) out to subscriptions by channel.
+publish() is called from request threads and must not block; subscriptions
+are consumed on the ASGI event loop.
+"""
+import asyncio
+import copy
+import json
+import logging
+import select
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Messages for a set of channels, read with get() on one event loop"""
+
+    def __init__(self, backend, channels, maxsize):
+        self.backend = backend
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        # Set when the subscriber fell too far behind and messages were dropped
+        self.overflowed = False
+
+    def deliver(self, message):
+        """Queue a message; called on the subscription's event loop"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A full queue means the reader is busy, so it sees this on its next get()
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """The next message, or None once overflowed; raises TimeoutError"""
+        if self.overflowed:
+            return None
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class LocalBackend:
+    """
+    In-process fan-out. Subscribers only see events published by the same
+    process, so use it when one ASGI process serves all requests.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, self.queue_size)
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscriptions.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self.subscriptions.pop(channel, None)
+
+    def publish(self, channels, message):
+        self.deliver(channels, message)
+
+    def deliver(self, channels, message):
+        with self.lock:
+            targets = set().union(*(self.subscriptions.get(channel, ()) for channel in channels))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Its event loop has shut down
+                self.unsubscribe(subscription)
+
+
+class PostgresBackend(LocalBackend):
+    """
+    Fan-out through PostgreSQL LISTEN/NOTIFY, for several processes (WSGI
+    workers publishing, ASGI processes streaming). Each process listens on
+    one connection of its own, opened with the first subscription, and hands
+    notifications to its local subscribers. Notifications sent while the
+    listener reconnects are lost.
+    """
+
+    pg_channel = 'stocka_events'
+    # Seconds without notifications before checking the connection is alive
+    idle_seconds = 5
+
+    def __init__(self, queue_size=100, alias=DEFAULT_DB_ALIAS):
+        super().__init__(queue_size)
+        if connections[alias].vendor != 'postgresql':
+            raise ImproperlyConfigured('PostgresBackend needs a PostgreSQL database')
+        self.alias = alias
+        self.listener = None
+
+    def publish(self, channels, message):
+        payload = json.dumps({'channels': list(channels), 'message': message})
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    def subscribe(self, channels):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='events-listener', daemon=True)
+                self.listener.start()
+        return super().subscribe(channels)
+
+    def listen(self):
+        while True:
+            connection = self.listening_connection()
+            try:
+                connection.ensure_connection()
+                connection.set_autocommit(True)
+                raw = connection.connection
+                cursor = raw.cursor()
+                cursor.execute(f'LISTEN {self.pg_channel}')
+                while True:
+                    if select.select([raw], [], [], self.idle_seconds) == ([], [], []):
+                        # Raises if the server went away
+                        cursor.execute('SELECT 1')
+                    raw.poll()
+                    while raw.notifies:
+                        notification = raw.notifies.pop(0)
+                        payload = json.loads(notification.payload)
+                        self.deliver(payload['channels'], payload['message'])
+            except Exception:
+                logger.exception('Event listener lost its connection; reconnecting')
+                time.sleep(1)
+            finally:
+                connection.close()
+
+    def listening_connection(self):
+        """A connection outside Django's handler, never pooled or shared"""
+        settings_dict = copy.deepcopy(connections[self.alias].settings_dict)
+        settings_dict.get('OPTIONS', {}).pop('pool', None)
+        backend = load_backend(settings_dict['ENGINE'])
+        return backend.DatabaseWrapper(settings_dict, self.alias)
@@ -0,0 +1,70 @@
+"""
+Live order and delivery events.
+
+Changes publish an event once their transaction commits, addressed to the
+audiences that may see it (see audiences_for_order). The event stream
+(events.views) subscribes to the requesting user's audience. The transport
+is EVENTS_BACKEND: LocalBackend within one process, PostgresBackend across
+processes.
+
+Delivery is best effort: events published while nobody is subscribed, or
+while a client reconnects, are not kept. Clients refetch what they show when
+their stream (re)opens.
+"""
+import json
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+STAFF = 'staff'
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.EVENTS_BACKEND)(queue_size=settings.EVENTS_QUEUE_SIZE)
+    return _backend
+
+
+def audiences_for_order(order):
+    return [f'shopkeeper:{order.shopkeeper_id}', f'wholesaler:{order.wholesaler_id}', STAFF]
+
+
+def audiences_for_delivery(delivery):
+    audiences = audiences_for_order(delivery.order)
+    if delivery.rider_id is not None:
+        audiences.append(f'rider:{delivery.rider_id}')
+    return audiences
+
+
+def audience_for_user(user):
+    """The one audience whose events a user may see; same order as the detail views"""
+    if hasattr(user, 'rider_profile'):
+        return f'rider:{user.rider_profile.id}'
+    if hasattr(user, 'shopkeeper_profile'):
+        return f'shopkeeper:{user.shopkeeper_profile.id}'
+    if hasattr(user, 'wholesaler_profile'):
+        return f'wholesaler:{user.wholesaler_profile.id}'
+    if user.is_staff:
+        return STAFF
+    return None
+
+
+def publish(event, data, audiences):
+    """Send an event to the audiences once the current transaction commits"""
+    message = json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder)
+    # A failed publish must not fail the change that caused it
+    transaction.on_commit(lambda: get_backend().publish(audiences, message), robust=True)
+
+
+def subscribe(audiences):
+    """A Subscription for the audiences; call from the event loop that reads it"""
+    return get_backend().subscribe(audiences)
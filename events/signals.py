@@ -0,0 +1,70 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from delivery.models import Delivery, DeliveryStatusHistory, DeliveryTracking
+from orders.models import Order
+from .bus import audiences_for_delivery, audiences_for_order, publish
+
+
+@receiver(post_init, sender=Order)
+def remember_loaded_status(sender, instance, **kwargs):
+    # What the row held when loaded, so saving needs no query to compare;
+    # None when status was deferred
+    instance._previous_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def publish_order_status(sender, instance, created, **kwargs):
+    previous, instance._previous_status = instance._previous_status, instance.status
+    # A new order starts out PENDING; that is not a change
+    if created or previous is None or instance.status == previous:
+        return
+    publish('order.status', {
+        'order_id': instance.pk,
+        'order_number': instance.order_number,
+        'status': instance.status,
+        'status_display': instance.get_status_display(),
+        'updated_at': instance.updated_at,
+    }, audiences_for_order(instance))
+
+
+@receiver(post_init, sender=Delivery)
+def remember_loaded_delivery_status(sender, instance, **kwargs):
+    # Compared with the status of the next history row; None when deferred
+    instance._previous_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=DeliveryStatusHistory)
+def publish_delivery_status(sender, instance, created, **kwargs):
+    # Every status update records a history row, including position
+    # updates that keep the status, so publish only actual changes
+    if not created:
+        return
+    delivery = instance.delivery
+    previous, delivery._previous_status = delivery._previous_status, instance.status
+    if instance.status == previous:
+        return
+    publish('delivery.status', {
+        'delivery_id': delivery.pk,
+        'order_id': delivery.order_id,
+        'status': instance.status,
+        'status_display': instance.get_status_display(),
+        'notes': instance.notes,
+        'latitude': instance.latitude,
+        'longitude': instance.longitude,
+        'created_at': instance.created_at,
+    }, audiences_for_delivery(delivery))
+
+
+@receiver(post_save, sender=DeliveryTracking)
+def publish_tracking_point(sender, instance, created, **kwargs):
+    if not created:
+        return
+    delivery = instance.delivery
+    publish('delivery.tracking', {
+        'delivery_id': delivery.pk,
+        'order_id': delivery.order_id,
+        'latitude': instance.latitude,
+        'longitude': instance.longitude,
+        'status': instance.status,
+        'created_at': instance.created_at,
+    }, audiences_for_delivery(delivery))
@@ -0,0 +1,93 @@
+"""
+Server-sent events stream of live order and delivery changes
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .bus import audience_for_user, subscribe
+
+# Milliseconds EventSource waits before reconnecting
+RETRY_MS = 3000
+
+
+def authenticate(request):
+    """(audience, token expiry) for the request's bearer token; raises APIException"""
+    result = JWTAuthentication().authenticate(request)
+    if result is None:
+        return None, None
+    user, token = result
+    return audience_for_user(user), token['exp']
+
+
+def id_filter(request, name):
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    return {int(pk) for pk in value.split(',') if pk.strip()}
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Stream order.status, delivery.status and delivery.tracking events the
+    user may see, optionally only for ?order=<ids> and/or ?delivery=<ids>
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "The event stream needs an ASGI server (stocka.asgi)"},
+            status=501
+        )
+
+    try:
+        audience, expires_at = await sync_to_async(authenticate)(request)
+    except APIException as exc:
+        return JsonResponse({"error": str(exc.detail)}, status=exc.status_code)
+    if audience is None:
+        return JsonResponse({"error": "Authentication credentials were not provided."}, status=401)
+    try:
+        orders, deliveries = id_filter(request, 'order'), id_filter(request, 'delivery')
+    except ValueError:
+        return JsonResponse({"error": "order and delivery must be comma-separated ids"}, status=400)
+
+    def wanted(data):
+        if orders is None and deliveries is None:
+            return True
+        return data.get('order_id') in (orders or ()) or data.get('delivery_id') in (deliveries or ())
+
+    # Ends when the token expires, so the client has to present a new one,
+    # or earlier at the limit, after which it reconnects
+    ends_at = min(expires_at, time.time() + settings.EVENTS_MAX_STREAM_SECONDS)
+
+    async def events():
+        subscription = subscribe([audience])
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while (remaining := ends_at - time.time()) > 0:
+                try:
+                    message = await subscription.get(min(settings.EVENTS_KEEPALIVE_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    # Fell behind and lost events; reconnecting makes the client refetch
+                    return
+                event = json.loads(message)
+                if wanted(event['data']):
+                    yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'user', 'response_status', 'created_at', 'expires_at']
+    list_filter = ['response_status']
+    search_fields = ['key', 'user__username']
+    exclude = ['response_body']
+    readonly_fields = [
+        'user', 'key', 'request_fingerprint', 'response_status',
+        'response_content_type', 'created_at', 'expires_at'
+    ]
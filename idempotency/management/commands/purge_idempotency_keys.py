@@ -0,0 +1,25 @@
+"""
+Management command to delete expired idempotency keys
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from idempotency.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses past their TTL (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired idempotency keys'))
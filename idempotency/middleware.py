@@ -0,0 +1,136 @@
+"""
+Idempotency-Key support for unsafe requests.
+
+A client that sends `Idempotency-Key: <unique value>` with a POST, PUT, PATCH
+or DELETE can safely retry it: the first response is stored per user and key,
+and retries get that response back (with `Idempotent-Replayed: true`) without
+the view running again. Keys expire after IDEMPOTENCY_KEY_TTL seconds.
+
+- A retry that arrives while the first request is still running gets 409.
+- Reusing a key for a different method, path or body gets 422.
+- Server errors (5xx) are not stored, so the request can be retried.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+MAX_KEY_LENGTH = 255
+# A request still marked as running after this many seconds is assumed to have died
+IN_PROGRESS_TIMEOUT = 60
+
+
+def _error(message, status):
+    return JsonResponse(
+        {"success": False, "message": message, "data": None, "errors": None},
+        status=status
+    )
+
+
+class IdempotencyMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.META.get(HEADER)
+        if request.method not in UNSAFE_METHODS or not key:
+            return self.get_response(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters", 400)
+
+        user = self._authenticate(request)
+        if user is None:
+            # Keys are scoped per user; the view will reject the request anyway
+            return self.get_response(request)
+
+        fingerprint = self._fingerprint(request)
+        record, created = self._claim(user, key, fingerprint)
+        if not created:
+            if record.request_fingerprint != fingerprint:
+                return _error("Idempotency-Key was already used for a different request", 422)
+            if record.response_status is None:
+                return _error("A request with this Idempotency-Key is still being processed", 409)
+            return self._replay(record)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            record.delete()
+            raise
+
+        if response.status_code >= 500 or response.streaming:
+            record.delete()
+            return response
+
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            response_status=response.status_code,
+            response_body=response.content,
+            response_content_type=response.get('Content-Type', ''),
+        )
+        return response
+
+    def _authenticate(self, request):
+        # JWT authentication normally happens in the view, after middleware
+        drf_request = Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        )
+        try:
+            user = drf_request.user
+        except APIException:
+            return None
+        return user if user.is_authenticated else None
+
+    def _fingerprint(self, request):
+        hasher = hashlib.sha256(f'{request.method} {request.get_full_path()}\n'.encode())
+        # Uploads are not read here; their size stands in for the body
+        if request.content_type == 'multipart/form-data':
+            hasher.update(request.META.get('CONTENT_LENGTH', '').encode())
+        else:
+            hasher.update(request.body)
+        return hasher.hexdigest()
+
+    def _claim(self, user, key, fingerprint):
+        """Create the record for this key, or return the existing live one"""
+        now = timezone.now()
+        for _ in range(2):
+            try:
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    request_fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+                return record, True
+            except IntegrityError:
+                record = IdempotencyKey.objects.filter(user=user, key=key).first()
+                if record is None:
+                    continue
+                abandoned = (
+                    record.response_status is None
+                    and record.created_at < now - timedelta(seconds=IN_PROGRESS_TIMEOUT)
+                )
+                if record.expires_at > now and not abandoned:
+                    return record, False
+                # Expired or abandoned: take the key over
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+        # Lost the race twice to requests with the same key
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+    def _replay(self, record):
+        response = HttpResponse(
+            bytes(record.response_body or b''),
+            status=record.response_status,
+            content_type=record.response_content_type or None,
+        )
+        response['Idempotent-Replayed'] = 'true'
+        return response
@@ -0,0 +1,9 @@
+"""
+Concurrent load tests against a local server.
+
+Runs the app under a threaded WSGI server or uvicorn (ASGI) on localhost
+(or targets one you started yourself with --url), fires a scenario from many thread or asyncio
+clients at once, and reports throughput, latency percentiles and violated
+invariants such as negative stock or lost writes. Uses its own scratch
+database (loadtest.settings); run with `python -m loadtest run`.
+"""
@@ -0,0 +1,60 @@
+"""
+python -m loadtest run [--scenario ...] | python -m loadtest serve [--server asgi]
+"""
+import argparse
+import os
+import sys
+
+SCENARIO_NAMES = ['checkout_storm', 'confirmation_burst', 'gps_flood']
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Fire concurrent scenarios and check invariants')
+    run_parser.add_argument('--scenario', nargs='+', choices=SCENARIO_NAMES, default=SCENARIO_NAMES)
+    run_parser.add_argument('--client', choices=['thread', 'asyncio'], default='thread')
+    run_parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+    run_parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+    run_parser.add_argument('--db', choices=['sqlite', 'postgres'], help='Scratch database (see loadtest.settings)')
+    run_parser.add_argument(
+        '--url', help='Target an already running server (using loadtest.settings) instead of starting one'
+    )
+    run_parser.add_argument('--host', default='127.0.0.1')
+    run_parser.add_argument('--port', type=int, default=8765)
+    run_parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi', help='Interface of the started server')
+
+    serve_parser = commands.add_parser('serve', help='Serve the app with loadtest.settings')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi', help='wsgi (threaded) or asgi (uvicorn)')
+
+    args = parser.parse_args()
+    if getattr(args, 'db', None):
+        # Read by loadtest.settings; inherited by the server process
+        os.environ['LOADTEST_DB'] = args.db
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'loadtest.settings')
+    import django
+    django.setup()
+
+    if args.command == 'serve':
+        from .server import serve
+        serve(args.host, args.port, args.server)
+        return
+
+    from .runner import run
+    sys.exit(run(
+        args.scenario,
+        client=args.client,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        url=args.url,
+        host=args.host,
+        port=args.port,
+        interface=args.server,
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+HTTP clients that replay a list of requests with a fixed number of
+concurrent workers, each on its own keep-alive connection.
+"""
+import asyncio
+import http.client
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class Request:
+    def __init__(self, method, path, token=None, body=b''):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = {'Content-Type': 'application/json', 'Content-Length': str(len(body))}
+        if token:
+            self.headers['Authorization'] = f'Bearer {token}'
+
+
+class Result:
+    """Outcome of one request; status is None when the connection failed"""
+
+    def __init__(self, request, status, latency, body=b'', error=None):
+        self.request = request
+        self.status = status
+        self.latency = latency
+        self.body = body
+        self.error = error
+
+
+def run_threads(url, requests, concurrency):
+    """Send requests from `concurrency` threads using http.client"""
+    parts = urlsplit(url)
+    pending = queue.SimpleQueue()
+    for request in requests:
+        pending.put(request)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        local = []
+        while True:
+            try:
+                request = pending.get_nowait()
+            except queue.Empty:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request(request.method, request.path, body=request.body, headers=request.headers)
+                response = connection.getresponse()
+                body = response.read()
+                local.append(Result(request, response.status, time.perf_counter() - started, body))
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException) as exc:
+                connection.close()
+                local.append(Result(request, None, time.perf_counter() - started, error=repr(exc)))
+        connection.close()
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_asyncio(url, requests, concurrency):
+    """Send requests from `concurrency` coroutines on one event loop"""
+    return asyncio.run(_run_asyncio(urlsplit(url), requests, concurrency))
+
+
+async def _run_asyncio(parts, requests, concurrency):
+    pending = iter(requests)
+    results = []
+
+    async def worker():
+        reader = writer = None
+        for request in pending:
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+                status, body, keep_alive = await _exchange(reader, writer, parts, request)
+                results.append(Result(request, status, time.perf_counter() - started, body))
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+            except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                results.append(Result(request, None, time.perf_counter() - started, error=repr(exc)))
+        if writer is not None:
+            writer.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def _exchange(reader, writer, parts, request):
+    head = [f'{request.method} {request.path} HTTP/1.1', f'Host: {parts.netloc}']
+    head.extend(f'{name}: {value}' for name, value in request.headers.items())
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + request.body)
+    await writer.drain()
+
+    status_line = await reader.readuntil(b'\r\n')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+        keep_alive = headers.get('connection', '').lower() != 'close'
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return status, body, keep_alive
+
+
+CLIENTS = {
+    'thread': run_threads,
+    'asyncio': run_asyncio,
+}
@@ -0,0 +1,107 @@
+"""
+Running scenarios and reporting the results.
+"""
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+from django.core.management import call_command
+from django.db import connection
+from .clients import CLIENTS
+from .scenarios import SCENARIOS, Fixtures
+from .server import LOG_PATH, ServerProcess
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    latencies = sorted(result.latency * 1000 for result in results)
+    statuses = Counter(result.status or 'error' for result in results)
+    return {
+        'requests': len(results),
+        'elapsed': elapsed,
+        'throughput': len(results) / elapsed if elapsed else 0.0,
+        'statuses': statuses,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+def is_failure(result):
+    """A server error or a request that got no response"""
+    return result.status is None or result.status >= 500
+
+
+def failure_violations(results):
+    # Scenarios only count what succeeded, so without this a run whose
+    # requests mostly failed would still pass
+    failures = sum(1 for result in results if is_failure(result))
+    if not failures:
+        return []
+    return [f"{failures} of {len(results)} requests failed with a server error or no response"]
+
+
+def reset_database():
+    call_command('migrate', verbosity=0, interactive=False)
+    call_command('flush', verbosity=0, interactive=False)
+    if connection.vendor == 'sqlite':
+        # Readers don't block the writer (and vice versa) in WAL mode
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+
+def run(scenarios, client='thread', concurrency=32, requests=500, url=None,
+        host='127.0.0.1', port=8765, interface='wsgi', write=print):
+    """Run the scenarios one after another; returns an exit code"""
+    write(f"Preparing {connection.vendor} database {connection.settings_dict['NAME']}")
+    reset_database()
+    fixtures = Fixtures(shops=concurrency)
+
+    server = ServerProcess(host, port, interface) if url is None else nullcontext()
+    failed = False
+    with server:
+        target = url or server.url
+        for name in scenarios:
+            scenario = SCENARIOS[name](requests)
+            scenario.setup(fixtures)
+            prepared = scenario.requests()
+            # Don't hold the database (SQLite locks) while the server works
+            connection.close()
+
+            started = time.perf_counter()
+            results = CLIENTS[client](target, prepared, concurrency)
+            summary = summarize(results, time.perf_counter() - started)
+            violations = failure_violations(results) + scenario.check(results)
+            connection.close()
+
+            report(name, summary, results, violations, client, concurrency, write)
+            failed = failed or bool(violations)
+    if url is None:
+        write(f"Server log: {LOG_PATH}")
+    return 1 if failed else 0
+
+
+def report(name, summary, results, violations, client, concurrency, write):
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(summary['statuses'].items(), key=str))
+    write(f"\n{name} ({summary['requests']} requests, {concurrency} {client} clients)")
+    write(f"  {summary['elapsed']:.2f}s, {summary['throughput']:.1f} req/s; {statuses}")
+    write(
+        f"  latency ms: p50 {summary['p50']:.1f}  p90 {summary['p90']:.1f}  "
+        f"p99 {summary['p99']:.1f}  max {summary['max']:.1f}"
+    )
+    failures = [result for result in results if is_failure(result)]
+    for result in failures[:3]:
+        detail = result.error or result.body[:200].decode('utf-8', 'replace')
+        write(f"  {result.status or 'error'} {result.request.method} {result.request.path}: {detail}")
+    if violations:
+        for violation in violations:
+            write(f"  VIOLATION {violation}")
+    else:
+        write("  invariants hold")
@@ -0,0 +1,266 @@
+"""
+Load-test scenarios.
+
+Each scenario creates the rows it contends on, builds the requests to fire
+and afterwards checks invariants against the database, returning the
+violations it found. Rejections the app is supposed to make (e.g. 400 for
+insufficient stock) are not violations; wrong stock or missing rows are.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Sum
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import RiderProfile, ShopkeeperProfile, WholesalerProfile
+from delivery.models import Delivery, DeliveryStatusHistory, DeliveryTracking
+from orders.models import Order, OrderItem, StockReservation
+from orders.placement import build_lines, place_orders
+from orders.reservations import lock_products
+from products.models import Product
+from .clients import Request
+
+User = get_user_model()
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(cls):
+        cls.name = name
+        SCENARIOS[name] = cls
+        return cls
+    return register
+
+
+class Fixtures:
+    """Users shared by all scenarios of a run, created with bulk inserts"""
+
+    def __init__(self, shops):
+        self.password_hash = make_password('loadtest')
+        self.sequence = 0
+        self.wholesaler = WholesalerProfile.objects.create(
+            user=self.create_users(User.UserType.WHOLESALER, 1)[0],
+            business_name='Load Test Wholesale',
+            business_address='Industrial Area, Nairobi',
+            business_location='Nairobi',
+            business_registration='LOADTEST',
+        )
+        self.shops = ShopkeeperProfile.objects.bulk_create([
+            ShopkeeperProfile(user=user, shop_name=f'Shop {user.id}', shop_address='Nairobi', shop_location='Nairobi')
+            for user in self.create_users(User.UserType.SHOPKEEPER, shops)
+        ])
+        self.tokens = {}
+
+    def create_users(self, kind, count):
+        users = []
+        for _ in range(count):
+            self.sequence += 1
+            users.append(User(
+                username=f'loadtest-{kind.lower()}-{self.sequence}',
+                password=self.password_hash,
+                phone_number=f'+888{self.sequence:011d}',
+                user_type=kind,
+            ))
+        return User.objects.bulk_create(users)
+
+    def token(self, user):
+        if user.id not in self.tokens:
+            self.tokens[user.id] = str(AccessToken.for_user(user))
+        return self.tokens[user.id]
+
+    def product(self, stock, name):
+        self.sequence += 1
+        return Product.objects.create(
+            wholesaler=self.wholesaler,
+            name=name,
+            description='Load test product',
+            sku=f'LOADTEST-{self.sequence}',
+            price=Decimal('100.00'),
+            wholesale_price=Decimal('80.00'),
+            stock_quantity=stock,
+        )
+
+    def place_pending_orders(self, product, count, quantity):
+        """Pending orders for `product` without stock holds, as if their holds had expired"""
+        orders = []
+        with transaction.atomic():
+            products = lock_products([product.id])
+            for start in range(0, count, 500):
+                entries = [
+                    (
+                        Order(
+                            shopkeeper=self.shops[i % len(self.shops)],
+                            wholesaler=self.wholesaler,
+                            delivery_address='Nairobi',
+                            delivery_location='Nairobi',
+                        ),
+                        build_lines({product.id: quantity}, products),
+                    )
+                    for i in range(start, min(start + 500, count))
+                ]
+                orders.extend(place_orders(entries, notes='Load test'))
+        return orders
+
+
+def body(data):
+    return json.dumps(data).encode()
+
+
+class LoadScenario:
+    name = None
+
+    def __init__(self, requests):
+        self.request_count = requests
+
+    def setup(self, fixtures):
+        raise NotImplementedError
+
+    def requests(self):
+        raise NotImplementedError
+
+    def check(self, results):
+        raise NotImplementedError
+
+
+@scenario('checkout_storm')
+class CheckoutStorm(LoadScenario):
+    """Many shops check out the same scarce product at once"""
+
+    stock = 200
+    quantity = 3
+
+    def setup(self, fixtures):
+        self.fixtures = fixtures
+        self.product = fixtures.product(self.stock, 'Checkout storm product')
+
+    def requests(self):
+        shops = self.fixtures.shops
+        return [
+            Request('POST', '/api/orders/checkout/', self.fixtures.token(shops[i % len(shops)].user), body({
+                'delivery_address': 'Nairobi',
+                'delivery_location': 'Nairobi',
+                'items': [{'product_id': self.product.id, 'quantity': self.quantity}],
+            }))
+            for i in range(self.request_count)
+        ]
+
+    def check(self, results):
+        violations = []
+        succeeded = sum(1 for result in results if result.status == 201)
+        orders = Order.objects.filter(items__product=self.product).count()
+        if orders != succeeded:
+            violations.append(f"{succeeded} checkouts succeeded but {orders} orders exist")
+        held = StockReservation.objects.filter(product=self.product).aggregate(total=Sum('quantity'))['total'] or 0
+        if held > self.stock:
+            violations.append(f"Oversold: {held} units held against a stock of {self.stock}")
+        self.product.refresh_from_db()
+        if self.product.stock_quantity != self.stock:
+            violations.append(
+                f"Stock changed from {self.stock} to {self.product.stock_quantity} without any confirmation"
+            )
+        return violations
+
+
+@scenario('confirmation_burst')
+class ConfirmationBurst(LoadScenario):
+    """A wholesaler confirms more pending orders at once than there is stock for"""
+
+    stock = 200
+    quantity = 3
+
+    def setup(self, fixtures):
+        self.fixtures = fixtures
+        self.product = fixtures.product(self.stock, 'Confirmation burst product')
+        self.orders = fixtures.place_pending_orders(self.product, self.request_count, self.quantity)
+
+    def requests(self):
+        token = self.fixtures.token(self.fixtures.wholesaler.user)
+        return [
+            Request('PATCH', f'/api/orders/{order.id}/status/', token, body({'status': Order.OrderStatus.CONFIRMED}))
+            for order in self.orders
+        ]
+
+    def check(self, results):
+        violations = []
+        succeeded = sum(1 for result in results if result.status == 200)
+        confirmed = Order.objects.filter(
+            id__in=[order.id for order in self.orders], status=Order.OrderStatus.CONFIRMED
+        )
+        confirmed_count = confirmed.count()
+        confirmed_quantity = OrderItem.objects.filter(order__in=confirmed).aggregate(
+            total=Sum('quantity')
+        )['total'] or 0
+        if confirmed_count != succeeded:
+            violations.append(f"{succeeded} confirmations succeeded but {confirmed_count} orders are confirmed")
+        if confirmed_quantity > self.stock:
+            violations.append(f"Oversold: {confirmed_quantity} units confirmed against a stock of {self.stock}")
+        self.product.refresh_from_db()
+        if self.product.stock_quantity < 0:
+            violations.append(f"Negative stock: {self.product.stock_quantity}")
+        if self.product.stock_quantity != self.stock - confirmed_quantity:
+            violations.append(
+                f"Lost update: stock is {self.product.stock_quantity}, "
+                f"expected {self.stock - confirmed_quantity} after confirming {confirmed_quantity} units"
+            )
+        return violations
+
+
+@scenario('gps_flood')
+class GpsFlood(LoadScenario):
+    """Riders in transit report their position as fast as they can"""
+
+    delivery_count = 20
+
+    def setup(self, fixtures):
+        self.fixtures = fixtures
+        product = fixtures.product(10_000, 'GPS flood product')
+        riders = RiderProfile.objects.bulk_create([
+            RiderProfile(user=user, full_name=f'Rider {user.id}', id_number=str(user.id),
+                         vehicle_type='Motorcycle', vehicle_registration=f'LT{user.id}')
+            for user in fixtures.create_users(User.UserType.RIDER, self.delivery_count)
+        ])
+        orders = fixtures.place_pending_orders(product, self.delivery_count, 1)
+        self.deliveries = Delivery.objects.bulk_create([
+            Delivery(
+                order=order, rider=rider, status=Delivery.DeliveryStatus.IN_TRANSIT,
+                pickup_address='Industrial Area', pickup_contact_name='Dispatch',
+                pickup_contact_phone='+254700000000', delivery_address='Nairobi',
+                delivery_contact_name='Shop', delivery_contact_phone='+254700000001',
+            )
+            for order, rider in zip(orders, riders)
+        ])
+        self.riders = {rider.id: rider for rider in riders}
+
+    def requests(self):
+        requests = []
+        for i in range(self.request_count):
+            delivery = self.deliveries[i % len(self.deliveries)]
+            step = i // len(self.deliveries)
+            requests.append(Request(
+                'PATCH', f'/api/delivery/{delivery.id}/status/',
+                self.fixtures.token(self.riders[delivery.rider_id].user),
+                body({
+                    'status': Delivery.DeliveryStatus.IN_TRANSIT,
+                    'latitude': f'{-1.29 + step * 0.0001:.6f}',
+                    'longitude': f'{36.82 + step * 0.0001:.6f}',
+                })
+            ))
+        return requests
+
+    def check(self, results):
+        violations = []
+        succeeded = sum(1 for result in results if result.status == 200)
+        ids = [delivery.id for delivery in self.deliveries]
+        points = DeliveryTracking.objects.filter(delivery_id__in=ids).count()
+        if points != succeeded:
+            violations.append(f"{succeeded} position updates succeeded but {points} tracking points exist")
+        history = DeliveryStatusHistory.objects.filter(delivery_id__in=ids).count()
+        if history != succeeded:
+            violations.append(f"{succeeded} position updates succeeded but {history} status history rows exist")
+        moved = Delivery.objects.filter(id__in=ids).exclude(status=Delivery.DeliveryStatus.IN_TRANSIT).count()
+        if moved:
+            violations.append(f"{moved} deliveries left IN_TRANSIT")
+        return violations
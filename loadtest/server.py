@@ -0,0 +1,78 @@
+"""
+The local server load tests run against.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.servers.basehttp import WSGIServer, run
+from django.core.wsgi import get_wsgi_application
+
+LOG_PATH = Path(tempfile.gettempdir()) / 'stocka-loadtest-server.log'
+
+
+class LoadTestServer(WSGIServer):
+    # Django's default backlog of 10 drops connections under a burst of clients
+    request_queue_size = 256
+
+
+def serve(host, port, interface='wsgi'):
+    """
+    Serve the app until interrupted: under WSGI with one thread per
+    connection, or under ASGI with uvicorn (sync views run in a thread per
+    request, as in production)
+    """
+    if interface == 'asgi':
+        import uvicorn
+        from django.core.asgi import get_asgi_application
+        uvicorn.run(
+            get_asgi_application(), host=host, port=port,
+            backlog=LoadTestServer.request_queue_size, log_level='warning',
+        )
+        return
+    run(host, port, get_wsgi_application(), threading=True, server_cls=LoadTestServer)
+
+
+class ServerProcess:
+    """Run `python -m loadtest serve` in a subprocess for the duration of a with block"""
+
+    def __init__(self, host='127.0.0.1', port=8765, interface='wsgi', startup_timeout=30):
+        self.host = host
+        self.port = port
+        self.interface = interface
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.url = f'http://{host}:{port}'
+
+    def __enter__(self):
+        log = open(LOG_PATH, 'w')
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'loadtest', 'serve',
+                '--host', self.host, '--port', str(self.port), '--server', self.interface,
+            ],
+            stdout=log, stderr=subprocess.STDOUT, env=os.environ.copy(),
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited during startup; see {LOG_PATH}")
+            try:
+                socket.create_connection((self.host, self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"Server did not start within {self.startup_timeout}s; see {LOG_PATH}")
+
+    def __exit__(self, *exc_info):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
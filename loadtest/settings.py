@@ -0,0 +1,43 @@
+"""
+Load-test settings: the project settings with a scratch database, so runs
+never touch the development database.
+
+LOADTEST_DB=sqlite (default) uses LOADTEST_SQLITE_PATH, a file in the temp
+directory. LOADTEST_DB=postgres uses the DB_* server settings with the
+LOADTEST_DB_NAME database, which must exist.
+"""
+import tempfile
+from pathlib import Path
+
+from decouple import config
+from stocka.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+if config('LOADTEST_DB', default='sqlite') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('LOADTEST_DB_NAME', default='stocka_loadtest'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default='postgres'),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # Writers wait for each other instead of failing (see loadtest.sqlite3)
+            'ENGINE': 'loadtest.sqlite3',
+            'NAME': config(
+                'LOADTEST_SQLITE_PATH',
+                default=str(Path(tempfile.gettempdir()) / 'stocka-loadtest.sqlite3')
+            ),
+            # Seconds a writer waits for the database lock before failing
+            'OPTIONS': {'timeout': 20},
+        }
+    }
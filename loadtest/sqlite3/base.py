@@ -0,0 +1,16 @@
+"""
+SQLite backend whose transactions take the write lock when they begin.
+
+Django 5.0 starts atomic blocks with a deferred BEGIN. A transaction that
+reads and then writes has to upgrade its lock, and when another writer got
+there first SQLite fails it at once with `database is locked` instead of
+waiting out the `timeout`. BEGIN IMMEDIATE waits for the lock up front, so
+concurrent writers queue behind each other (the `transaction_mode` option
+of Django 5.1).
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import StoredBlob
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'ref_count', 'created_at']
+    search_fields = ['name']
+    readonly_fields = ['name', 'size', 'ref_count', 'created_at']
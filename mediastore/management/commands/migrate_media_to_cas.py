@@ -0,0 +1,45 @@
+"""
+Management command to move existing uploads into content-addressed storage
+"""
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from mediastore.signals import content_addressed_fields
+from mediastore.storage import is_content_addressed
+
+
+class Command(BaseCommand):
+    help = 'Re-store files uploaded before content-addressed storage was enabled, deduplicating them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would move')
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        for model in apps.get_models():
+            for field_name in content_addressed_fields(model):
+                storage = model._meta.get_field(field_name).storage
+                legacy = FileSystemStorage(location=storage.location, base_url=storage.base_url)
+                rows = (
+                    model._base_manager.exclude(**{field_name: ''})
+                    .exclude(**{f'{field_name}__startswith': 'cas/'})
+                    .exclude(**{f'{field_name}__isnull': True})
+                    .values_list('pk', field_name)
+                )
+                for pk, name in rows.iterator():
+                    if is_content_addressed(name):
+                        continue
+                    if not legacy.exists(name):
+                        missing += 1
+                        self.stderr.write(f'{model.__name__} {pk}: {name} is missing')
+                        continue
+                    moved += 1
+                    if options['dry_run']:
+                        continue
+                    with legacy.open(name, 'rb') as f:
+                        new_name = storage.save(name, f)
+                    model._base_manager.filter(pk=pk).update(**{field_name: new_name})
+                    legacy.delete(name)
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {moved} files, {missing} missing'))
@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class StoredBlob(models.Model):
+    """A deduplicated file in content-addressed storage and how many references it has"""
+    name = models.CharField(max_length=100, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
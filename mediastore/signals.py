@@ -0,0 +1,71 @@
+"""
+Keep content-addressed reference counts in step with the models using them.
+
+Django never deletes files on its own, so every FileField value that is
+dropped (row deleted, or file replaced by a new upload) releases its
+reference here once the transaction commits.
+
+The handlers are connected per model, and only for models with
+content-addressed file fields (see connect_signals). A post_delete receiver
+for every model would stop Django from fast-deleting rows of any model.
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .storage import ContentAddressedStorage, is_content_addressed
+
+
+@lru_cache(maxsize=None)
+def content_addressed_fields(model):
+    return tuple(
+        field.name
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    )
+
+
+def release(storage, name):
+    if is_content_addressed(name):
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def remember_stored_files(sender, instance, raw=False, **kwargs):
+    fields = content_addressed_fields(sender)
+    if not fields or raw or instance.pk is None:
+        return
+    # Only fields holding a new, not yet saved upload can replace a stored file
+    uploading = [name for name in fields if not getattr(instance, name)._committed]
+    if uploading:
+        instance._stored_file_names = (
+            sender._base_manager.filter(pk=instance.pk).values(*uploading).first() or {}
+        )
+
+
+def release_replaced_files(sender, instance, **kwargs):
+    previous = getattr(instance, '_stored_file_names', None)
+    if not previous:
+        return
+    del instance._stored_file_names
+    for name, old in previous.items():
+        # Re-uploading identical content gives the same name but still added a
+        # reference, so the old one is released either way
+        if old:
+            release(sender._meta.get_field(name).storage, old)
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    for name in content_addressed_fields(sender):
+        release(sender._meta.get_field(name).storage, getattr(instance, name).name)
+
+
+def connect_signals():
+    for model in apps.get_models():
+        if not content_addressed_fields(model):
+            continue
+        pre_save.connect(remember_stored_files, sender=model, dispatch_uid=f'mediastore-pre-save-{model._meta.label}')
+        post_save.connect(release_replaced_files, sender=model, dispatch_uid=f'mediastore-post-save-{model._meta.label}')
+        post_delete.connect(release_deleted_files, sender=model, dispatch_uid=f'mediastore-post-delete-{model._meta.label}')
@@ -0,0 +1,108 @@
+"""
+Content-addressed file storage.
+
+Uploads are hashed (SHA-256) while they are streamed to a temporary file and
+stored once under cas/<aa>/<bb>/<digest><ext>. Saving the same content again
+returns the existing name and bumps its reference count; deleting only
+removes the file when the last reference goes away. Because a name always
+refers to the same bytes, these URLs can be cached forever.
+
+Names outside cas/ (files stored before this backend was enabled) keep the
+plain FileSystemStorage behaviour.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+CAS_PREFIX = 'cas/'
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(CAS_PREFIX)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that deduplicates files by content and reference counts them"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content hash, so there is nothing to avoid
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        ext = os.path.splitext(name)[1].lower()
+        tmp_dir = self.path(CAS_PREFIX + 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            try:
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+
+        digest = hasher.hexdigest()
+        blob_name = f'{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+        full_path = self.path(blob_name)
+
+        try:
+            # The blob row is locked while the file is placed; delete() removes
+            # the file under the same lock, so the two can't interleave
+            with transaction.atomic():
+                blob = self._lock_blob(blob_name, size)
+                if os.path.exists(full_path):
+                    os.unlink(tmp.name)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(tmp.name, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        finally:
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+
+        return blob_name
+
+    def _lock_blob(self, name, size):
+        from .models import StoredBlob
+
+        blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+        if blob is not None:
+            return blob
+        try:
+            with transaction.atomic():
+                return StoredBlob.objects.create(name=name, size=size, ref_count=0)
+        except IntegrityError:
+            return StoredBlob.objects.select_for_update().get(name=name)
+
+    def delete(self, name):
+        """Drop one reference; the file is removed with its last reference"""
+        from .models import StoredBlob
+
+        if not is_content_addressed(name):
+            return super().delete(name)
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.ref_count > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            # Unlinked while the row is still locked: a concurrent _save waits,
+            # then finds no row and places the file again. Should the commit
+            # fail, the row outlives its file until the content is uploaded again
+            if blob is not None:
+                blob.delete()
+            super().delete(name)
@@ -0,0 +1,11 @@
+from django.views.static import serve
+
+# Content-addressed names never change content, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def serve_immutable(request, path, document_root=None):
+    """Development server view for media/cas/ with far-future cache headers"""
+    response = serve(request, path, document_root=document_root)
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
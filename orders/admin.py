@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Order, OrderItem, OrderStatusHistory
+from .models import (
+    Order,
+    OrderItem,
+    OrderStatusHistory,
+    StandingOrder,
+    StandingOrderItem,
+    StockReservation
+)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -49,3 +56,30 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'unit_price', 'total_price']
     list_filter = ['order__status']
     search_fields = ['order__order_number', 'product__name']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['order', 'product', 'quantity', 'expires_at', 'created_at']
+    list_filter = ['expires_at']
+    search_fields = ['order__order_number', 'product__name', 'product__sku']
+    raw_id_fields = ['order', 'product']
+
+
+class StandingOrderItemInline(admin.TabularInline):
+    model = StandingOrderItem
+    extra = 0
+    raw_id_fields = ['product']
+
+
+@admin.register(StandingOrder)
+class StandingOrderAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'name', 'shopkeeper', 'wholesaler', 'interval_days',
+        'next_run_at', 'is_active', 'last_run_at'
+    ]
+    list_filter = ['is_active', 'interval_days']
+    search_fields = ['name', 'shopkeeper__shop_name', 'wholesaler__business_name']
+    readonly_fields = ['last_run_at', 'last_order', 'last_error', 'created_at', 'updated_at']
+    raw_id_fields = ['shopkeeper', 'wholesaler', 'last_order']
+    inlines = [StandingOrderItemInline]
@@ -0,0 +1,112 @@
+"""
+Management command to benchmark order number schemes against the order_number index
+"""
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from orders.numbering import BLOCK_SIZE, format_order_number
+
+
+def random_numbers():
+    """The previous scheme: 8 hex characters of a uuid4"""
+    while True:
+        yield f"ORD-{uuid.uuid4().hex[:8].upper()}"
+
+
+def block_numbers(workers):
+    """Block allocated numbers, with `workers` processes creating orders in turn"""
+    next_block = 1
+    blocks = []
+    for _ in range(workers):
+        blocks.append([next_block * BLOCK_SIZE, (next_block + 1) * BLOCK_SIZE])
+        next_block += 1
+    while True:
+        for block in blocks:
+            if block[0] >= block[1]:
+                block[:] = [next_block * BLOCK_SIZE, (next_block + 1) * BLOCK_SIZE]
+                next_block += 1
+            yield format_order_number(block[0])
+            block[0] += 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Insert millions of order numbers into a scratch SQLite table and report '
+        'insert throughput, collisions and index locality for each numbering scheme'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1_000_000)
+        parser.add_argument('--batch', type=int, default=10_000, help='Rows per transaction')
+        parser.add_argument('--workers', type=int, default=4, help='Processes sharing the block allocator')
+        parser.add_argument(
+            '--cache-mb', type=int, default=8,
+            help='Page cache size; keep it below the index size to see the effect of locality'
+        )
+
+    def handle(self, *args, **options):
+        schemes = [
+            ('random, two indexes', random_numbers(), True),
+            ('random, unique only', random_numbers(), False),
+            (f"blocks x{options['workers']}", block_numbers(options['workers']), False),
+        ]
+        self.stdout.write(
+            f"{options['count']:,} rows, {options['batch']:,} per transaction, "
+            f"{options['cache_mb']} MB cache\n"
+        )
+        self.stdout.write(
+            f"{'scheme':<22}{'rows/s':>10}{'last 10%':>10}{'collisions':>12}"
+            f"{'index MB':>10}{'leaf fill':>11}"
+        )
+        for name, numbers, duplicate_index in schemes:
+            with tempfile.TemporaryDirectory() as tmp:
+                result = self.run_scheme(os.path.join(tmp, 'bench.db'), numbers, duplicate_index, options)
+            self.stdout.write(
+                f"{name:<22}{result['rate']:>10,.0f}{result['tail_rate']:>10,.0f}"
+                f"{result['collisions']:>12,}{result['index_mb']:>10.1f}{result['fill']:>10.0%}"
+            )
+
+    def run_scheme(self, path, numbers, duplicate_index, options):
+        db = sqlite3.connect(path, isolation_level=None)
+        db.execute(f"PRAGMA cache_size = -{options['cache_mb'] * 1024}")
+        db.execute('PRAGMA journal_mode = WAL')
+        db.execute('PRAGMA synchronous = NORMAL')
+        db.execute('CREATE TABLE orders (id INTEGER PRIMARY KEY, order_number TEXT NOT NULL UNIQUE)')
+        if duplicate_index:
+            db.execute('CREATE INDEX orders_order_number ON orders (order_number)')
+
+        count, batch = options['count'], options['batch']
+        tail_start = count - count // 10
+        inserted = collisions = 0
+        started = time.perf_counter()
+        tail_started = started
+        while inserted < count:
+            if inserted >= tail_start and tail_started == started:
+                tail_started = time.perf_counter()
+            rows = list(islice(numbers, min(batch, count - inserted)))
+            db.execute('BEGIN')
+            before = db.total_changes
+            db.executemany('INSERT OR IGNORE INTO orders (order_number) VALUES (?)', ((n,) for n in rows))
+            collisions += len(rows) - (db.total_changes - before)
+            db.execute('COMMIT')
+            inserted += len(rows)
+        finished = time.perf_counter()
+
+        index_bytes, payload, leaves, page_size = db.execute(
+            "SELECT SUM(pgsize), SUM(CASE WHEN pagetype = 'leaf' THEN payload END), "
+            "SUM(pagetype = 'leaf'), MAX(pgsize) FROM dbstat "
+            "WHERE name LIKE 'sqlite_autoindex_orders%' OR name = 'orders_order_number'"
+        ).fetchone()
+        db.close()
+        return {
+            'rate': count / (finished - started),
+            'tail_rate': (count - tail_start) / (finished - tail_started),
+            'collisions': collisions,
+            'index_mb': index_bytes / 2 ** 20,
+            'fill': payload / (leaves * page_size),
+        }
@@ -0,0 +1,16 @@
+"""
+Management command to place orders for due standing orders
+"""
+from django.core.management.base import BaseCommand
+from orders.standing import place_due_standing_orders
+
+
+class Command(BaseCommand):
+    help = 'Place orders for every standing order that is due (schedule at off-peak hours, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Standing orders per transaction')
+
+    def handle(self, *args, **options):
+        placed, failed = place_due_standing_orders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Placed {placed} standing orders, {failed} could not be placed'))
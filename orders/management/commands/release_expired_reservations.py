@@ -0,0 +1,16 @@
+"""
+Management command to clear expired stock reservations
+"""
+from django.core.management.base import BaseCommand
+from orders.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete stock reservations whose hold has expired (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        released = release_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired reservations'))
@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+SEQUENCE_NAME = "orders_order_number_block_seq"
+
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME}")
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {SEQUENCE_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_stockreservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderNumberCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_block", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="order",
+            name="orders_orde_order_n_f3ada5_idx",
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.0 on 2026-10-19 09:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_wholesalerprofile_geocell"),
+        ("orders", "0003_order_number_blocks"),
+        ("products", "0003_productimage_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StandingOrder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(blank=True, max_length=100)),
+                ("interval_days", models.PositiveSmallIntegerField(default=7)),
+                ("next_run_at", models.DateTimeField()),
+                ("is_active", models.BooleanField(default=True)),
+                ("delivery_address", models.TextField()),
+                ("delivery_location", models.CharField(max_length=200)),
+                ("delivery_notes", models.TextField(blank=True)),
+                (
+                    "payment_method",
+                    models.CharField(
+                        choices=[
+                            ("COD", "Cash on Delivery"),
+                            ("MOBILE", "Mobile Money"),
+                            ("BANK", "Bank Transfer"),
+                        ],
+                        default="COD",
+                        max_length=20,
+                    ),
+                ),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "last_order",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="orders.order",
+                    ),
+                ),
+                (
+                    "shopkeeper",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="standing_orders",
+                        to="accounts.shopkeeperprofile",
+                    ),
+                ),
+                (
+                    "wholesaler",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="standing_orders",
+                        to="accounts.wholesalerprofile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["next_run_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="StandingOrderItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField()),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="standing_order_items",
+                        to="products.product",
+                    ),
+                ),
+                (
+                    "standing_order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="orders.standingorder",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="standingorder",
+            index=models.Index(
+                fields=["is_active", "next_run_at"],
+                name="orders_stan_is_acti_10b036_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="standingorderitem",
+            unique_together={("standing_order", "product")},
+        ),
+    ]
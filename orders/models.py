@@ -1,6 +1,7 @@
 from django.db import models
 from accounts.models import ShopkeeperProfile, WholesalerProfile
 from products.models import Product
+from .numbering import order_numbers
 
 
 class Order(models.Model):
@@ -80,7 +81,6 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=['shopkeeper', 'status']),
             models.Index(fields=['wholesaler', 'status']),
-            models.Index(fields=['order_number']),
         ]
     
     def __str__(self):
@@ -88,9 +88,8 @@ class Order(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Generate order number
-            import uuid
-            self.order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
+            # Time-ordered number from a block reserved by this process
+            self.order_number = order_numbers.next_number(using=kwargs.get('using'))
         super().save(*args, **kwargs)
     
     def calculate_totals(self):
@@ -100,6 +99,14 @@ class Order(models.Model):
         self.save()
 
 
+class OrderNumberCounter(models.Model):
+    """Last reserved block of order numbers, on databases without sequences"""
+    last_block = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"Order number block {self.last_block}"
+
+
 class OrderItem(models.Model):
     """Items in an order"""
     order = models.ForeignKey(
@@ -149,3 +156,108 @@ class OrderStatusHistory(models.Model):
     
     def __str__(self):
         return f"{self.order.order_number} - {self.status}"
+
+
+class StockReservation(models.Model):
+    """Stock held for an order line until it is confirmed, cancelled or expires"""
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            # Active holds per product are summed from this index alone
+            models.Index(
+                fields=['product', 'expires_at'],
+                include=['quantity'],
+                name='orders_reservation_hold_idx'
+            ),
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} for {self.order_id}"
+
+
+class StandingOrder(models.Model):
+    """Restock order a shopkeeper wants placed again on a fixed schedule"""
+    shopkeeper = models.ForeignKey(
+        ShopkeeperProfile,
+        on_delete=models.CASCADE,
+        related_name='standing_orders'
+    )
+    wholesaler = models.ForeignKey(
+        WholesalerProfile,
+        on_delete=models.CASCADE,
+        related_name='standing_orders'
+    )
+    name = models.CharField(max_length=100, blank=True)
+    
+    # Schedule
+    interval_days = models.PositiveSmallIntegerField(default=7)
+    next_run_at = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    
+    # Copied onto every placed order
+    delivery_address = models.TextField()
+    delivery_location = models.CharField(max_length=200)
+    delivery_notes = models.TextField(blank=True)
+    payment_method = models.CharField(
+        max_length=20,
+        choices=Order.PaymentMethod.choices,
+        default=Order.PaymentMethod.CASH_ON_DELIVERY
+    )
+    
+    # Outcome of the last run
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['next_run_at']
+        indexes = [
+            models.Index(fields=['is_active', 'next_run_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name or 'Standing order'} - {self.shopkeeper.shop_name}"
+
+
+class StandingOrderItem(models.Model):
+    """Product and quantity placed on every run of a standing order"""
+    standing_order = models.ForeignKey(
+        StandingOrder,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='standing_order_items'
+    )
+    quantity = models.PositiveIntegerField()
+    
+    class Meta:
+        unique_together = ['standing_order', 'product']
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name}"
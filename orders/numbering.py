@@ -0,0 +1,88 @@
+"""
+Order number generation.
+
+Numbers are `ORD-` followed by a 12 digit, zero-padded sequence. Each thread
+reserves a block of BLOCK_SIZE numbers from the database and hands them out
+locally, so there is one round trip per block instead of one per order.
+Blocks are reserved in increasing order, so order numbers follow creation
+time and new rows are appended at the end of the order_number index rather
+than scattered across it like random values.
+
+On PostgreSQL blocks come from a sequence, which is not rolled back with the
+surrounding transaction. Other databases use a counter row; a block reserved
+inside a transaction is only kept if that transaction commits, since after a
+rollback the same block can be handed out again.
+"""
+import threading
+
+from django.db import connections, router
+from django.db.models import F
+
+BLOCK_SIZE = 1000
+PREFIX = 'ORD-'
+SEQUENCE_NAME = 'orders_order_number_block_seq'
+
+
+def format_order_number(value):
+    return f'{PREFIX}{value:012d}'
+
+
+class OrderNumberAllocator:
+    """Hands out order numbers from blocks reserved in the database"""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._local = threading.local()
+
+    def next_number(self, using=None):
+        from .models import Order
+
+        using = using or router.db_for_write(Order)
+        connection = connections[using]
+        state = self._local.__dict__.setdefault(using, {'next': 0, 'end': 0, 'pending': None})
+        if state['next'] >= state['end'] or not self._block_usable(state, connection):
+            block = self._reserve_block(connection)
+            state['next'] = block * self.block_size
+            state['end'] = state['next'] + self.block_size
+        value = state['next']
+        state['next'] += 1
+        return format_order_number(value)
+
+    def _block_usable(self, state, connection):
+        pending = state['pending']
+        if pending is None:
+            return True
+        # The block was reserved inside a transaction that hasn't committed: it
+        # is only usable while its on_commit hook is still queued, i.e. the
+        # reserving transaction (or savepoint) hasn't been rolled back
+        return any(func is pending for _, func, _ in connection.run_on_commit)
+
+    def _reserve_block(self, connection):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT nextval(%s)', [SEQUENCE_NAME])
+                return cursor.fetchone()[0]
+        return self._reserve_counter_block(connection)
+
+    def _reserve_counter_block(self, connection):
+        from .models import OrderNumberCounter
+
+        counter = OrderNumberCounter.objects.using(connection.alias)
+        if not counter.filter(pk=1).update(last_block=F('last_block') + 1):
+            counter.get_or_create(pk=1)
+            counter.filter(pk=1).update(last_block=F('last_block') + 1)
+        block = counter.filter(pk=1).values_list('last_block', flat=True).get()
+
+        state = self._local.__dict__[connection.alias]
+        if connection.in_atomic_block:
+            def confirm():
+                if state['pending'] is confirm:
+                    state['pending'] = None
+            state['pending'] = confirm
+            connection.on_commit(confirm)
+        else:
+            state['pending'] = None
+        return block
+
+
+order_numbers = OrderNumberAllocator()
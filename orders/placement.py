@@ -0,0 +1,86 @@
+"""
+Bulk order placement shared by checkout, reorder and standing orders.
+
+Callers resolve and lock the products first (reservations.lock_products), so
+prices and stock are read in one query, then insert any number of orders
+with one bulk insert each for orders, items and status history.
+"""
+from rest_framework import serializers
+from counters.tally import record_orders_placed
+from .models import Order, OrderItem, OrderStatusHistory
+from .numbering import order_numbers
+
+
+def build_lines(quantities, products):
+    """
+    Validate {product id: quantity} against locked products and return
+    (product, quantity) pairs.
+    """
+    lines = []
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            raise serializers.ValidationError(f"Product {product_id} not found")
+        if not product.is_available:
+            raise serializers.ValidationError(f"{product.name} is no longer available")
+        if quantity < product.minimum_order_quantity:
+            raise serializers.ValidationError(
+                f"Minimum order quantity for {product.name} is {product.minimum_order_quantity}"
+            )
+        lines.append((product, quantity))
+    return lines
+
+
+def place_orders(entries, changed_by=None, notes="Order created"):
+    """
+    Insert unsaved orders with their lines, given [(order, [(product, quantity)])].
+
+    Items are priced at the products' current wholesale price. Stock is not
+    reserved here; see reservations.reserve_stock_for_orders.
+    """
+    orders = []
+    for order, lines in entries:
+        # bulk_create skips Order.save, so numbers and totals are filled in here
+        order.order_number = order_numbers.next_number()
+        order.subtotal = sum(quantity * product.wholesale_price for product, quantity in lines)
+        order.total_amount = order.subtotal + order.delivery_fee
+        orders.append(order)
+    Order.objects.bulk_create(orders)
+
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product=product,
+            quantity=quantity,
+            unit_price=product.wholesale_price,
+            total_price=quantity * product.wholesale_price
+        )
+        for order, lines in entries
+        for product, quantity in lines
+    ])
+    OrderStatusHistory.objects.bulk_create([
+        OrderStatusHistory(order=order, status=order.status, notes=notes, changed_by=changed_by)
+        for order in orders
+    ])
+    record_orders_placed(orders)
+    return orders
+
+
+def order_quantities(entries):
+    """{order: {product id: quantity}} for reserving the stock of placed orders"""
+    return {
+        order: {product.id: quantity for product, quantity in lines}
+        for order, lines in entries
+    }
+
+
+def reload_for_detail(orders):
+    """Fetch orders again with everything OrderDetailSerializer reads"""
+    return Order.objects.filter(id__in=[order.id for order in orders]).select_related(
+        'shopkeeper__user', 'wholesaler__user'
+    ).prefetch_related(
+        'items__product__category',
+        'items__product__wholesaler',
+        'items__product__reviews',
+        'status_history__changed_by'
+    ).order_by('id')
@@ -0,0 +1,138 @@
+"""
+Stock reservations.
+
+Placing an order holds its quantities for STOCK_RESERVATION_TTL seconds; the
+product stock itself is only decremented when the wholesaler confirms. What
+can still be promised to a new order is the stock minus the holds that have
+not expired yet, so an expired hold stops counting right away and the sweeper
+(release_expired_reservations command) only has to clean up the rows.
+
+Products are locked (SELECT ... FOR UPDATE, in id order) before availability
+is checked, so concurrent orders for the same product are serialized.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+from rest_framework import serializers
+from products.detail_cache import invalidate_products
+from products.models import Product
+from .models import StockReservation
+
+
+def lock_products(product_ids):
+    """Lock and return products by id; call inside a transaction"""
+    products = Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')
+    return {product.id: product for product in products}
+
+
+def held_quantities(product_ids, exclude_order=None):
+    """Quantity held by unexpired reservations, per product id"""
+    holds = StockReservation.objects.filter(
+        product_id__in=product_ids,
+        expires_at__gt=timezone.now()
+    )
+    if exclude_order is not None:
+        holds = holds.exclude(order=exclude_order)
+    return dict(
+        holds.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+    )
+
+
+def available_quantities(products):
+    """Available-to-promise (stock minus active holds) per product id"""
+    held = held_quantities([product.id for product in products])
+    return {
+        product.id: max(product.stock_quantity - held.get(product.id, 0), 0)
+        for product in products
+    }
+
+
+def _check_available(products, quantities, held):
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        available = product.stock_quantity - held.get(product_id, 0)
+        if quantity > available:
+            raise serializers.ValidationError(
+                f"Insufficient stock for {product.name}. Available: {max(available, 0)}"
+            )
+
+
+def reserve_stock(order, products, quantities):
+    """
+    Hold stock for a new order.
+
+    `products` must have been locked with lock_products; `quantities` maps
+    product id to the ordered quantity.
+    """
+    reserve_stock_for_orders(products, {order: quantities})
+
+
+def reserve_stock_for_orders(products, order_quantities):
+    """Hold stock for several new orders at once, given {order: quantities}"""
+    totals = {}
+    for quantities in order_quantities.values():
+        for product_id, quantity in quantities.items():
+            totals[product_id] = totals.get(product_id, 0) + quantity
+    _check_available(products, totals, held_quantities(totals))
+    create_reservations(order_quantities)
+
+
+def create_reservations(order_quantities):
+    """Record holds for {order: quantities} whose availability was already checked"""
+    expires_at = timezone.now() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=product_id, quantity=quantity, expires_at=expires_at)
+        for order, quantities in order_quantities.items()
+        for product_id, quantity in quantities.items()
+    ])
+
+
+def commit_reservations(order):
+    """Deduct an order's quantities from stock and drop its holds (on confirmation)"""
+    quantities = dict(order.items.values_list('product_id', 'quantity'))
+    products = lock_products(quantities)
+    # The order's own holds may have expired; stock promised to others can't be used
+    _check_available(products, quantities, held_quantities(quantities, exclude_order=order))
+    _adjust_stock(quantities, -1)
+    order.reservations.all().delete()
+
+
+def release_reservations(order):
+    """Drop an order's holds without touching stock"""
+    order.reservations.all().delete()
+
+
+def restock(order):
+    """Put a confirmed order's quantities back into stock (on cancellation)"""
+    quantities = dict(order.items.values_list('product_id', 'quantity'))
+    lock_products(quantities)
+    _adjust_stock(quantities, 1)
+
+
+def _adjust_stock(quantities, sign):
+    if not quantities:
+        return
+    Product.objects.filter(id__in=quantities).update(
+        stock_quantity=Case(
+            *[When(id=product_id, then=F('stock_quantity') + sign * quantity)
+              for product_id, quantity in quantities.items()],
+            default=F('stock_quantity'),
+        ),
+        updated_at=timezone.now(),
+    )
+    invalidate_products(quantities)
+
+
+def release_expired(batch_size=1000):
+    """Delete expired holds in batches, returning how many were removed"""
+    released = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(expires_at__lte=timezone.now())
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return released
+        released += StockReservation.objects.filter(id__in=ids).delete()[0]
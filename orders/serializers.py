@@ -1,8 +1,14 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
 from django.db import transaction
-from .models import Order, OrderItem, OrderStatusHistory
-from products.models import Product
+from django.utils import timezone
+from .models import Order, OrderItem, OrderStatusHistory, StandingOrder, StandingOrderItem
+from .placement import build_lines, order_quantities, place_orders
+from .reservations import lock_products, reserve_stock, reserve_stock_for_orders
 from products.serializers import ProductListSerializer
+from counters.tally import record_orders_placed
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -96,6 +102,9 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     def validate_items(self, items):
         if not items:
             raise serializers.ValidationError("Order must contain at least one item")
+        product_ids = [item['product_id'] for item in items]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product can only appear once per order")
         return items
     
     @transaction.atomic
@@ -113,21 +122,23 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             **validated_data
         )
         
+        # Lock the ordered products so concurrent orders can't promise the same stock
+        products = lock_products([item['product_id'] for item in items_data])
+        
         # Create order items
         total = 0
+        quantities = {}
         for item_data in items_data:
-            product = Product.objects.get(id=item_data['product_id'])
-            
-            # Validate product belongs to the wholesaler
-            if product.wholesaler != order.wholesaler:
+            product = products.get(item_data['product_id'])
+            if product is None:
                 raise serializers.ValidationError(
-                    f"Product {product.name} does not belong to the selected wholesaler"
+                    f"Product {item_data['product_id']} not found"
                 )
             
-            # Check stock availability
-            if product.stock_quantity < item_data['quantity']:
+            # Validate product belongs to the wholesaler
+            if product.wholesaler_id != order.wholesaler_id:
                 raise serializers.ValidationError(
-                    f"Insufficient stock for {product.name}. Available: {product.stock_quantity}"
+                    f"Product {product.name} does not belong to the selected wholesaler"
                 )
             
             # Check minimum order quantity
@@ -144,8 +155,12 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 unit_price=product.wholesale_price
             )
             
+            quantities[product.id] = item_data['quantity']
             total += item_data['quantity'] * product.wholesale_price
         
+        # Hold the stock until the wholesaler confirms (checks availability)
+        reserve_stock(order, products, quantities)
+        
         # Update order totals
         order.subtotal = total
         order.total_amount = total + order.delivery_fee
@@ -159,9 +174,64 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             changed_by=request.user
         )
         
+        record_orders_placed([order])
+        
         return order
 
 
+class CheckoutSerializer(serializers.ModelSerializer):
+    """Serializer for placing one order per wholesaler from a mixed basket"""
+    items = OrderItemCreateSerializer(many=True, write_only=True)
+    
+    class Meta:
+        model = Order
+        fields = [
+            'delivery_address', 'delivery_location', 'delivery_notes',
+            'delivery_latitude', 'delivery_longitude', 'payment_method', 'items'
+        ]
+    
+    def validate_items(self, items):
+        if not items:
+            raise serializers.ValidationError("Basket must contain at least one item")
+        product_ids = [item['product_id'] for item in items]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product can only appear once per basket")
+        return items
+    
+    @transaction.atomic
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        
+        request = self.context.get('request')
+        if not hasattr(request.user, 'shopkeeper_profile'):
+            raise serializers.ValidationError("Only shopkeepers can create orders")
+        
+        # Resolve (and lock) every product in one query, then group by wholesaler
+        quantities = {item['product_id']: item['quantity'] for item in items_data}
+        products = lock_products(quantities)
+        lines_by_wholesaler = {}
+        for product, quantity in build_lines(quantities, products):
+            lines_by_wholesaler.setdefault(product.wholesaler_id, []).append((product, quantity))
+        
+        entries = [
+            (
+                Order(
+                    shopkeeper=request.user.shopkeeper_profile,
+                    wholesaler_id=wholesaler_id,
+                    **validated_data
+                ),
+                lines
+            )
+            for wholesaler_id, lines in lines_by_wholesaler.items()
+        ]
+        orders = place_orders(entries, changed_by=request.user)
+        
+        # Hold the stock until each wholesaler confirms (checks availability)
+        reserve_stock_for_orders(products, order_quantities(entries))
+        
+        return orders
+
+
 class OrderStatusUpdateSerializer(serializers.Serializer):
     """Serializer for updating order status"""
     status = serializers.ChoiceField(choices=Order.OrderStatus.choices)
@@ -186,3 +256,111 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
             )
         
         return value
+
+
+class StandingOrderItemSerializer(serializers.ModelSerializer):
+    """Serializer for standing order items"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    
+    class Meta:
+        model = StandingOrderItem
+        fields = ['product', 'product_name', 'quantity']
+    
+    def validate_quantity(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Quantity must be at least 1")
+        return value
+
+
+class StandingOrderSerializer(serializers.ModelSerializer):
+    """Serializer for standing orders; items can be copied from a past order"""
+    items = StandingOrderItemSerializer(many=True, required=False)
+    from_order = serializers.IntegerField(write_only=True, required=False)
+    wholesaler_name = serializers.CharField(source='wholesaler.business_name', read_only=True)
+    last_order_number = serializers.CharField(source='last_order.order_number', read_only=True)
+    
+    class Meta:
+        model = StandingOrder
+        fields = [
+            'id', 'name', 'wholesaler', 'wholesaler_name', 'interval_days',
+            'next_run_at', 'is_active', 'delivery_address', 'delivery_location',
+            'delivery_notes', 'payment_method', 'items', 'from_order',
+            'last_run_at', 'last_order_number', 'last_error',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'last_run_at', 'last_error', 'created_at', 'updated_at']
+        extra_kwargs = {
+            'wholesaler': {'required': False},
+            'next_run_at': {'required': False},
+            'delivery_address': {'required': False},
+            'delivery_location': {'required': False},
+        }
+    
+    def validate_interval_days(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Interval must be at least one day")
+        return value
+    
+    def validate(self, data):
+        shopkeeper = getattr(self.context['request'].user, 'shopkeeper_profile', None)
+        if shopkeeper is None:
+            raise PermissionDenied("Only shopkeepers can create standing orders")
+        from_order = data.pop('from_order', None)
+        if from_order is not None:
+            order = Order.objects.filter(pk=from_order, shopkeeper=shopkeeper).first()
+            if order is None:
+                raise serializers.ValidationError({"from_order": "Order not found"})
+            data.setdefault('wholesaler', order.wholesaler)
+            data.setdefault('items', [
+                {'product': item.product, 'quantity': item.quantity}
+                for item in order.items.select_related('product')
+            ])
+            for field in ('delivery_address', 'delivery_location', 'delivery_notes', 'payment_method'):
+                data.setdefault(field, getattr(order, field))
+        
+        if self.instance is None:
+            if 'wholesaler' not in data:
+                raise serializers.ValidationError({"wholesaler": "This field is required."})
+            if not data.get('items'):
+                raise serializers.ValidationError({"items": "Standing order must contain at least one item"})
+            data.setdefault('delivery_address', shopkeeper.shop_address)
+            data.setdefault('delivery_location', shopkeeper.shop_location)
+            data.setdefault(
+                'next_run_at',
+                timezone.now() + timedelta(days=data.get('interval_days', 7))
+            )
+        
+        wholesaler = data.get('wholesaler') or self.instance.wholesaler
+        items = data.get('items')
+        if items is None and 'wholesaler' in data and self.instance is not None:
+            items = [{'product': item.product} for item in self.instance.items.select_related('product')]
+        if items is not None:
+            products = [item['product'] for item in items]
+            if len(set(products)) != len(products):
+                raise serializers.ValidationError({"items": "Each product can only appear once"})
+            for product in products:
+                if product.wholesaler_id != wholesaler.id:
+                    raise serializers.ValidationError(
+                        {"items": f"Product {product.name} does not belong to the selected wholesaler"}
+                    )
+        return data
+    
+    @transaction.atomic
+    def create(self, validated_data):
+        items = validated_data.pop('items')
+        standing_order = StandingOrder.objects.create(**validated_data)
+        StandingOrderItem.objects.bulk_create([
+            StandingOrderItem(standing_order=standing_order, **item) for item in items
+        ])
+        return standing_order
+    
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        items = validated_data.pop('items', None)
+        instance = super().update(instance, validated_data)
+        if items is not None:
+            instance.items.all().delete()
+            StandingOrderItem.objects.bulk_create([
+                StandingOrderItem(standing_order=instance, **item) for item in items
+            ])
+        return instance
@@ -0,0 +1,125 @@
+"""
+Materializing standing orders.
+
+Due standing orders are handled in batches: each batch locks its standing
+orders and the products they use, reads prices, stock and active holds once,
+and places every order that can be fulfilled with the same bulk inserts as
+checkout. A standing order that can't be placed (insufficient stock, product
+no longer available, ...) keeps the reason in last_error and moves on to its
+next run like the others.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .models import Order, StandingOrder, StandingOrderItem
+from .placement import build_lines, order_quantities, place_orders
+from .reservations import create_reservations, held_quantities, lock_products
+
+
+def next_run_after(standing_order, now):
+    """The first scheduled run later than now, skipping runs that were missed"""
+    step = timedelta(days=max(standing_order.interval_days, 1))
+    if standing_order.next_run_at > now:
+        return standing_order.next_run_at
+    missed = (now - standing_order.next_run_at) // step + 1
+    return standing_order.next_run_at + step * missed
+
+
+def _error_message(exc):
+    detail = exc.detail if isinstance(exc.detail, list) else [exc.detail]
+    return '; '.join(str(message) for message in detail)
+
+
+def place_due_standing_orders(now=None, batch_size=200):
+    """Place orders for all due standing orders, returning (placed, failed) counts"""
+    now = now or timezone.now()
+    placed = failed = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked lets several schedulers share the work
+            standing_orders = list(
+                StandingOrder.objects.select_for_update(skip_locked=True)
+                .filter(is_active=True, next_run_at__lte=now)
+                .order_by('next_run_at', 'id')[:batch_size]
+            )
+            if not standing_orders:
+                return placed, failed
+            batch_placed = _place_batch(standing_orders, now)
+            placed += batch_placed
+            failed += len(standing_orders) - batch_placed
+
+
+def _place_batch(standing_orders, now):
+    quantities_by_standing = {standing_order.id: {} for standing_order in standing_orders}
+    items = StandingOrderItem.objects.filter(
+        standing_order__in=standing_orders
+    ).values_list('standing_order_id', 'product_id', 'quantity')
+    for standing_order_id, product_id, quantity in items:
+        quantities_by_standing[standing_order_id][product_id] = quantity
+
+    product_ids = {
+        product_id
+        for quantities in quantities_by_standing.values()
+        for product_id in quantities
+    }
+    products = lock_products(product_ids)
+    held = held_quantities(product_ids)
+    available = {
+        product_id: product.stock_quantity - held.get(product_id, 0)
+        for product_id, product in products.items()
+    }
+
+    entries = []
+    placed_for = []
+    for standing_order in standing_orders:
+        try:
+            lines = _validate(standing_order, quantities_by_standing[standing_order.id], products, available)
+        except serializers.ValidationError as exc:
+            standing_order.last_error = _error_message(exc)
+        else:
+            for product, quantity in lines:
+                available[product.id] -= quantity
+            order = Order(
+                shopkeeper_id=standing_order.shopkeeper_id,
+                wholesaler_id=standing_order.wholesaler_id,
+                delivery_address=standing_order.delivery_address,
+                delivery_location=standing_order.delivery_location,
+                delivery_notes=standing_order.delivery_notes,
+                payment_method=standing_order.payment_method,
+            )
+            entries.append((order, lines))
+            placed_for.append((standing_order, order))
+            standing_order.last_error = ''
+        standing_order.last_run_at = now
+        standing_order.next_run_at = next_run_after(standing_order, now)
+        standing_order.updated_at = now
+
+    if entries:
+        place_orders(entries, notes="Placed from standing order")
+        create_reservations(order_quantities(entries))
+    for standing_order, order in placed_for:
+        standing_order.last_order = order
+
+    StandingOrder.objects.bulk_update(
+        standing_orders,
+        ['last_run_at', 'next_run_at', 'last_error', 'last_order', 'updated_at']
+    )
+    return len(entries)
+
+
+def _validate(standing_order, quantities, products, available):
+    if not quantities:
+        raise serializers.ValidationError("Standing order has no items")
+    lines = build_lines(quantities, products)
+    for product, quantity in lines:
+        if product.wholesaler_id != standing_order.wholesaler_id:
+            raise serializers.ValidationError(
+                f"Product {product.name} does not belong to the selected wholesaler"
+            )
+        if quantity > available[product.id]:
+            raise serializers.ValidationError(
+                f"Insufficient stock for {product.name}. Available: {max(available[product.id], 0)}"
+            )
+    return lines
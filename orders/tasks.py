@@ -0,0 +1,20 @@
+"""
+Outbox handlers for orders
+"""
+import logging
+
+from outbox.messages import handler
+from .models import Order
+
+logger = logging.getLogger('orders.notifications')
+
+
+@handler('orders.status_changed')
+def notify_status_change(order_id, status):
+    """Tell the shopkeeper and wholesaler about a status change (SMS/push providers hook in here)"""
+    order = Order.objects.select_related('shopkeeper__user', 'wholesaler__user').filter(pk=order_id).first()
+    if order is None:
+        return
+    label = Order.OrderStatus(status).label
+    for user in (order.shopkeeper.user, order.wholesaler.user):
+        logger.info("Notify %s: order %s is now %s", user.username, order.order_number, label)
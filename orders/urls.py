@@ -6,14 +6,24 @@ from .views import (
     ShopkeeperOrdersView,
     WholesalerOrdersView,
     OrderCancelView,
+    CheckoutView,
+    OrderReorderView,
+    StandingOrderListCreateView,
+    StandingOrderDetailView,
 )
 
 urlpatterns = [
     # Orders
     path('', OrderListCreateView.as_view(), name='order-list'),
+    path('checkout/', CheckoutView.as_view(), name='order-checkout'),
     path('<int:pk>/', OrderDetailView.as_view(), name='order-detail'),
     path('<int:pk>/status/', OrderStatusUpdateView.as_view(), name='order-status-update'),
     path('<int:pk>/cancel/', OrderCancelView.as_view(), name='order-cancel'),
+    path('<int:pk>/reorder/', OrderReorderView.as_view(), name='order-reorder'),
+    
+    # Standing orders
+    path('standing/', StandingOrderListCreateView.as_view(), name='standing-order-list'),
+    path('standing/<int:pk>/', StandingOrderDetailView.as_view(), name='standing-order-detail'),
     
     # User-specific orders
     path('shopkeeper/orders/', ShopkeeperOrdersView.as_view(), name='shopkeeper-orders'),
@@ -1,19 +1,33 @@
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
-from .models import Order, OrderStatusHistory
+from outbox.messages import enqueue
+from stocka.utils.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from .models import Order, OrderStatusHistory, StandingOrder
+from .placement import build_lines, order_quantities, place_orders, reload_for_detail
+from .reservations import (
+    commit_reservations,
+    lock_products,
+    release_reservations,
+    reserve_stock_for_orders,
+    restock
+)
 from .serializers import (
     OrderListSerializer,
     OrderDetailSerializer,
     OrderCreateSerializer,
-    OrderStatusUpdateSerializer
+    OrderStatusUpdateSerializer,
+    CheckoutSerializer,
+    StandingOrderSerializer
 )
 
 
-class OrderListCreateView(generics.ListCreateAPIView):
+class OrderListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     """List orders or create new order"""
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -46,10 +60,32 @@ class OrderListCreateView(generics.ListCreateAPIView):
         return Order.objects.none()
 
 
-class OrderDetailView(generics.RetrieveAPIView):
+class CheckoutView(APIView):
+    """Place one order per wholesaler for a basket in a single transaction"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = CheckoutSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        orders = reload_for_detail(serializer.save())
+        
+        return Response(
+            {"orders": OrderDetailSerializer(orders, many=True, context={'request': request}).data},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class OrderDetailView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
     """Retrieve order details"""
     serializer_class = OrderDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Items embed the product listing; the phone numbers come from the users
+    validator_lookups = (
+        'updated_at',
+        'items__product__updated_at',
+        'shopkeeper__user__updated_at',
+        'wholesaler__user__updated_at',
+    )
     
     def get_queryset(self):
         user = self.request.user
@@ -68,9 +104,10 @@ class OrderStatusUpdateView(APIView):
     """Update order status"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @transaction.atomic
     def patch(self, request, pk):
         try:
-            order = Order.objects.get(pk=pk)
+            order = Order.objects.select_for_update().get(pk=pk)
             
             # Check permissions
             if hasattr(request.user, 'wholesaler_profile'):
@@ -110,6 +147,15 @@ class OrderStatusUpdateView(APIView):
             old_status = order.status
             order.status = new_status
             
+            # Move stock: confirmation deducts it, cancellation gives it back
+            if new_status == Order.OrderStatus.CONFIRMED:
+                commit_reservations(order)
+            elif new_status == Order.OrderStatus.CANCELLED:
+                if old_status == Order.OrderStatus.PENDING:
+                    release_reservations(order)
+                else:
+                    restock(order)
+            
             # Update timestamps
             if new_status == Order.OrderStatus.CONFIRMED:
                 order.confirmed_at = timezone.now()
@@ -126,13 +172,7 @@ class OrderStatusUpdateView(APIView):
                 notes=notes or f"Status changed from {old_status} to {new_status}",
                 changed_by=request.user
             )
-            
-            # Update product stock if order is confirmed
-            if new_status == Order.OrderStatus.CONFIRMED:
-                for item in order.items.all():
-                    product = item.product
-                    product.stock_quantity -= item.quantity
-                    product.save()
+            enqueue('orders.status_changed', order_id=order.id, status=new_status)
             
             return Response(
                 OrderDetailSerializer(order).data,
@@ -146,7 +186,7 @@ class OrderStatusUpdateView(APIView):
             )
 
 
-class ShopkeeperOrdersView(generics.ListAPIView):
+class ShopkeeperOrdersView(ConditionalListMixin, generics.ListAPIView):
     """List all orders for authenticated shopkeeper"""
     serializer_class = OrderListSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -161,7 +201,7 @@ class ShopkeeperOrdersView(generics.ListAPIView):
         ).select_related('wholesaler')
 
 
-class WholesalerOrdersView(generics.ListAPIView):
+class WholesalerOrdersView(ConditionalListMixin, generics.ListAPIView):
     """List all orders for authenticated wholesaler"""
     serializer_class = OrderListSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -180,9 +220,10 @@ class OrderCancelView(APIView):
     """Cancel an order"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @transaction.atomic
     def post(self, request, pk):
         try:
-            order = Order.objects.get(pk=pk)
+            order = Order.objects.select_for_update().get(pk=pk)
             
             # Check permissions - only shopkeeper or wholesaler can cancel
             if hasattr(request.user, 'shopkeeper_profile'):
@@ -210,12 +251,11 @@ class OrderCancelView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Restore stock if order was confirmed
+            # Restore stock if order was confirmed, otherwise just drop its holds
             if order.status == Order.OrderStatus.CONFIRMED:
-                for item in order.items.all():
-                    product = item.product
-                    product.stock_quantity += item.quantity
-                    product.save()
+                restock(order)
+            else:
+                release_reservations(order)
             
             # Update order status
             order.status = Order.OrderStatus.CANCELLED
@@ -228,6 +268,7 @@ class OrderCancelView(APIView):
                 notes=request.data.get('reason', 'Order cancelled'),
                 changed_by=request.user
             )
+            enqueue('orders.status_changed', order_id=order.id, status=order.status)
             
             return Response(
                 {"message": "Order cancelled successfully"},
@@ -239,3 +280,83 @@ class OrderCancelView(APIView):
                 {"error": "Order not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+
+class OrderReorderView(APIView):
+    """Place a new order with the same items as a past order, at current prices"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @transaction.atomic
+    def post(self, request, pk):
+        if not hasattr(request.user, 'shopkeeper_profile'):
+            return Response(
+                {"error": "Only shopkeepers can reorder"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            order = Order.objects.get(pk=pk, shopkeeper=request.user.shopkeeper_profile)
+        except Order.DoesNotExist:
+            return Response(
+                {"error": "Order not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Current prices and stock for every item, read (and locked) in one query
+        quantities = dict(order.items.values_list('product_id', 'quantity'))
+        products = lock_products(quantities)
+        lines = build_lines(quantities, products)
+        
+        new_order = Order(
+            shopkeeper=order.shopkeeper,
+            wholesaler_id=order.wholesaler_id,
+            delivery_address=order.delivery_address,
+            delivery_location=order.delivery_location,
+            delivery_notes=order.delivery_notes,
+            delivery_latitude=order.delivery_latitude,
+            delivery_longitude=order.delivery_longitude,
+            payment_method=order.payment_method
+        )
+        entries = [(new_order, lines)]
+        place_orders(entries, changed_by=request.user, notes=f"Reordered from {order.order_number}")
+        reserve_stock_for_orders(products, order_quantities(entries))
+        
+        return Response(
+            OrderDetailSerializer(reload_for_detail([new_order]).get(), context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class StandingOrderListCreateView(generics.ListCreateAPIView):
+    """List or create the authenticated shopkeeper's standing orders"""
+    serializer_class = StandingOrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        if not hasattr(self.request.user, 'shopkeeper_profile'):
+            return StandingOrder.objects.none()
+        return StandingOrder.objects.filter(
+            shopkeeper=self.request.user.shopkeeper_profile
+        ).select_related('wholesaler', 'last_order').prefetch_related('items__product')
+    
+    def create(self, request, *args, **kwargs):
+        # Before validation, which looks up the shopkeeper's orders
+        if not hasattr(request.user, 'shopkeeper_profile'):
+            raise PermissionDenied("Only shopkeepers can create standing orders")
+        return super().create(request, *args, **kwargs)
+    
+    def perform_create(self, serializer):
+        serializer.save(shopkeeper=self.request.user.shopkeeper_profile)
+
+
+class StandingOrderDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """Retrieve, update or delete a standing order"""
+    serializer_class = StandingOrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        if not hasattr(self.request.user, 'shopkeeper_profile'):
+            return StandingOrder.objects.none()
+        return StandingOrder.objects.filter(
+            shopkeeper=self.request.user.shopkeeper_profile
+        ).select_related('wholesaler', 'last_order').prefetch_related('items__product')
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'status', 'attempts', 'available_at', 'created_at']
+    list_filter = ['status', 'topic']
+    readonly_fields = ['topic', 'payload', 'attempts', 'last_error', 'created_at']
+    actions = ['retry']
+    
+    @admin.action(description='Retry selected messages')
+    def retry(self, request, queryset):
+        queryset.update(status=OutboxMessage.Status.PENDING, available_at=timezone.now())
@@ -0,0 +1,35 @@
+"""
+Management command to run the outbox worker
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from outbox.messages import claim_batch, process_messages
+
+
+class Command(BaseCommand):
+    help = 'Claim outbox messages in batches and run their handlers in a thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4, help='Handler threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once no message is due')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='outbox') as executor:
+            try:
+                while True:
+                    messages = claim_batch(options['batch_size'])
+                    if not messages:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+                    failed += process_messages(messages, executor=executor)
+                    processed += len(messages)
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} messages, {failed} failed'))
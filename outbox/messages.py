@@ -0,0 +1,117 @@
+"""
+Transactional outbox.
+
+`enqueue` writes a message in the caller's transaction, so it exists exactly
+when the change that caused it was committed. The run_outbox_worker command
+claims due messages in batches and runs the handler registered for each
+topic; handled messages are deleted, failed ones are retried with backoff
+and kept as FAILED after MAX_ATTEMPTS. No broker is involved.
+
+Delivery is at least once (a worker can die after handling a message but
+before deleting it), so handlers must be safe to run twice.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 10
+# Seconds a claimed message stays invisible to other workers
+LEASE_SECONDS = 300
+MAX_BACKOFF_SECONDS = 3600
+
+_handlers = {}
+
+
+def handler(topic):
+    """Register the function that handles messages of a topic"""
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+def enqueue(topic, **payload):
+    """Record a side effect to run once the current transaction commits"""
+    message = OutboxMessage.objects.create(topic=topic, payload=payload)
+    if settings.OUTBOX_PROCESS_ON_COMMIT:
+        transaction.on_commit(lambda: process_messages([message]))
+    return message
+
+
+def claim_batch(batch_size):
+    """Take up to batch_size due messages, hiding them from other workers for a lease"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.Status.PENDING, available_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboxMessage.objects.filter(id__in=ids).update(
+            available_at=now + timedelta(seconds=LEASE_SECONDS),
+            attempts=F('attempts') + 1
+        )
+    return list(OutboxMessage.objects.filter(id__in=ids).order_by('id'))
+
+
+def handle(message):
+    func = _handlers.get(message.topic)
+    if func is None:
+        raise LookupError(f"No outbox handler registered for {message.topic!r}")
+    # Handlers manage their own transactions
+    func(**message.payload)
+
+
+def process_messages(messages, executor=None):
+    """Run the handlers for claimed messages and record the outcome; returns failures"""
+    if executor is None:
+        errors = [_run(message) for message in messages]
+    else:
+        errors = list(executor.map(_run_in_thread, messages))
+
+    now = timezone.now()
+    failed = []
+    for message, error in zip(messages, errors):
+        if error is None:
+            continue
+        message.last_error = error
+        if message.attempts >= MAX_ATTEMPTS:
+            message.status = OutboxMessage.Status.FAILED
+        else:
+            backoff = min(2 ** message.attempts, MAX_BACKOFF_SECONDS)
+            message.available_at = now + timedelta(seconds=backoff)
+        failed.append(message)
+
+    OutboxMessage.objects.filter(
+        id__in=[message.id for message, error in zip(messages, errors) if error is None]
+    ).delete()
+    if failed:
+        OutboxMessage.objects.bulk_update(failed, ['status', 'available_at', 'last_error'])
+    return len(failed)
+
+
+def _run(message):
+    try:
+        handle(message)
+    except Exception as exc:
+        logger.exception("Outbox message %s (%s) failed", message.id, message.topic)
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+def _run_in_thread(message):
+    try:
+        return _run(message)
+    finally:
+        # Pool threads keep their own connections; drop them per CONN_MAX_AGE
+        close_old_connections()
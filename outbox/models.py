@@ -0,0 +1,37 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """Side effect recorded in the same transaction as the change that caused it"""
+    
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        FAILED = 'FAILED', 'Failed'
+    
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Not picked up before this time (retry backoff, or while a worker holds it)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['available_at'],
+                condition=Q(status='PENDING'),
+                name='outbox_pending_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
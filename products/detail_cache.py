@@ -0,0 +1,96 @@
+"""
+Versioned cache of product detail payloads.
+
+Each product has a version token in the cache, and its serialized detail is
+stored under a key containing that token. Invalidating a product swaps the
+token (after the transaction commits), so a payload built from the old rows
+can never be served again, not even one stored by a request that raced the
+write. Old entries simply expire. Misses are filled from the primary, as a
+lagging replica would store the old row under the new token.
+
+Signals (products.signals) invalidate on Product, ProductImage,
+ProductReview, Category, WholesalerProfile and wholesaler User changes.
+Queryset updates and bulk_create send no signals, so code doing those calls
+invalidate_products itself (bulk adjust, import, stock changes on
+confirmation, image processing).
+
+Available quantity is left out of the cached payload: it changes with every
+stock hold and when holds expire, so it is computed per request. Counters
+updated in place (wholesaler rating, total orders) may lag by up to
+PRODUCT_DETAIL_CACHE_TIMEOUT.
+"""
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(product_id):
+    return f'product-detail-version:{product_id}'
+
+
+def _new_token():
+    return secrets.token_hex(6)
+
+
+def invalidate_products(product_ids):
+    """Make cached details of these products stale once the transaction commits"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    transaction.on_commit(
+        lambda: cache.set_many({_version_key(pk): _new_token() for pk in product_ids}, None)
+    )
+
+
+def invalidate_product(product_id):
+    invalidate_products([product_id])
+
+
+def invalidate_wholesaler(wholesaler_id):
+    from .models import Product
+    invalidate_products(Product.objects.filter(wholesaler_id=wholesaler_id).values_list('id', flat=True))
+
+
+def invalidate_category(category_id):
+    from .models import Product
+    invalidate_products(Product.objects.filter(category_id=category_id).values_list('id', flat=True))
+
+
+class CachedProductDetail:
+    """The cache slot for one product's detail, as seen by one request"""
+
+    def __init__(self, product_id, request):
+        self.product_id = product_id
+        version_key = _version_key(product_id)
+        token = cache.get(version_key)
+        if token is None:
+            cache.add(version_key, _new_token(), None)
+            token = cache.get(version_key)
+        self.token = token
+        # Image URLs are absolute, so payloads differ per scheme and host
+        origin = hashlib.sha1(request.build_absolute_uri('/').encode()).hexdigest()[:12]
+        self.key = f'product-detail:{product_id}:{token}:{origin}'
+
+    def get(self):
+        return cache.get(self.key)
+
+    def set(self, product, data):
+        entry = {
+            'data': data,
+            'is_available': product.is_available,
+            'owner_id': product.wholesaler.user_id,
+        }
+        cache.set(self.key, entry, settings.PRODUCT_DETAIL_CACHE_TIMEOUT)
+        return entry
+
+    def etag(self, available_quantity):
+        return f'"{self.product_id}-{self.token}-{available_quantity}"'
+
+
+def visible_to(entry, user):
+    """Same rule as ProductDetailView.get_queryset"""
+    return entry['is_available'] or user.is_staff or entry['owner_id'] == user.id
+
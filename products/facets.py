@@ -0,0 +1,144 @@
+"""
+Facet counts for product searches.
+
+All requested facets are computed from a single GROUP BY over the filtered
+queryset (grouped by every requested dimension at once) and rolled up in
+Python, so the catalog UI gets every count in one round trip.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BooleanField, Case, Count, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+
+FACETS = ['category', 'wholesaler', 'price', 'stock']
+DEFAULT_PRICE_BUCKETS = [Decimal('100'), Decimal('500'), Decimal('1000'), Decimal('5000')]
+MAX_PRICE_BUCKETS = 20
+
+# Query params that don't change the facet counts
+IGNORED_PARAMS = {'page', 'page_size', 'ordering'}
+
+
+def parse_facets(value):
+    """Parse ?facets=category,price into a sorted list (default: all facets)"""
+    if not value:
+        return list(FACETS)
+    facets = sorted({f.strip() for f in value.split(',') if f.strip()})
+    unknown = [f for f in facets if f not in FACETS]
+    if unknown:
+        raise ValidationError(
+            {"facets": f"Unknown facets: {', '.join(unknown)}. Choose from {', '.join(FACETS)}"}
+        )
+    return facets
+
+
+def parse_price_buckets(value):
+    """Parse ?price_buckets=100,500 into sorted bucket upper bounds"""
+    if not value:
+        return list(DEFAULT_PRICE_BUCKETS)
+    try:
+        bounds = sorted({Decimal(v.strip()) for v in value.split(',') if v.strip()})
+    except InvalidOperation:
+        raise ValidationError({"price_buckets": "price_buckets must be a list of numbers"})
+    if not bounds or len(bounds) > MAX_PRICE_BUCKETS:
+        raise ValidationError(
+            {"price_buckets": f"Provide between 1 and {MAX_PRICE_BUCKETS} bucket bounds"}
+        )
+    return bounds
+
+
+def facets_cache_key(params, facets, price_buckets):
+    """Cache key for a normalized query (param order and paging don't matter)"""
+    normalized = sorted(
+        (key, value)
+        for key in params
+        if key not in IGNORED_PARAMS and key not in ('facets', 'price_buckets')
+        for value in sorted(params.getlist(key))
+    )
+    raw = repr((normalized, facets, [str(b) for b in price_buckets]))
+    return 'product-facets:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _price_bucket_labels(price_buckets):
+    labels = []
+    lower = Decimal('0')
+    for upper in price_buckets:
+        labels.append({"key": f"{lower}-{upper}", "min": str(lower), "max": str(upper)})
+        lower = upper
+    labels.append({"key": f"{lower}+", "min": str(lower), "max": None})
+    return labels
+
+
+def compute_facets(queryset, facets, price_buckets):
+    """Return facet counts for the queryset using one grouped query"""
+    group_by = []
+    annotations = {}
+    if 'category' in facets:
+        group_by += ['category_id', 'category__name']
+    if 'wholesaler' in facets:
+        group_by += ['wholesaler_id', 'wholesaler__business_name']
+    if 'price' in facets:
+        annotations['price_bucket'] = Case(
+            *[
+                When(price__lt=upper, then=Value(index))
+                for index, upper in enumerate(price_buckets)
+            ],
+            default=Value(len(price_buckets)),
+            output_field=IntegerField(),
+        )
+        group_by.append('price_bucket')
+    if 'stock' in facets:
+        annotations['in_stock'] = Case(
+            When(stock_quantity__gt=0, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+        group_by.append('in_stock')
+
+    rows = (
+        queryset.order_by()
+        .annotate(**annotations)
+        .values(*group_by)
+        .annotate(count=Count('id'))
+    )
+
+    total = 0
+    categories = {}
+    wholesalers = {}
+    price_counts = [0] * (len(price_buckets) + 1)
+    stock_counts = {"in_stock": 0, "out_of_stock": 0}
+
+    for row in rows:
+        count = row['count']
+        total += count
+        if 'category' in facets:
+            key = row['category_id']
+            entry = categories.setdefault(
+                key, {"id": key, "name": row['category__name'], "count": 0}
+            )
+            entry["count"] += count
+        if 'wholesaler' in facets:
+            key = row['wholesaler_id']
+            entry = wholesalers.setdefault(
+                key, {"id": key, "name": row['wholesaler__business_name'], "count": 0}
+            )
+            entry["count"] += count
+        if 'price' in facets:
+            price_counts[row['price_bucket']] += count
+        if 'stock' in facets:
+            stock_counts["in_stock" if row['in_stock'] else "out_of_stock"] += count
+
+    result = {}
+    if 'category' in facets:
+        result['category'] = sorted(categories.values(), key=lambda c: -c["count"])
+    if 'wholesaler' in facets:
+        result['wholesaler'] = sorted(wholesalers.values(), key=lambda w: -w["count"])
+    if 'price' in facets:
+        result['price'] = [
+            dict(label, count=count)
+            for label, count in zip(_price_bucket_labels(price_buckets), price_counts)
+        ]
+    if 'stock' in facets:
+        result['stock'] = stock_counts
+
+    return {"count": total, "facets": result}
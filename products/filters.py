@@ -0,0 +1,25 @@
+from rest_framework import filters
+
+
+class ProductOrderingFilter(filters.OrderingFilter):
+    """
+    Ordering filter that only allows ordering by distance when the
+    queryset has been annotated with it by a proximity search.
+    """
+
+    annotated_fields = ['distance']
+
+    def get_ordering(self, request, queryset, view):
+        # Proximity searches default to nearest first
+        if not request.query_params.get(self.ordering_param) and \
+           'distance' in queryset.query.annotations:
+            return ['distance']
+        return super().get_ordering(request, queryset, view)
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid_fields = super().remove_invalid_fields(queryset, fields, view, request)
+        return [
+            term for term in valid_fields
+            if term.lstrip('-') not in self.annotated_fields
+            or term.lstrip('-') in queryset.query.annotations
+        ]
@@ -0,0 +1,175 @@
+"""
+Product image processing.
+
+Uploaded originals are kept as-is; the outbox worker generates resized
+WebP and JPEG variants (EXIF orientation applied, metadata stripped) and a
+blurhash placeholder for each image, so list views can serve thumbnails
+instead of full-resolution photos.
+"""
+import io
+import math
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+from outbox.messages import enqueue
+from .detail_cache import invalidate_product
+
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+BLURHASH_COMPONENTS = (4, 3)
+
+
+def schedule_image_processing(image_id):
+    """Queue an image for the outbox worker; it is processed after the upload commits"""
+    enqueue('products.process_image', image_id=image_id)
+
+
+def process_image_by_id(image_id):
+    from .models import ProductImage
+
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+    if product_image is not None:
+        process_image(product_image)
+
+
+def process_image(product_image):
+    """Generate variants and blurhash for a ProductImage and store them on it"""
+    with product_image.image.open('rb') as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    if original.mode not in ('RGB', 'RGBA'):
+        has_alpha = original.mode in ('LA', 'PA') or 'transparency' in original.info
+        original = original.convert('RGBA' if has_alpha else 'RGB')
+
+    widths = [w for w in VARIANT_WIDTHS if w < original.width] or [original.width]
+    if original.width not in widths and original.width < VARIANT_WIDTHS[-1]:
+        widths.append(original.width)
+
+    variants = {name: {} for name in VARIANT_FORMATS}
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS)
+        # Don't carry EXIF/ICC or other metadata into the variants
+        resized.info = {}
+        for name, options in VARIANT_FORMATS.items():
+            image = resized
+            if options['format'] == 'JPEG' and image.mode == 'RGBA':
+                image = Image.new('RGB', image.size, (255, 255, 255))
+                image.paste(resized, mask=resized.getchannel('A'))
+            buffer = io.BytesIO()
+            image.save(buffer, **options)
+            path = f"products/variants/{product_image.pk}/{width}.{name}"
+            variants[name][str(width)] = default_storage.save(path, ContentFile(buffer.getvalue()))
+
+    # Reprocessing replaces the previous variants
+    delete_variants(product_image)
+    product_image.variants = variants
+    product_image.width = original.width
+    product_image.height = original.height
+    product_image.blurhash = blurhash_encode(original)
+    # Only touch the processing columns; the row may have changed meanwhile
+    type(product_image).objects.filter(pk=product_image.pk).update(
+        variants=product_image.variants,
+        width=product_image.width,
+        height=product_image.height,
+        blurhash=product_image.blurhash,
+    )
+    # The listing thumbnail changes too (see products.signals.touch_parent_product)
+    from .models import Product
+    Product.objects.filter(pk=product_image.product_id).update(updated_at=timezone.now())
+    invalidate_product(product_image.product_id)
+    return product_image
+
+
+def delete_variants(product_image):
+    """Remove (or, with content-addressed storage, release) the stored variant files"""
+    for widths in (product_image.variants or {}).values():
+        for path in widths.values():
+            default_storage.delete(path)
+
+
+# Blurhash (https://blurha.sh) encoding
+
+_BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def _base83(value, length):
+    return ''.join(
+        _BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1)
+    )
+
+
+def _srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash_encode(image, components=BLURHASH_COMPONENTS):
+    """Encode a small blurred placeholder string for the image"""
+    components_x, components_y = components
+    # The hash only keeps a few cosine components, so a tiny thumbnail is enough
+    small = image.convert('RGB')
+    small.thumbnail((32, 32))
+    width, height = small.size
+    pixels = [tuple(_srgb_to_linear(c) for c in p) for p in small.getdata()]
+
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(components_x)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(components_y)]
+
+    factors = []
+    for j in range(components_y):
+        for i in range(components_x):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[i][x] * cos_y[j][y]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(c) for factor in ac for c in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+
+    result += _base83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]),
+        4,
+    )
+    for factor in ac:
+        quantised = [
+            max(0, min(18, int(math.floor(_sign_pow(c / max_value, 0.5) * 9 + 9.5))))
+            for c in factor
+        ]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
@@ -0,0 +1,266 @@
+"""
+Streaming bulk import of wholesaler catalogs.
+
+Rows are read lazily from CSV or JSON-lines files and processed in chunks:
+each chunk is validated, checked against existing SKUs with one query and
+upserted by SKU with bulk_create(update_conflicts=True), only updating the
+columns each row provides. Only per-row errors (capped) are kept in memory,
+never the file itself. A file that stops decoding ends the import with a row
+error; the chunks before it stay imported.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from .detail_cache import invalidate_products
+from .models import Category, Product
+from .suggest import suggest_index
+
+REQUIRED_ON_CREATE = ['name', 'price', 'wholesale_price']
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """Validates one catalog row; category is given by name"""
+    sku = serializers.CharField(max_length=100)
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(allow_blank=True)
+    category = serializers.CharField(max_length=100, allow_blank=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    wholesale_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    minimum_order_quantity = serializers.IntegerField(min_value=1)
+    stock_quantity = serializers.IntegerField(min_value=0)
+    unit = serializers.CharField(max_length=50)
+    expiry_date = serializers.DateField(allow_null=True)
+    is_available = serializers.BooleanField()
+
+
+def detect_format(filename, requested=None):
+    if requested:
+        return requested.lower()
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_rows(fileobj, file_format):
+    """Yield (row_number, dict) from a binary file object without loading it"""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    row_number = 0
+    try:
+        for row_number, row in _iter_text_rows(text, file_format):
+            yield row_number, row
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Nothing after an undecodable byte or a broken CSV record can be
+        # trusted, so report it as a row error and stop reading
+        yield row_number + 1, ValueError(f"Could not read the file from here on, nothing further was imported: {exc}")
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def _iter_text_rows(text, file_format):
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row_number, row in enumerate(reader, start=2):
+            # Empty cells mean "not provided" so updates only touch given columns
+            yield row_number, {k.strip(): v.strip() for k, v in row.items()
+                               if k and v is not None and v.strip() != ''}
+    elif file_format == 'jsonl':
+        for row_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield row_number, exc
+                continue
+            yield row_number, row if isinstance(row, dict) else ValueError("Expected a JSON object")
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+class SkusTaken(Exception):
+    """SKUs of the chunk that belong to another wholesaler after all"""
+
+    def __init__(self, skus):
+        super().__init__(skus)
+        self.skus = skus
+
+
+class ProductImporter:
+    """Upsert a wholesaler's products by SKU from a CSV or JSON-lines stream"""
+
+    def __init__(self, wholesaler, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.wholesaler = wholesaler
+        self.chunk_size = chunk_size
+        self.categories = {
+            name.lower(): pk for pk, name in Category.objects.values_list('id', 'name')
+        }
+        # Bound once and reused: building a serializer per row costs more than the insert
+        self.fields = ProductImportRowSerializer().fields
+        self.seen_skus = set()
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, fileobj, file_format):
+        rows = iter_rows(fileobj, file_format)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+
+        if self.created or self.updated:
+            # bulk_create doesn't send post_save, so refresh autocomplete separately
+            suggest_index.mark_stale()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+    def add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def validate_row(self, row):
+        """Validate the provided columns of a row; unknown columns are ignored"""
+        data = {}
+        errors = {}
+        for name, value in row.items():
+            field = self.fields.get(name)
+            if field is None:
+                continue
+            try:
+                data[name] = field.run_validation(value)
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+        return data, errors
+
+    def import_chunk(self, chunk):
+        parsed = []
+        for row_number, row in chunk:
+            if isinstance(row, Exception):
+                self.add_error(row_number, {'non_field_errors': [str(row)]})
+                continue
+            sku = str(row.get('sku', '')).strip()
+            if not sku:
+                self.add_error(row_number, {'sku': ['This field is required.']})
+                continue
+            if sku in self.seen_skus:
+                self.add_error(row_number, {'sku': ['Duplicate SKU in this file.']})
+                continue
+            self.seen_skus.add(sku)
+            parsed.append((row_number, sku, row))
+
+        existing = {
+            product.sku: product
+            for product in Product.objects.filter(sku__in=[sku for _, sku, _ in parsed])
+        }
+
+        # Rows are grouped by the columns they provide so existing products only
+        # have those columns overwritten
+        groups = {}
+        updated_ids = []
+        for row_number, sku, row in parsed:
+            product = existing.get(sku)
+            if product is not None and product.wholesaler_id != self.wholesaler.id:
+                self.add_error(row_number, {'sku': ['SKU is already used by another wholesaler.']})
+                continue
+
+            data, errors = self.validate_row(row)
+            if errors:
+                self.add_error(row_number, errors)
+                continue
+
+            missing = [] if product else [f for f in REQUIRED_ON_CREATE if f not in data]
+            if missing:
+                self.add_error(row_number, {f: ['This field is required.'] for f in missing})
+                continue
+
+            category_name = data.pop('category', None)
+            if category_name is not None:
+                if category_name == '':
+                    data['category_id'] = None
+                elif category_name.lower() in self.categories:
+                    data['category_id'] = self.categories[category_name.lower()]
+                else:
+                    self.add_error(row_number, {'category': [f'Unknown category "{category_name}".']})
+                    continue
+
+            if product is None:
+                product = Product(wholesaler=self.wholesaler, **data)
+            else:
+                # The insert half of the upsert still needs every NOT NULL column,
+                # so start from the stored row; only provided columns get updated
+                for name, value in data.items():
+                    setattr(product, name, value)
+                updated_ids.append(product.pk)
+                product.pk = None
+            columns = frozenset(data) - {'sku'}
+            groups.setdefault(columns, []).append((row_number, product))
+
+        while groups:
+            try:
+                self.upsert(groups, updated_ids)
+            except SkusTaken as exc:
+                # Drop those rows and try the rest again
+                for columns, rows in list(groups.items()):
+                    for row_number, product in rows:
+                        if product.sku in exc.skus:
+                            self.add_error(row_number, {'sku': ['SKU is already used by another wholesaler.']})
+                    groups[columns] = [(n, product) for n, product in rows if product.sku not in exc.skus]
+                groups = {columns: rows for columns, rows in groups.items() if rows}
+                continue
+            except DatabaseError as exc:
+                # Usually a concurrent write to the same SKUs; fail the chunk, keep going
+                for rows in groups.values():
+                    for row_number, _ in rows:
+                        self.add_error(row_number, {'non_field_errors': [f'Could not save row: {exc}']})
+                return
+            break
+
+        for rows in groups.values():
+            for _, product in rows:
+                if product.sku in existing:
+                    self.updated += 1
+                else:
+                    self.created += 1
+
+    def upsert(self, groups, updated_ids):
+        skus = [product.sku for rows in groups.values() for _, product in rows]
+        with transaction.atomic():
+            for columns, rows in groups.items():
+                Product.objects.bulk_create(
+                    [product for _, product in rows],
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=sorted(columns | {'updated_at'}),
+                )
+            # Ownership was checked before the transaction. A SKU another
+            # wholesaler inserted since then was just overwritten (wholesaler
+            # isn't an update column), so undo the whole chunk
+            taken = set(
+                Product.objects.filter(sku__in=skus)
+                .exclude(wholesaler=self.wholesaler)
+                .values_list('sku', flat=True)
+            )
+            if taken:
+                raise SkusTaken(taken)
+            # bulk_create sends no post_save; new products have nothing cached
+            invalidate_products(updated_ids)
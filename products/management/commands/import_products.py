@@ -0,0 +1,46 @@
+"""
+Management command to bulk import a wholesaler's product catalog
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from accounts.models import WholesalerProfile
+from products.importer import DEFAULT_CHUNK_SIZE, ProductImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Create or update products by SKU from a CSV or JSON-lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON-lines file to import')
+        parser.add_argument(
+            '--wholesaler', required=True,
+            help='Username or profile id of the wholesaler that owns the products'
+        )
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lookup = Q(user__username=options['wholesaler'])
+        if options['wholesaler'].isdigit():
+            lookup |= Q(id=int(options['wholesaler']))
+        wholesaler = WholesalerProfile.objects.filter(lookup).first()
+        if wholesaler is None:
+            raise CommandError(f"Wholesaler {options['wholesaler']} not found")
+
+        file_format = detect_format(options['path'], options['format'])
+        importer = ProductImporter(wholesaler, chunk_size=options['chunk_size'])
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                summary = importer.run(fileobj, file_format)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if summary['errors_truncated']:
+            self.stderr.write('... more errors not shown')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']}, updated {summary['updated']}, "
+            f"failed {summary['failed']}"
+        ))
@@ -0,0 +1,32 @@
+"""
+Management command to generate resized variants for product images
+"""
+from django.core.management.base import BaseCommand
+from products.images import process_image
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG variants and blurhash placeholders for product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Reprocess every image, not only those without variants'
+        )
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.order_by('id')
+        if not options['all']:
+            images = images.filter(blurhash='')
+
+        processed = failed = 0
+        for product_image in images.iterator():
+            try:
+                process_image(product_image)
+                processed += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f'Image {product_image.pk}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images, {failed} failed'))
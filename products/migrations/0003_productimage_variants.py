@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_product_expiry_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="blurhash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Resized copies: {format: {width: path}}",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
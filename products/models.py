@@ -77,6 +77,15 @@ class ProductImage(models.Model):
     )
     image = models.ImageField(upload_to="products/")
     is_primary = models.BooleanField(default=False)
+
+    # Filled in by the image processing worker (see products.images)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True)
+    variants = models.JSONField(
+        default=dict, blank=True, help_text="Resized copies: {format: {width: path}}"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
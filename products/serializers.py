@@ -1,6 +1,28 @@
+from collections import Counter
+
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Category, Product, ProductImage, ProductReview
+from orders.reservations import available_quantities
 from accounts.serializers import WholesalerProfileSerializer
+from .models import Category, Product, ProductImage, ProductReview
+
+# Width of the variant used for list thumbnails
+THUMBNAIL_WIDTH = "320"
+
+
+def _absolute_url(request, url):
+    return request.build_absolute_uri(url) if request else url
+
+
+def variant_urls(product_image, request=None):
+    """Map the stored variant paths of an image to URLs by format and width"""
+    return {
+        fmt: {
+            width: _absolute_url(request, default_storage.url(path))
+            for width, path in widths.items()
+        }
+        for fmt, widths in (product_image.variants or {}).items()
+    }
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -28,10 +50,24 @@ class CategorySerializer(serializers.ModelSerializer):
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer for product images"""
 
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ["id", "image", "is_primary", "created_at"]
-        read_only_fields = ["id", "created_at"]
+        fields = [
+            "id",
+            "image",
+            "is_primary",
+            "width",
+            "height",
+            "blurhash",
+            "variants",
+            "created_at",
+        ]
+        read_only_fields = ["id", "width", "height", "blurhash", "created_at"]
+
+    def get_variants(self, obj):
+        return variant_urls(obj, self.context.get("request"))
 
 
 class ProductListSerializer(serializers.ModelSerializer):
@@ -42,7 +78,10 @@ class ProductListSerializer(serializers.ModelSerializer):
         source="wholesaler.business_name", read_only=True
     )
     primary_image = serializers.SerializerMethodField()
+    primary_image_thumbnail = serializers.SerializerMethodField()
+    primary_image_blurhash = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -62,25 +101,59 @@ class ProductListSerializer(serializers.ModelSerializer):
             "category_name",
             "wholesaler_name",
             "primary_image",
+            "primary_image_thumbnail",
+            "primary_image_blurhash",
             "average_rating",
+            "distance_km",
             "created_at",
         ]
         read_only_fields = ["id", "created_at"]
 
+    def _get_primary(self, obj):
+        # Lists prefetch it (see products.views.LISTING_PREFETCHES); elsewhere
+        # the lookup runs once per product, shared by the primary image fields
+        if hasattr(obj, "primary_images"):
+            return obj.primary_images[0] if obj.primary_images else None
+        if not hasattr(obj, "_primary_image"):
+            obj._primary_image = obj.images.filter(is_primary=True).first()
+        return obj._primary_image
+
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = self._get_primary(obj)
         if primary_image:
             request = self.context.get("request")
             if request:
                 return request.build_absolute_uri(primary_image.image.url)
         return None
 
+    def get_primary_image_thumbnail(self, obj):
+        primary_image = self._get_primary(obj)
+        if primary_image:
+            variants = variant_urls(primary_image, self.context.get("request"))
+            for fmt in ("webp", "jpeg"):
+                widths = variants.get(fmt) or {}
+                if widths:
+                    # Fall back to the largest variant for images narrower than the thumbnail
+                    return widths.get(THUMBNAIL_WIDTH) or widths[max(widths, key=int)]
+        return None
+
+    def get_primary_image_blurhash(self, obj):
+        primary_image = self._get_primary(obj)
+        return primary_image.blurhash if primary_image else ""
+
     def get_average_rating(self, obj):
         reviews = obj.reviews.all()
         if reviews:
             return round(sum(r.rating for r in reviews) / len(reviews), 2)
         return 0
 
+    def get_distance_km(self, obj):
+        # Only present when the list was filtered by lat/lng
+        distance = getattr(obj, "distance", None)
+        if distance is None:
+            return None
+        return round(distance, 2)
+
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for product"""
@@ -94,6 +167,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     reviews = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
     review_count = serializers.SerializerMethodField()
+    available_quantity = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -109,6 +183,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "wholesale_price",
             "minimum_order_quantity",
             "stock_quantity",
+            "available_quantity",
             "unit",
             "expiry_date",
             "is_available",
@@ -122,6 +197,12 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The detail cache leaves it out and adds it per request
+        if self.context.get("for_detail_cache"):
+            self.fields.pop("available_quantity")
+
     def get_reviews(self, obj):
         reviews = obj.reviews.all()[:5]  # Latest 5 reviews
         return ProductReviewSerializer(reviews, many=True).data
@@ -135,6 +216,10 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     def get_review_count(self, obj):
         return obj.reviews.count()
 
+    def get_available_quantity(self, obj):
+        # Stock not held by pending orders
+        return available_quantities([obj])[obj.id]
+
 
 class ProductReviewSerializer(serializers.ModelSerializer):
     """Serializer for product reviews"""
@@ -155,3 +240,47 @@ class ProductReviewSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "shopkeeper_name", "created_at", "updated_at"]
+
+
+class ProductAdjustmentSerializer(serializers.Serializer):
+    """One stock/price change in a bulk adjustment, addressed by SKU"""
+
+    sku = serializers.CharField(max_length=100)
+    stock_delta = serializers.IntegerField(required=False)
+    stock_quantity = serializers.IntegerField(required=False, min_value=0)
+    price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    wholesale_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+
+    def validate(self, data):
+        if "stock_delta" in data and "stock_quantity" in data:
+            raise serializers.ValidationError(
+                "Provide either stock_delta or stock_quantity, not both"
+            )
+        if len(data) == 1:
+            raise serializers.ValidationError("No changes provided")
+        return data
+
+
+class ProductBulkAdjustmentSerializer(serializers.Serializer):
+    """List of adjustments applied together in one transaction"""
+
+    max_items = 1000
+
+    items = ProductAdjustmentSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > self.max_items:
+            raise serializers.ValidationError(
+                f"At most {self.max_items} items can be adjusted at once"
+            )
+        counts = Counter(item["sku"] for item in items)
+        duplicates = sorted(sku for sku, count in counts.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(
+                f"Duplicate SKUs: {', '.join(duplicates)}"
+            )
+        return items
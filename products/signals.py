@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .images import delete_variants, schedule_image_processing
+from accounts.models import User, WholesalerProfile
+from accounts.ratings import record_review_rating
+from .detail_cache import invalidate_category, invalidate_product, invalidate_wholesaler
+from .models import Category, Product, ProductImage, ProductReview
+from .suggest import CATEGORY, PRODUCT, suggest_index
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    # Only once committed, so a rolled-back save leaves no suggestion behind
+    transaction.on_commit(lambda: suggest_index.update_product(instance))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    # Deleting clears instance.pk before the commit
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.remove(PRODUCT, pk))
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, **kwargs):
+    transaction.on_commit(lambda: suggest_index.update_category(instance))
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category(sender, instance, **kwargs):
+    # Deleting clears instance.pk before the commit
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.remove(CATEGORY, pk))
+
+
+@receiver(post_save, sender=ProductImage)
+def process_new_image(sender, instance, created, **kwargs):
+    if created:
+        schedule_image_processing(instance.pk)
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_image_variants(sender, instance, **kwargs):
+    transaction.on_commit(lambda: delete_variants(instance))
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if not instance._state.adding:
+        instance._previous_rating = (
+            ProductReview.objects.filter(pk=instance.pk).values_list('rating', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ProductReview)
+def rate_wholesaler(sender, instance, **kwargs):
+    if instance.rating == instance._previous_rating:
+        return
+    wholesaler_id = Product.objects.filter(pk=instance.product_id).values_list('wholesaler_id', flat=True).first()
+    record_review_rating(wholesaler_id, instance.rating, previous=instance._previous_rating)
+
+
+@receiver(post_delete, sender=ProductReview)
+def unrate_wholesaler(sender, instance, **kwargs):
+    wholesaler_id = Product.objects.filter(pk=instance.product_id).values_list('wholesaler_id', flat=True).first()
+    record_review_rating(wholesaler_id, previous=instance.rating)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_detail(sender, instance, **kwargs):
+    invalidate_product(instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def invalidate_parent_product_detail(sender, instance, **kwargs):
+    invalidate_product(instance.product_id)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def touch_parent_product(sender, instance, **kwargs):
+    # Listings show the primary image and rating, and their ETags only look
+    # at the products' updated_at (see stocka.utils.conditional)
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_product_details(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_category(instance.pk)
+
+
+@receiver(post_save, sender=WholesalerProfile)
+def invalidate_wholesaler_product_details(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_wholesaler(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_wholesaler_user_product_details(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the payload doesn't show
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    wholesaler_id = WholesalerProfile.objects.filter(user=instance).values_list('id', flat=True).first()
+    if wholesaler_id is not None:
+        invalidate_wholesaler(wholesaler_id)
@@ -0,0 +1,206 @@
+"""
+In-memory prefix index for product autocomplete.
+
+Each process keeps a sorted list of (term, kind, id) keys covering product
+names (and every word in them), SKUs and category names, and answers prefix
+queries with bisect. The best matches per prefix are memoized; short prefixes,
+which match a large share of the catalog, are precomputed when the index is
+built. Product and category signals keep the index up to date incrementally,
+and a periodic background rebuild refreshes popularity and picks up changes
+made by other processes or by queryset.update().
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+PRODUCT = 'product'
+CATEGORY = 'category'
+
+# Results kept per prefix; requests can ask for at most this many
+MAX_RESULTS = 20
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(_WORD_RE.findall((text or '').lower()))
+
+
+def product_terms(name, sku):
+    name = normalize(name)
+    terms = {name, normalize(sku)}
+    terms.update(name.split())
+    terms.discard('')
+    return frozenset(terms)
+
+
+def category_terms(name):
+    return frozenset({normalize(name)} - {''})
+
+
+class SuggestIndex:
+    """Sorted-array prefix index with incremental updates"""
+
+    precomputed_prefix_length = 3
+    max_memo_size = 50000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._items = {}
+        self._memo = {}
+        self._built_at = None
+        self._rebuilding = False
+
+    # Building
+
+    def rebuild(self):
+        from .models import Category, Product
+
+        products = Product.objects.filter(is_available=True).annotate(
+            popularity=Coalesce(Sum('order_items__quantity'), 0)
+        ).values_list('id', 'name', 'sku', 'popularity')
+        categories = Category.objects.filter(is_active=True).annotate(
+            popularity=Count('products', filter=Q(products__is_available=True))
+        ).values_list('id', 'name', 'popularity')
+
+        items = {}
+        for pk, name, sku, popularity in products.iterator():
+            items[(PRODUCT, pk)] = (name, popularity, product_terms(name, sku))
+        for pk, name, popularity in categories.iterator():
+            items[(CATEGORY, pk)] = (name, popularity, category_terms(name))
+
+        keys = []
+        short_prefixes = {}
+        for item, (_, _, terms) in items.items():
+            for term in terms:
+                keys.append((term,) + item)
+                for length in range(1, min(len(term), self.precomputed_prefix_length) + 1):
+                    short_prefixes.setdefault(term[:length], set()).add(item)
+        keys.sort()
+
+        rank = self._rank_key(items)
+        memo = {
+            prefix: heapq.nsmallest(MAX_RESULTS, matches, key=rank)
+            for prefix, matches in short_prefixes.items()
+        }
+
+        with self._lock:
+            self._items = items
+            self._keys = keys
+            self._memo = memo
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        """Build on first use; afterwards refresh stale indexes in the background"""
+        if self._built_at is None:
+            self.rebuild()
+            return
+        max_age = settings.PRODUCT_SUGGEST_INDEX_MAX_AGE
+        if time.monotonic() - self._built_at > max_age and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._background_rebuild, daemon=True).start()
+
+    def mark_stale(self):
+        """Force a background rebuild on next use (after bulk writes that skip signals)"""
+        if self._built_at is not None:
+            self._built_at = float('-inf')
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    # Incremental updates
+
+    def upsert(self, kind, pk, label, terms):
+        with self._lock:
+            old = self._items.get((kind, pk))
+            if old and old[0] == label and old[2] == terms:
+                return
+            popularity = old[1] if old else 0
+            if old:
+                self._remove_keys(kind, pk, old[2])
+            self._items[(kind, pk)] = (label, popularity, terms)
+            for term in terms:
+                insort(self._keys, (term, kind, pk))
+            self._invalidate(terms | (old[2] if old else frozenset()))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            old = self._items.pop((kind, pk), None)
+            if old:
+                self._remove_keys(kind, pk, old[2])
+                self._invalidate(old[2])
+
+    def _remove_keys(self, kind, pk, terms):
+        for term in terms:
+            key = (term, kind, pk)
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def _invalidate(self, terms):
+        # Only prefixes of the changed terms can have different results
+        for term in terms:
+            for length in range(1, len(term) + 1):
+                self._memo.pop(term[:length], None)
+
+    def update_product(self, product):
+        if self._built_at is None:
+            return
+        if product.is_available:
+            self.upsert(PRODUCT, product.pk, product.name,
+                        product_terms(product.name, product.sku))
+        else:
+            self.remove(PRODUCT, product.pk)
+
+    def update_category(self, category):
+        if self._built_at is None:
+            return
+        if category.is_active:
+            self.upsert(CATEGORY, category.pk, category.name, category_terms(category.name))
+        else:
+            self.remove(CATEGORY, category.pk)
+
+    # Querying
+
+    @staticmethod
+    def _rank_key(items):
+        # Most popular first, then alphabetical
+        return lambda item: (-items[item][1], items[item][0])
+
+    def suggest(self, query, limit):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        with self._lock:
+            top = self._memo.get(prefix)
+            if top is None:
+                matches = set()
+                index = bisect_left(self._keys, (prefix,))
+                while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+                    matches.add(self._keys[index][1:])
+                    index += 1
+                top = heapq.nsmallest(MAX_RESULTS, matches, key=self._rank_key(self._items))
+                if len(self._memo) >= self.max_memo_size:
+                    self._memo = {}
+                self._memo[prefix] = top
+
+            return [
+                {"type": kind, "id": pk, "text": self._items[(kind, pk)][0]}
+                for kind, pk in top[:limit]
+            ]
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,10 @@
+"""
+Outbox handlers for the product catalog
+"""
+from outbox.messages import handler
+from .images import process_image_by_id
+
+
+@handler('products.process_image')
+def process_image(image_id):
+    process_image_by_id(image_id)
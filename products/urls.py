@@ -4,6 +4,10 @@ from .views import (
     CategoryDetailView,
     ProductListCreateView,
     ProductDetailView,
+    ProductBulkAdjustView,
+    ProductFacetsView,
+    ProductImportView,
+    ProductSuggestView,
     WholesalerProductListView,
     ProductImageUploadView,
     ProductReviewListCreateView,
@@ -19,6 +23,10 @@ urlpatterns = [
     path('', ProductListCreateView.as_view(), name='product-list'),
     path('<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('my-products/', WholesalerProductListView.as_view(), name='wholesaler-products'),
+    path('import/', ProductImportView.as_view(), name='product-import'),
+    path('bulk-adjust/', ProductBulkAdjustView.as_view(), name='product-bulk-adjust'),
+    path('facets/', ProductFacetsView.as_view(), name='product-facets'),
+    path('suggest/', ProductSuggestView.as_view(), name='product-suggest'),
     
     # Product Images
     path('<int:product_id>/images/', ProductImageUploadView.as_view(), name='product-image-upload'),
@@ -1,18 +1,40 @@
 from rest_framework import generics, permissions, status, filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Avg
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Case, F, Q, Avg, Prefetch, Value, When
+from django.http import Http404
+from django.utils import timezone
+from orders.reservations import held_quantities
+from stocka.routers import read_from
+from stocka.utils.conditional import ConditionalListMixin, not_modified, set_validators
+from stocka.utils.geo import distance_km_expression, geocells_for_radius
+from .detail_cache import CachedProductDetail, invalidate_products, visible_to
+from .facets import compute_facets, facets_cache_key, parse_facets, parse_price_buckets
+from .filters import ProductOrderingFilter
+from .importer import ProductImporter, detect_format
+from .suggest import MAX_RESULTS as MAX_SUGGESTIONS, suggest_index
 from .models import Category, Product, ProductImage, ProductReview
 from .serializers import (
     CategorySerializer,
     ProductListSerializer,
     ProductDetailSerializer,
     ProductImageSerializer,
-    ProductReviewSerializer
+    ProductReviewSerializer,
+    ProductBulkAdjustmentSerializer,
 )
 from .permissions import IsWholesalerOrReadOnly, IsShopkeeper
 
+# Product listings show each product's primary image and average rating
+LISTING_PREFETCHES = (
+    Prefetch('images', queryset=ProductImage.objects.filter(is_primary=True), to_attr='primary_images'),
+    'reviews',
+)
+
 
 class CategoryListView(generics.ListCreateAPIView):
     """List all categories or create new one (admin only)"""
@@ -38,25 +60,24 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().get_permissions()
 
 
-class ProductListCreateView(generics.ListCreateAPIView):
-    """List all products or create new product (wholesaler only)"""
+class ProductSearchMixin:
+    """Catalog search and filters shared by the product list and facets views"""
     queryset = Product.objects.filter(is_available=True).select_related('wholesaler', 'category')
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, ProductOrderingFilter]
     filterset_fields = ['category', 'wholesaler', 'is_featured']
     search_fields = ['name', 'description', 'sku']
-    ordering_fields = ['price', 'created_at', 'stock_quantity']
+    ordering_fields = ['price', 'created_at', 'stock_quantity', 'distance']
     ordering = ['-created_at']
-    
-    def get_serializer_class(self):
-        if self.request.method == 'POST':
-            return ProductDetailSerializer
-        return ProductListSerializer
+    default_radius_km = 10
+    max_radius_km = 100
     
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # Filter by wholesaler location proximity (simplified)
+        # Filter by distance from a point (?lat=&lng=&radius_km=)
+        queryset = self.filter_by_radius(queryset)
+        
+        # Filter by wholesaler location name
         location = self.request.query_params.get('location')
         if location:
             queryset = queryset.filter(
@@ -78,6 +99,49 @@ class ProductListCreateView(generics.ListCreateAPIView):
         
         return queryset
     
+    def filter_by_radius(self, queryset):
+        """Restrict to wholesalers within radius_km and annotate the distance"""
+        params = self.request.query_params
+        if 'lat' not in params and 'lng' not in params:
+            return queryset
+        
+        try:
+            lat = float(params['lat'])
+            lng = float(params['lng'])
+            radius_km = float(params.get('radius_km', self.default_radius_km))
+        except (KeyError, ValueError):
+            raise ValidationError(
+                {"location": "lat and lng must both be provided as numbers"}
+            )
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValidationError({"location": "lat/lng out of range"})
+        if not 0 < radius_km <= self.max_radius_km:
+            raise ValidationError(
+                {"radius_km": f"radius_km must be between 0 and {self.max_radius_km}"}
+            )
+        
+        # The indexed geocell lookup narrows candidates before the exact distance check
+        return queryset.filter(
+            wholesaler__geocell__in=geocells_for_radius(lat, lng, radius_km)
+        ).annotate(
+            distance=distance_km_expression(
+                'wholesaler__latitude', 'wholesaler__longitude', lat, lng
+            )
+        ).filter(distance__lte=radius_km)
+
+
+class ProductListCreateView(ConditionalListMixin, ProductSearchMixin, generics.ListCreateAPIView):
+    """List all products or create new product (wholesaler only)"""
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related(*LISTING_PREFETCHES)
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return ProductDetailSerializer
+        return ProductListSerializer
+    
     def perform_create(self, serializer):
         # Ensure user is a wholesaler
         if not hasattr(self.request.user, 'wholesaler_profile'):
@@ -85,6 +149,156 @@ class ProductListCreateView(generics.ListCreateAPIView):
         serializer.save(wholesaler=self.request.user.wholesaler_profile)
 
 
+class ProductImportView(APIView):
+    """Bulk create/update the wholesaler's products from a CSV or JSON-lines file"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        if not hasattr(request.user, 'wholesaler_profile'):
+            return Response(
+                {"error": "Only wholesalers can import products"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {"error": "No file provided"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = detect_format(upload.name, request.data.get('format'))
+        if file_format not in ('csv', 'jsonl'):
+            return Response(
+                {"error": "Format must be csv or jsonl"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        importer = ProductImporter(request.user.wholesaler_profile)
+        summary = importer.run(upload, file_format)
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class ProductBulkAdjustView(APIView):
+    """Apply stock and price changes to many of the wholesaler's products at once"""
+    permission_classes = [permissions.IsAuthenticated]
+    adjustable_fields = ['stock_quantity', 'price', 'wholesale_price']
+    
+    def patch(self, request):
+        if not hasattr(request.user, 'wholesaler_profile'):
+            return Response(
+                {"error": "Only wholesalers can adjust products"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Accept either a bare list or {"items": [...]}
+        data = {'items': request.data} if isinstance(request.data, list) else request.data
+        serializer = ProductBulkAdjustmentSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        items = {item['sku']: item for item in serializer.validated_data['items']}
+        
+        with transaction.atomic():
+            # Lock the rows so stock deltas are applied to current values
+            products = {
+                product['sku']: product
+                for product in Product.objects.select_for_update().filter(
+                    wholesaler=request.user.wholesaler_profile,
+                    sku__in=list(items)
+                ).values('id', 'sku', *self.adjustable_fields)
+            }
+            
+            missing = sorted(set(items) - set(products))
+            if missing:
+                return Response(
+                    {"error": "Products not found", "skus": missing},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            changes = {field: [] for field in self.adjustable_fields}
+            negative = []
+            for sku, item in items.items():
+                product = products[sku]
+                if 'stock_delta' in item:
+                    item['stock_quantity'] = product['stock_quantity'] + item['stock_delta']
+                    if item['stock_quantity'] < 0:
+                        negative.append(sku)
+                for field in self.adjustable_fields:
+                    if field in item:
+                        product[field] = item[field]
+                        changes[field].append(When(id=product['id'], then=Value(item[field])))
+            
+            if negative:
+                return Response(
+                    {"error": "Stock cannot go below zero", "skus": negative},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # One UPDATE for the whole batch
+            product_ids = [p['id'] for p in products.values()]
+            Product.objects.filter(id__in=product_ids).update(
+                updated_at=timezone.now(),
+                **{
+                    field: Case(*whens, default=F(field))
+                    for field, whens in changes.items() if whens
+                }
+            )
+            # update() sends no post_save
+            invalidate_products(product_ids)
+        
+        return Response(
+            {
+                "updated": len(products),
+                "results": [
+                    {
+                        "sku": product['sku'],
+                        "stock_quantity": product['stock_quantity'],
+                        "price": str(product['price']),
+                        "wholesale_price": str(product['wholesale_price']),
+                    }
+                    for product in products.values()
+                ],
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ProductFacetsView(ProductSearchMixin, generics.GenericAPIView):
+    """Facet counts (category, wholesaler, price, stock) for a product search"""
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    
+    def get(self, request):
+        params = request.query_params
+        facets = parse_facets(params.get('facets'))
+        price_buckets = parse_price_buckets(params.get('price_buckets'))
+        
+        cache_key = facets_cache_key(params, facets, price_buckets)
+        data = cache.get(cache_key)
+        if data is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            data = compute_facets(queryset, facets, price_buckets)
+            cache.set(cache_key, data, settings.PRODUCT_FACETS_CACHE_TIMEOUT)
+        
+        return Response(data)
+
+
+class ProductSuggestView(APIView):
+    """Autocomplete suggestions for the catalog search box"""
+    # Public catalog data; skip JWT decoding to keep keystroke lookups cheap
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    default_limit = 8
+    
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), MAX_SUGGESTIONS)
+        except ValueError:
+            limit = self.default_limit
+        
+        suggest_index.ensure_fresh()
+        return Response(suggest_index.suggest(query, max(limit, 1)))
+
+
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a product"""
     queryset = Product.objects.all().select_related('wholesaler', 'category')
@@ -101,9 +315,34 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
                 )
             return queryset.filter(is_available=True)
         return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        # The serialized product is cached until it changes (see products.detail_cache)
+        slot = CachedProductDetail(self.kwargs['pk'], request)
+        entry = slot.get()
+        if entry is None:
+            # From the primary: a lagging replica could otherwise store the
+            # old row under the token the write just put in place
+            with read_from(DEFAULT_DB_ALIAS):
+                product = self.get_object()
+                serializer = self.get_serializer(
+                    product, context={**self.get_serializer_context(), 'for_detail_cache': True}
+                )
+                entry = slot.set(product, serializer.data)
+        elif not visible_to(entry, request.user):
+            raise Http404
+        
+        # Not cached: holds are placed and expire without touching the product
+        held = held_quantities([self.kwargs['pk']]).get(self.kwargs['pk'], 0)
+        available = max(entry['data']['stock_quantity'] - held, 0)
+        etag = slot.etag(available)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(Response({**entry['data'], 'available_quantity': available}), etag)
 
 
-class WholesalerProductListView(generics.ListAPIView):
+class WholesalerProductListView(ConditionalListMixin, generics.ListAPIView):
     """List all products for the authenticated wholesaler"""
     serializer_class = ProductListSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -113,7 +352,7 @@ class WholesalerProductListView(generics.ListAPIView):
             return Product.objects.none()
         return Product.objects.filter(
             wholesaler=self.request.user.wholesaler_profile
-        ).select_related('category')
+        ).select_related('category').prefetch_related(*LISTING_PREFETCHES)
 
 
 class ProductImageUploadView(APIView):
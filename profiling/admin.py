@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['fingerprint', 'view', 'calls', 'total_time_ms', 'max_time_ms', 'last_seen']
+    list_filter = ['view']
+    search_fields = ['fingerprint', 'sql', 'view']
+    readonly_fields = ['first_seen', 'explained_at']
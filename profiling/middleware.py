@@ -0,0 +1,214 @@
+"""
+Sampling profiler for live requests.
+
+With PROFILING_ENABLED on, one in PROFILING_SAMPLE_RATE requests is profiled.
+Staff can also profile a single request by sending `X-Profile: 1`, or
+`X-Profile: cprofile` / `X-Profile: stack` to pick the profiler. A profiled
+request records:
+
+- a cProfile function table or folded call stacks sampled every few
+  milliseconds (PROFILING_MODE picks the default);
+- every SQL statement with its duration.
+
+The report is written to the on-disk ring in profiling.reports and its id is
+returned in the `X-Profile-Id` response header.
+
+When PROFILING_ENABLED is off the middleware removes itself at startup.
+Requests that aren't sampled only pay for one random draw.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from . import reports
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_X_PROFILE'
+MODES = ('cprofile', 'stack')
+# Seconds between stack samples
+STACK_INTERVAL = 0.005
+# Rows of the cProfile table kept, by cumulative time
+CPROFILE_ROWS = 80
+# SQL statements kept per report; all of them are counted
+MAX_QUERIES = 500
+
+
+class CProfileProfiler:
+    mode = 'cprofile'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def result(self):
+        output = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=output)
+        stats.sort_stats('cumulative').print_stats(CPROFILE_ROWS)
+        return {'table': output.getvalue()}
+
+
+class StackSampler:
+    """Samples the request thread's call stack from a background thread"""
+
+    mode = 'stack'
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def _sample(self):
+        while not self.stopped.wait(STACK_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def result(self):
+        # Folded stacks, the input format of flamegraph tools
+        return {
+            'interval_ms': STACK_INTERVAL * 1000,
+            'samples': self.samples,
+            'folded': [f'{stack} {count}' for stack, count in self.stacks.most_common()],
+        }
+
+
+PROFILERS = {
+    'cprofile': CProfileProfiler,
+    'stack': StackSampler,
+}
+
+
+class QueryRecorder:
+    """execute_wrapper that records the statements a request runs"""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total += duration
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'duration_ms': round(duration * 1000, 3),
+                })
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        if settings.PROFILING_MODE not in MODES:
+            raise ImproperlyConfigured(f"PROFILING_MODE must be one of {', '.join(MODES)}")
+        self.get_response = get_response
+        rate = settings.PROFILING_SAMPLE_RATE
+        self.probability = 1 / rate if rate > 0 else 0
+
+    def __call__(self, request):
+        trigger, mode = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self._profile(request, trigger, mode)
+
+    def _trigger(self, request):
+        requested = request.META.get(HEADER)
+        if requested and self._is_staff(request):
+            return 'header', requested if requested in MODES else settings.PROFILING_MODE
+        if self.probability and random.random() < self.probability:
+            return 'sample', settings.PROFILING_MODE
+        return None, None
+
+    def _is_staff(self, request):
+        # JWT authentication normally happens in the view, after middleware
+        drf_request = Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        )
+        try:
+            user = drf_request.user
+        except APIException:
+            return False
+        return user.is_authenticated and user.is_staff
+
+    def _profile(self, request, trigger, mode):
+        profiler = PROFILERS[mode]()
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            try:
+                profiler.start()
+            except ValueError:
+                # Another profiler is active in this process (Python 3.12+ allows only one)
+                profiler = None
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+        duration = time.perf_counter() - started
+
+        user = getattr(request, 'user', None)
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'mode': profiler.mode if profiler is not None else None,
+            'trigger': trigger,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'query_count': recorder.count,
+            'query_time_ms': round(recorder.total * 1000, 3),
+            'queries': recorder.queries,
+            'profile': profiler.result() if profiler is not None else None,
+        }
+        try:
+            response['X-Profile-Id'] = reports.save(report)
+        except OSError:
+            logger.exception("Could not store profiling report for %s %s", request.method, request.path)
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-19 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=40, unique=True)),
+                ("sql", models.TextField(help_text="Normalized SQL")),
+                ("view", models.CharField(blank=True, max_length=255)),
+                ("calls", models.PositiveBigIntegerField(default=0)),
+                ("total_time_ms", models.FloatField(default=0)),
+                ("max_time_ms", models.FloatField(default=0)),
+                ("explain", models.TextField(blank=True)),
+                ("explained_at", models.DateTimeField(blank=True, null=True)),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name_plural": "Slow queries",
+                "ordering": ["-total_time_ms"],
+            },
+        ),
+    ]
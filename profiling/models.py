@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    Slow statements aggregated by fingerprint: their SQL with literals and
+    parameters replaced by `?`, so the same query with different values
+    counts as one.
+    """
+    
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField(help_text="Normalized SQL")
+    # View that last ran the statement, e.g. stocka.admin_views.ProductAnalyticsView
+    view = models.CharField(max_length=255, blank=True)
+    calls = models.PositiveBigIntegerField(default=0)
+    total_time_ms = models.FloatField(default=0)
+    max_time_ms = models.FloatField(default=0)
+    explain = models.TextField(blank=True)
+    explained_at = models.DateTimeField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+    
+    class Meta:
+        verbose_name_plural = 'Slow queries'
+        ordering = ['-total_time_ms']
+    
+    def __str__(self):
+        return f"{self.fingerprint[:12]} ({self.calls} calls)"
+    
+    @property
+    def mean_time_ms(self):
+        return self.total_time_ms / self.calls if self.calls else 0
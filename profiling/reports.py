@@ -0,0 +1,91 @@
+"""
+On-disk ring of profiling reports.
+
+Each report is a gzipped JSON file in PROFILING_REPORT_DIR named
+`<unix time ns>-<random hex>.json.gz`, so names sort by age. Once there are
+more than PROFILING_MAX_REPORTS files the oldest are deleted.
+"""
+import gzip
+import json
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+SUFFIX = '.json.gz'
+REPORT_ID = re.compile(r'^\d{19}-[0-9a-f]{8}$')
+
+
+def report_dir():
+    return Path(settings.PROFILING_REPORT_DIR)
+
+
+def _report_ids():
+    try:
+        names = os.listdir(report_dir())
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(SUFFIX)] for name in names if name.endswith(SUFFIX))
+
+
+def save(report):
+    """Write `report` (a JSON-serializable dict) to the ring; returns its id"""
+    directory = report_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    report_id = f'{time.time_ns():019d}-{secrets.token_hex(4)}'
+    report['id'] = report_id
+    # Write under a temporary name so listings never see a partial file
+    temporary = directory / f'.{report_id}.tmp'
+    with gzip.open(temporary, 'wt', encoding='utf-8') as file:
+        json.dump(report, file)
+    os.replace(temporary, directory / f'{report_id}{SUFFIX}')
+    _prune(settings.PROFILING_MAX_REPORTS)
+    return report_id
+
+
+def _prune(keep):
+    ids = _report_ids()
+    for report_id in ids[:max(len(ids) - keep, 0)]:
+        try:
+            os.unlink(report_dir() / f'{report_id}{SUFFIX}')
+        except FileNotFoundError:
+            # Pruned by a concurrent request
+            pass
+
+
+def path_for(report_id):
+    """Path of a stored report, or None for unknown or malformed ids"""
+    if not REPORT_ID.match(report_id):
+        return None
+    path = report_dir() / f'{report_id}{SUFFIX}'
+    return path if path.exists() else None
+
+
+def load(report_id):
+    path = path_for(report_id)
+    if path is None:
+        return None
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+SUMMARY_FIELDS = (
+    'id', 'created_at', 'method', 'path', 'status', 'duration_ms', 'mode',
+    'trigger', 'user_id', 'query_count', 'query_time_ms',
+)
+
+
+def summaries():
+    """Summaries of all stored reports, newest first"""
+    result = []
+    for report_id in reversed(_report_ids()):
+        report = load(report_id)
+        if report is not None:
+            result.append({field: report.get(field) for field in SUMMARY_FIELDS})
+    return result
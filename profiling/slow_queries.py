@@ -0,0 +1,200 @@
+"""
+Slow-query log.
+
+SlowQueryMiddleware times every statement a request runs, using an
+execute_wrapper on each database connection. Statements taking at least
+SLOW_QUERY_THRESHOLD_MS are handled once the response is ready, outside the
+view's transactions:
+
+- a JSON line is written to the `stocka.slow_queries` logger, a rotating
+  file by default (see LOGGING in settings);
+- the statement's SlowQuery row (one per fingerprint) is updated;
+- SELECTs get an EXPLAIN plan, at most once per fingerprint every
+  EXPLAIN_INTERVAL seconds per process.
+
+With SLOW_QUERY_THRESHOLD_MS at 0 (the default) the middleware removes
+itself at startup.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+slow_query_log = logging.getLogger('stocka.slow_queries')
+
+# Slow statements kept per request
+MAX_PER_REQUEST = 50
+# Seconds before the same fingerprint is explained again by this process
+EXPLAIN_INTERVAL = 300
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with literals and parameters replaced by `?` and lists collapsed"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    # IN (?, ?, ?) and multi-row VALUES differ only in length
+    sql = _VALUE_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+class SlowStatement:
+    def __init__(self, alias, sql, params, many, duration):
+        self.alias = alias
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.duration = duration
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 3)
+
+
+class SlowStatementRecorder:
+    """execute_wrapper that keeps the statements over the threshold"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold and len(self.statements) < MAX_PER_REQUEST:
+                self.statements.append(
+                    SlowStatement(context['connection'].alias, sql, params, many, duration)
+                )
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return ''
+    view = getattr(match.func, 'view_class', match.func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+_explained = {}
+
+
+def _should_explain(statement, key):
+    if statement.many or not statement.sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return False
+    now = time.monotonic()
+    if now - _explained.get(key, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+        return False
+    _explained[key] = now
+    return True
+
+
+def explain(statement):
+    """The plan of a statement as text, or '' if the database refuses"""
+    connection = connections[statement.alias]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with transaction.atomic(using=statement.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {statement.sql}', statement.params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        logger.warning("Could not explain slow query %s", statement.sql[:200], exc_info=True)
+        return ''
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def aggregate(key, normalized_sql, view, duration_ms, plan):
+    """Add one call to the fingerprint's SlowQuery row"""
+    now = timezone.now()
+    changes = {
+        'calls': F('calls') + 1,
+        'total_time_ms': F('total_time_ms') + duration_ms,
+        'max_time_ms': Greatest(F('max_time_ms'), duration_ms),
+        'view': view,
+        'last_seen': now,
+    }
+    if plan:
+        changes.update(explain=plan, explained_at=now)
+    row = SlowQuery.objects.filter(fingerprint=key)
+    if row.update(**changes):
+        return
+    try:
+        with transaction.atomic(using=router.db_for_write(SlowQuery)):
+            SlowQuery.objects.create(
+                fingerprint=key,
+                sql=normalized_sql,
+                view=view,
+                calls=1,
+                total_time_ms=duration_ms,
+                max_time_ms=duration_ms,
+                explain=plan,
+                explained_at=now if plan else None,
+                last_seen=now,
+            )
+    except IntegrityError:
+        # A concurrent request recorded the fingerprint first
+        row.update(**changes)
+
+
+def record(statement, request):
+    normalized_sql = normalize(statement.sql)
+    key = fingerprint(normalized_sql)
+    view = view_name(request)
+    plan = explain(statement) if _should_explain(statement, key) else ''
+    slow_query_log.info(json.dumps({
+        'time': timezone.now().isoformat(),
+        'fingerprint': key,
+        'duration_ms': statement.duration_ms,
+        'database': statement.alias,
+        'view': view,
+        'method': request.method,
+        'path': request.path,
+        'sql': statement.sql,
+        'explain': plan or None,
+    }))
+    aggregate(key, normalized_sql, view, statement.duration_ms, plan)
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+
+    def __call__(self, request):
+        recorder = SlowStatementRecorder(self.threshold)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        for statement in recorder.statements:
+            try:
+                record(statement, request)
+            except DatabaseError:
+                logger.exception("Could not record slow query %s", statement.sql[:200])
+        return response
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import ProfileReportDownloadView, ProfileReportListView, SlowQueryReportView
+
+urlpatterns = [
+    path('profiles/', ProfileReportListView.as_view(), name='admin-profile-list'),
+    path('profiles/<str:report_id>/', ProfileReportDownloadView.as_view(), name='admin-profile-download'),
+    path('slow-queries/', SlowQueryReportView.as_view(), name='admin-slow-queries'),
+]
@@ -0,0 +1,87 @@
+"""
+Admin endpoints for stored profiling reports and the slow-query log
+"""
+from django.db.models import F
+from django.http import FileResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import reports
+from .models import SlowQuery
+
+
+class ProfileReportListView(APIView):
+    """List stored profiling reports, newest first"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'results': reports.summaries()})
+
+
+class ProfileReportDownloadView(APIView):
+    """Download one report as gzipped JSON"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, report_id):
+        path = reports.path_for(report_id)
+        if path is None:
+            return Response(
+                {"error": "Profiling report not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            # Pruned since the lookup
+            return Response(
+                {"error": "Profiling report not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f'{report_id}{reports.SUFFIX}',
+            content_type='application/gzip',
+        )
+
+
+class SlowQueryReportView(APIView):
+    """Slow statements aggregated by fingerprint, worst first"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    ORDERINGS = {
+        'total': '-total_time_ms',
+        'mean': '-mean_time_ms',
+        'max': '-max_time_ms',
+        'calls': '-calls',
+        'recent': '-last_seen',
+    }
+    default_limit = 50
+    max_limit = 500
+    
+    def get(self, request):
+        order = request.query_params.get('order', 'total')
+        if order not in self.ORDERINGS:
+            return Response(
+                {"error": f"order must be one of {', '.join(self.ORDERINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        
+        queries = SlowQuery.objects.annotate(
+            mean_time_ms=F('total_time_ms') / F('calls')
+        ).order_by(self.ORDERINGS[order])
+        view = request.query_params.get('view')
+        if view:
+            queries = queries.filter(view=view)
+        
+        return Response({
+            'results': list(queries.values(
+                'fingerprint', 'sql', 'view', 'calls', 'total_time_ms',
+                'mean_time_ms', 'max_time_ms', 'first_seen', 'last_seen',
+                'explain', 'explained_at',
+            )[:max(limit, 1)])
+        })
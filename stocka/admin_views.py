@@ -4,6 +4,7 @@ Admin dashboard views and analytics endpoints
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
+from django.db import connections
 from django.db.models import Count, Sum, Avg, Q
 from django.db.models.functions import TruncDate, TruncMonth
 from django.utils import timezone
@@ -12,6 +13,8 @@ from accounts.models import User, ShopkeeperProfile, WholesalerProfile, RiderPro
 from products.models import Product, Category
 from orders.models import Order
 from delivery.models import Delivery
+from counters.tally import DELIVERIES_COMPLETED, ORDERS_PLACED, period_totals
+from .utils.db import connection_stats
 
 
 class DashboardStatsView(APIView):
@@ -67,6 +70,9 @@ class DashboardStatsView(APIView):
             status=Delivery.DeliveryStatus.DELIVERED
         ).count()
         
+        # Today / this week, read from running counters
+        recent = period_totals([ORDERS_PLACED, DELIVERIES_COMPLETED])
+        
         return Response({
             'users': {
                 'total': total_users,
@@ -83,6 +89,8 @@ class DashboardStatsView(APIView):
             'orders': {
                 'total': total_orders,
                 'in_period': orders_period.count(),
+                'today': recent[ORDERS_PLACED]['today'],
+                'this_week': recent[ORDERS_PLACED]['this_week'],
                 'pending': pending_orders,
                 'processing': processing_orders,
                 'completed': completed_orders,
@@ -95,7 +103,9 @@ class DashboardStatsView(APIView):
             'deliveries': {
                 'total': total_deliveries,
                 'active': active_deliveries,
-                'completed': completed_deliveries
+                'completed': completed_deliveries,
+                'completed_today': recent[DELIVERIES_COMPLETED]['today'],
+                'completed_this_week': recent[DELIVERIES_COMPLETED]['this_week']
             }
         })
 
@@ -366,3 +376,13 @@ class RevenueAnalyticsView(APIView):
             'revenue_by_payment': list(revenue_by_payment),
             'revenue_by_wholesaler': list(revenue_by_wholesaler)
         })
+
+
+class DatabaseConnectionsView(APIView):
+    """Connection reuse settings, pool counters and server-side connections per database"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'databases': [connection_stats(alias) for alias in connections]
+        })
@@ -0,0 +1,13 @@
+"""
+ASGI config for Stocka project.
+
+Serves the whole API, including the event stream (events.views), which
+needs ASGI; e.g. `uvicorn stocka.asgi:application`.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stocka.settings')
+
+application = get_asgi_application()
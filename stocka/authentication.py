@@ -0,0 +1,18 @@
+"""
+JWT authentication that looks the user up on the primary.
+
+ReplicaRoutingMiddleware switches reads to the replica before the view runs,
+and DRF authenticates lazily inside it. Reading the user from a lagging
+replica would reject a user created since the last sync and keep accepting
+one deactivated since, so authentication always reads `default`; the view's
+own queries still go to the replica.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .routers import read_from
+
+
+class PrimaryJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        with read_from(DEFAULT_DB_ALIAS):
+            return super().get_user(validated_token)
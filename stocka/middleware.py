@@ -0,0 +1,99 @@
+"""
+Sends safe requests to read-only views to the read replica.
+
+DATABASE_VIEW_ROUTING maps dotted view paths, or prefixes of them, to the
+database alias their GET requests read from; the longest matching prefix
+wins, so one view can be pinned to `default` inside a routed module.
+
+Read-your-writes: after a user's successful POST, PUT, PATCH or DELETE their
+reads stay on the primary for REPLICA_STICKY_SECONDS, long enough for the
+replica to catch up. Registering and logging in set it too, as those
+requests carry no token yet. The marker lives in the cache, so processes
+only share it with a shared cache backend.
+
+Authentication reads the user from the primary regardless (see
+stocka.authentication).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .routers import _read_alias, replica_configured
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def sticky_key(user_id):
+    return f'replica-sticky:{user_id}'
+
+
+def stick_to_primary(user_id):
+    """Keep the user's reads on the primary for REPLICA_STICKY_SECONDS"""
+    if replica_configured():
+        cache.set(sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def token_user_id(request):
+    """User id from the request's JWT, without loading the user"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except APIException:
+        return None
+
+
+def view_path(view_func):
+    view = getattr(view_func, 'view_class', view_func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        routed = set(settings.DATABASE_VIEW_ROUTING.values()) - {DEFAULT_DB_ALIAS}
+        if not routed & set(connections.settings):
+            # No replica configured
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.aliases = {}
+
+    def __call__(self, request):
+        token = _read_alias.set(DEFAULT_DB_ALIAS)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user_id = token_user_id(request)
+            if user_id is not None:
+                stick_to_primary(user_id)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS:
+            return None
+        alias = self.alias_for(view_path(view_func))
+        if alias == DEFAULT_DB_ALIAS or alias not in connections.settings:
+            return None
+        user_id = token_user_id(request)
+        if user_id is not None and cache.get(sticky_key(user_id)):
+            return None
+        # Reset by __call__ once the response is ready
+        _read_alias.set(alias)
+        return None
+
+    def alias_for(self, path):
+        if path not in self.aliases:
+            matches = [
+                prefix for prefix in settings.DATABASE_VIEW_ROUTING
+                if path == prefix or path.startswith(prefix + '.')
+            ]
+            best = max(matches, key=len, default=None)
+            self.aliases[path] = settings.DATABASE_VIEW_ROUTING[best] if best else DEFAULT_DB_ALIAS
+        return self.aliases[path]
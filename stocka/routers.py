@@ -0,0 +1,45 @@
+"""
+Read-replica routing.
+
+Writes always go to the primary (`default`). Reads go to the primary too,
+unless the code runs inside `read_from(REPLICA_DATABASE)`:
+ReplicaRoutingMiddleware does this for safe requests to the views that
+DATABASE_VIEW_ROUTING sends to the replica. Without a replica in DATABASES
+everything stays on the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_alias = ContextVar('read_alias', default=DEFAULT_DB_ALIAS)
+
+
+def replica_configured():
+    return settings.REPLICA_DATABASE in connections.settings
+
+
+@contextmanager
+def read_from(alias):
+    """Route reads in the block to `alias`"""
+    token = _read_alias.set(alias if alias == DEFAULT_DB_ALIAS or replica_configured() else DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    # Explicit aliases, not None: Django would otherwise fall back to the
+    # database an instance was loaded from, saving replica rows to the replica
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
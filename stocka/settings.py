@@ -4,6 +4,7 @@ Django settings for Stocka project.
 
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,15 +42,25 @@ INSTALLED_APPS = [
     "products",
     "orders",
     "delivery",
+    "mediastore",
+    "idempotency",
+    "outbox",
+    "counters",
+    "profiling",
+    "events",
 ]
 
 MIDDLEWARE = [
+    "profiling.middleware.ProfilingMiddleware",
+    "profiling.slow_queries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "idempotency.middleware.IdempotencyMiddleware",
+    "stocka.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -75,6 +86,8 @@ TEMPLATES = [
 WSGI_APPLICATION = "stocka.wsgi.application"
 
 # Database
+# Alias of the read replica, present when DB_REPLICA_NAME or DB_REPLICA_HOST is set
+REPLICA_DATABASE = "replica"
 if DEBUG:
     DATABASES = {
         "default": {
@@ -82,6 +95,14 @@ if DEBUG:
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
+    # A second SQLite file standing in for the read replica; refresh it with
+    # python manage.py sync_replica
+    if config("DB_REPLICA_NAME", default=""):
+        DATABASES[REPLICA_DATABASE] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / config("DB_REPLICA_NAME"),
+            "TEST": {"MIRROR": "default"},
+        }
 else:
     DATABASES = {
         "default": {
@@ -91,8 +112,64 @@ else:
             "PASSWORD": config("DB_PASSWORD", default="postgres"),
             "HOST": config("DB_HOST", default="localhost"),
             "PORT": config("DB_PORT", default="5432"),
+            # Seconds a connection is kept for later requests (0: one per request)
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+            # Check a kept connection before reusing it, so a dropped one is replaced
+            "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
         }
     }
+    # Share a psycopg connection pool between the threads of each process
+    # instead of keeping a connection per thread
+    if config("DB_POOL", default=False, cast=bool):
+        import django
+        from django.core.exceptions import ImproperlyConfigured
+
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured(
+                "DB_POOL needs Django 5.1+ and psycopg[pool]; "
+                "use DB_CONN_MAX_AGE for persistent connections instead"
+            )
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+                "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+                # Seconds a request waits for a free connection before failing
+                "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
+            }
+        }
+    if config("DB_REPLICA_NAME", default="") or config("DB_REPLICA_HOST", default=""):
+        DATABASES[REPLICA_DATABASE] = {
+            **DATABASES["default"],
+            "NAME": config("DB_REPLICA_NAME", default=DATABASES["default"]["NAME"]),
+            "USER": config("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+            "PASSWORD": config("DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]),
+            "HOST": config("DB_REPLICA_HOST", default=DATABASES["default"]["HOST"]),
+            "PORT": config("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+            # Tests read the primary's test database through this alias
+            "TEST": {"MIRROR": "default"},
+        }
+
+DATABASE_ROUTERS = ["stocka.routers.ReplicaRouter"]
+# Views (dotted paths or prefixes of them) whose GET requests read from the
+# given alias; the longest match wins. See stocka.middleware.
+DATABASE_VIEW_ROUTING = {
+    "stocka.admin_views": REPLICA_DATABASE,
+    "products.views": REPLICA_DATABASE,
+    # Wholesalers manage stock here, which order confirmations change too
+    "products.views.WholesalerProductListView": "default",
+    # Comma-separated views to keep on the primary without a code change
+    **{
+        view: "default"
+        for view in config(
+            "DB_PRIMARY_PINNED_VIEWS",
+            default="",
+            cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+        )
+    },
+}
+# Seconds a user's reads stay on the primary after they write (read-your-writes)
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=10, cast=int)
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -129,6 +206,19 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are stored once per unique content under media/cas/ (see mediastore.storage)
+STORAGES = {
+    "default": {
+        "BACKEND": config(
+            "DEFAULT_FILE_STORAGE_BACKEND",
+            default="mediastore.storage.ContentAddressedStorage",
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -138,7 +228,7 @@ AUTH_USER_MODEL = "accounts.User"
 # REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "stocka.authentication.PrimaryJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_FILTER_BACKENDS": (
@@ -161,6 +251,88 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Cache used for catalog results, product details and replica stickiness.
+# Local memory by default (per process); point CACHE_BACKEND/CACHE_LOCATION at
+# a shared cache such as Redis when running several processes.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+# Catalog
+# Seconds a facet count result is cached per normalized search query
+PRODUCT_FACETS_CACHE_TIMEOUT = config("PRODUCT_FACETS_CACHE_TIMEOUT", default=60, cast=int)
+# Seconds before the per-process autocomplete index is rebuilt from the database
+PRODUCT_SUGGEST_INDEX_MAX_AGE = config("PRODUCT_SUGGEST_INDEX_MAX_AGE", default=300, cast=int)
+# Seconds a serialized product detail is cached; changes invalidate it sooner,
+# except counters updated in place (wholesaler rating and order totals)
+PRODUCT_DETAIL_CACHE_TIMEOUT = config("PRODUCT_DETAIL_CACHE_TIMEOUT", default=300, cast=int)
+
+# Orders
+# Seconds a new order holds its stock while waiting for the wholesaler to confirm
+STOCK_RESERVATION_TTL = config("STOCK_RESERVATION_TTL", default=3600, cast=int)
+# Seconds a response is kept for replaying retries that carry the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=86400, cast=int)
+
+# Outbox
+# Run side effects (image processing, rating updates, notifications) right
+# after commit in the request process instead of waiting for run_outbox_worker.
+# Meant for local development and tests.
+OUTBOX_PROCESS_ON_COMMIT = config("OUTBOX_PROCESS_ON_COMMIT", default=False, cast=bool)
+
+# Live events (see events.bus)
+# LocalBackend only reaches streams in the process that made the change; use
+# events.backends.PostgresBackend when several processes serve the API
+EVENTS_BACKEND = config("EVENTS_BACKEND", default="events.backends.LocalBackend")
+# Events buffered per stream before a slow client is disconnected
+EVENTS_QUEUE_SIZE = config("EVENTS_QUEUE_SIZE", default=100, cast=int)
+EVENTS_KEEPALIVE_SECONDS = config("EVENTS_KEEPALIVE_SECONDS", default=15, cast=int)
+# Seconds after which a stream ends (sooner if its token expires). Clients
+# reconnect, which checks their user again and lets servers shut down
+EVENTS_MAX_STREAM_SECONDS = config("EVENTS_MAX_STREAM_SECONDS", default=300, cast=int)
+
+# Profiling (see profiling.middleware)
+# Off by default; when off the middleware is removed at startup
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool)
+# Profile one in N requests; 0 profiles only requests sent by staff with X-Profile
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0, cast=int)
+# "cprofile" (function table) or "stack" (sampled call stacks, lower overhead)
+PROFILING_MODE = config("PROFILING_MODE", default="stack")
+PROFILING_REPORT_DIR = config("PROFILING_REPORT_DIR", default=str(BASE_DIR / "profiles"))
+# Reports kept on disk; the oldest are deleted first
+PROFILING_MAX_REPORTS = config("PROFILING_MAX_REPORTS", default=200, cast=int)
+
+# Slow-query log (see profiling.slow_queries); 0 turns it off
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=0, cast=float)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": config("SLOW_QUERY_LOG_PATH", default=str(BASE_DIR / "slow_queries.log")),
+            "maxBytes": config("SLOW_QUERY_LOG_MAX_BYTES", default=10 * 1024 * 1024, cast=int),
+            "backupCount": config("SLOW_QUERY_LOG_BACKUPS", default=5, cast=int),
+            "formatter": "message",
+            # Don't create the file until a slow query is logged
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "stocka.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     "CORS_ALLOWED_ORIGINS",
@@ -169,3 +341,5 @@ CORS_ALLOWED_ORIGINS = config(
 )
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "x-profile", "if-none-match", "if-modified-since")
+CORS_EXPOSE_HEADERS = ["idempotent-replayed", "x-profile-id", "etag"]
@@ -0,0 +1,538 @@
+"""
+Synthetic marketplace data for load testing.
+
+Builds users, profiles, products, orders (with items and status history),
+deliveries and tracking points with bulk_create, one transaction per chunk,
+so production-sized datasets can be generated in minutes. All users share
+one precomputed password hash.
+
+Distributions aim to look like production rather than uniform noise:
+
+- shops and wholesalers cluster around a handful of towns, mostly Nairobi;
+- shops mostly order from wholesalers in their own town;
+- wholesaler and product popularity follow a Zipf distribution, so a few
+  products appear in a large share of orders;
+- old orders are delivered or cancelled, recent ones are spread over the
+  whole workflow.
+
+Usernames, phone numbers and SKUs are derived from ids above the current
+maximum, so the generator can be run again on the same database. The same
+seed generates the same rows (with timestamps relative to the current time).
+"""
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time as time_of_day, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from accounts.models import RiderProfile, ShopkeeperProfile, WholesalerProfile
+from accounts.ratings import reconcile_rider_ratings
+from counters.tally import DELIVERIES_COMPLETED, ORDERS_PLACED, bump, increment_many
+from delivery.models import Delivery, DeliveryTracking
+from orders.models import Order, OrderItem, OrderStatusHistory
+from orders.numbering import order_numbers
+from products.models import Category, Product
+from .utils.geo import geocell_for
+
+User = get_user_model()
+
+# Rows generated at scale 1; order items, deliveries and tracking points follow from orders
+BASE_COUNTS = {
+    'wholesalers': 200,
+    'shopkeepers': 5_000,
+    'riders': 500,
+    'products': 20_000,
+    'orders': 100_000,
+}
+
+# (town, latitude, longitude, share of shops and wholesalers)
+TOWNS = [
+    ('Nairobi', -1.2864, 36.8172, 45),
+    ('Mombasa', -4.0435, 39.6682, 15),
+    ('Kisumu', -0.0917, 34.7680, 10),
+    ('Nakuru', -0.3031, 36.0800, 10),
+    ('Eldoret', 0.5143, 35.2698, 8),
+    ('Thika', -1.0333, 37.0693, 7),
+    ('Machakos', -1.5177, 37.2634, 5),
+]
+# Spread of locations around a town centre, in degrees (~5km)
+TOWN_SPREAD = 0.045
+
+CATEGORIES = [
+    'Beverages', 'Snacks', 'Groceries', 'Household', 'Personal Care',
+    'Dairy', 'Bakery', 'Cereals', 'Cooking Oils', 'Spices',
+    'Baby Care', 'Stationery', 'Cleaning', 'Canned Food', 'Confectionery',
+]
+BRANDS = ['Jambo', 'Safari', 'Tembo', 'Simba', 'Baraka', 'Neema', 'Zawadi', 'Kifaru', 'Pwani', 'Mlima']
+PACKS = ['250g', '500g', '1kg', '2kg', '5kg', '300ml', '500ml', '1L', '2L', '6pk', '12pk', '24pk']
+
+ZIPF_EXPONENT = 1.1
+# Share of orders placed with a wholesaler in the shop's own town
+LOCAL_ORDER_SHARE = 0.8
+ITEMS_PER_ORDER = (1, 8)
+TRACKING_POINTS = (4, 12)
+RIDER_RATED_SHARE = 0.4
+
+RECENT_DAYS = 2
+RECENT_STATUSES = {
+    Order.OrderStatus.PENDING: 20,
+    Order.OrderStatus.CONFIRMED: 15,
+    Order.OrderStatus.PROCESSING: 15,
+    Order.OrderStatus.READY: 15,
+    Order.OrderStatus.OUT_FOR_DELIVERY: 15,
+    Order.OrderStatus.DELIVERED: 15,
+    Order.OrderStatus.CANCELLED: 5,
+}
+SETTLED_STATUSES = {
+    Order.OrderStatus.DELIVERED: 88,
+    Order.OrderStatus.CANCELLED: 12,
+}
+
+
+def zipf_cum_weights(count, exponent=ZIPF_EXPONENT):
+    """Cumulative weights for random.choices giving rank r a weight of 1 / r**exponent"""
+    total = 0.0
+    weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def coordinate(value):
+    return Decimal(f"{value:.6f}")
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Keep the created_at/updated_at values set on objects instead of auto_now(_add)"""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataGenerator:
+    """Generate a dataset of BASE_COUNTS * scale rows; see the module docstring"""
+
+    def __init__(self, scale=1.0, seed=42, chunk=5000, days=180,
+                 password='password123', log=None):
+        self.counts = {name: max(1, round(count * scale)) for name, count in BASE_COUNTS.items()}
+        self.rng = random.Random(seed)
+        self.chunk = chunk
+        self.days = days
+        self.password_hash = make_password(password)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+        self.town_cum_weights = list(accumulate(town[3] for town in TOWNS))
+        # Filled in as rows are created
+        self.categories = []
+        self.wholesalers_by_town = defaultdict(list)
+        self.wholesaler_location = {}
+        self.shops = []
+        self.riders = []
+        self.products_by_wholesaler = defaultdict(list)
+        self.orders_by_wholesaler = Counter()
+        self.deliveries_by_rider = Counter()
+        self.orders_by_day = Counter()
+        self.deliveries_by_day = Counter()
+
+    def generate(self):
+        started = time.perf_counter()
+        self.categories = self.create_categories()
+        self.create_wholesalers()
+        self.create_shopkeepers()
+        self.create_riders()
+        self.create_products()
+        self.create_orders()
+        self.update_counters()
+        self.log(f"Done in {time.perf_counter() - started:.1f}s")
+
+    # Helpers
+
+    def town(self):
+        return self.rng.choices(TOWNS, cum_weights=self.town_cum_weights)[0]
+
+    def after(self, moment, min_minutes, max_minutes):
+        """A random time that many minutes after moment, but not in the future"""
+        return min(moment + timedelta(minutes=self.rng.randint(min_minutes, max_minutes)), self.now)
+
+    def location(self, town):
+        _, lat, lng, _ = town
+        return (
+            lat + self.rng.gauss(0, TOWN_SPREAD),
+            lng + self.rng.gauss(0, TOWN_SPREAD),
+        )
+
+    def chunks(self, total):
+        for start in range(0, total, self.chunk):
+            yield start, min(self.chunk, total - start)
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        self.log(f"{label}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    def create_users(self, kind, count, first_id):
+        """Bulk insert `count` users of a type, returning them with their ids"""
+        users = [
+            User(
+                username=f"load-{kind.lower()}-{first_id + i}",
+                email=f"load-{kind.lower()}-{first_id + i}@example.com",
+                password=self.password_hash,
+                # Unique across runs because ids only grow
+                phone_number=f"+999{first_id + i:011d}",
+                user_type=kind,
+                is_verified=True,
+            )
+            for i in range(count)
+        ]
+        return User.objects.bulk_create(users)
+
+    def _next_user_id(self):
+        return (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    # Stages
+
+    def create_categories(self):
+        existing = {category.name: category for category in Category.objects.filter(name__in=CATEGORIES)}
+        Category.objects.bulk_create([
+            Category(name=name, description=f"{name} products")
+            for name in CATEGORIES if name not in existing
+        ])
+        return list(Category.objects.filter(name__in=CATEGORIES).order_by('name'))
+
+    def create_wholesalers(self):
+        started = time.perf_counter()
+        total = self.counts['wholesalers']
+        for _, size in self.chunks(total):
+            with transaction.atomic():
+                first_id = self._next_user_id()
+                users = self.create_users(User.UserType.WHOLESALER, size, first_id)
+                profiles = []
+                for user in users:
+                    town = self.town()
+                    lat, lng = self.location(town)
+                    profiles.append(WholesalerProfile(
+                        user=user,
+                        business_name=f"{self.rng.choice(BRANDS)} Distributors {user.id}",
+                        business_address=f"Plot {self.rng.randint(1, 999)}, Industrial Area, {town[0]}",
+                        business_location=town[0],
+                        latitude=coordinate(lat),
+                        longitude=coordinate(lng),
+                        # bulk_create skips WholesalerProfile.save
+                        geocell=geocell_for(lat, lng),
+                        business_registration=f"BN{user.id:08d}",
+                        is_verified=self.rng.random() < 0.9,
+                    ))
+                WholesalerProfile.objects.bulk_create(profiles)
+            for profile in profiles:
+                self.wholesalers_by_town[profile.business_location].append(profile.id)
+                self.wholesaler_location[profile.id] = (
+                    float(profile.latitude), float(profile.longitude), profile.business_address
+                )
+        self.report('Wholesalers', total, started)
+
+        # Popularity: each town's wholesalers (and all of them) in a random Zipf rank order
+        self.all_wholesalers = list(self.wholesaler_location)
+        self.rng.shuffle(self.all_wholesalers)
+        self.all_wholesalers_cum = zipf_cum_weights(len(self.all_wholesalers))
+        self.town_wholesalers_cum = {}
+        for town, ids in self.wholesalers_by_town.items():
+            self.rng.shuffle(ids)
+            self.town_wholesalers_cum[town] = zipf_cum_weights(len(ids))
+
+    def create_shopkeepers(self):
+        started = time.perf_counter()
+        total = self.counts['shopkeepers']
+        for _, size in self.chunks(total):
+            with transaction.atomic():
+                users = self.create_users(User.UserType.SHOPKEEPER, size, self._next_user_id())
+                profiles = []
+                for user in users:
+                    town = self.town()
+                    lat, lng = self.location(town)
+                    profiles.append(ShopkeeperProfile(
+                        user=user,
+                        shop_name=f"Duka {user.id}",
+                        shop_address=f"Shop {self.rng.randint(1, 200)}, {town[0]}",
+                        shop_location=town[0],
+                        latitude=coordinate(lat),
+                        longitude=coordinate(lng),
+                    ))
+                ShopkeeperProfile.objects.bulk_create(profiles)
+            self.shops.extend(
+                (profile.id, profile.shop_location, profile.latitude, profile.longitude,
+                 profile.shop_address, profile.user.phone_number)
+                for profile in profiles
+            )
+        self.report('Shopkeepers', total, started)
+
+    def create_riders(self):
+        started = time.perf_counter()
+        total = self.counts['riders']
+        for _, size in self.chunks(total):
+            with transaction.atomic():
+                users = self.create_users(User.UserType.RIDER, size, self._next_user_id())
+                profiles = RiderProfile.objects.bulk_create([
+                    RiderProfile(
+                        user=user,
+                        full_name=f"Rider {user.id}",
+                        id_number=f"ID{user.id:08d}",
+                        vehicle_type=self.rng.choice(['Motorcycle', 'Motorcycle', 'Motorcycle', 'Van', 'Bicycle']),
+                        vehicle_registration=f"KM{user.id % 1000:03d}{chr(65 + user.id % 26)}",
+                        is_available=self.rng.random() < 0.6,
+                    )
+                    for user in users
+                ])
+            self.riders.extend((profile.id, profile.full_name, profile.user.phone_number) for profile in profiles)
+        self.report('Riders', total, started)
+
+    def create_products(self):
+        started = time.perf_counter()
+        total = self.counts['products']
+        first_sku = (Product.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        wholesalers = self.all_wholesalers
+        for start, size in self.chunks(total):
+            products = []
+            for i in range(start, start + size):
+                # Bigger (more popular) wholesalers carry more products
+                wholesaler_id = self.rng.choices(wholesalers, cum_weights=self.all_wholesalers_cum)[0]
+                category = self.rng.choice(self.categories)
+                price = Decimal(f"{min(self.rng.lognormvariate(5.5, 0.8), 50_000):.2f}")
+                products.append(Product(
+                    wholesaler_id=wholesaler_id,
+                    category=category,
+                    name=f"{self.rng.choice(BRANDS)} {category.name} {self.rng.choice(PACKS)}",
+                    description=f"Wholesale {category.name.lower()} product",
+                    sku=f"LOAD-{first_sku + i:09d}",
+                    price=price,
+                    wholesale_price=(price * Decimal('0.85')).quantize(Decimal('0.01')),
+                    minimum_order_quantity=self.rng.choice([1, 1, 1, 5, 10, 12, 24]),
+                    stock_quantity=self.rng.randint(0, 5000) if self.rng.random() > 0.05 else 0,
+                    is_available=self.rng.random() < 0.95,
+                ))
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+            for product in products:
+                self.products_by_wholesaler[product.wholesaler_id].append(
+                    (product.id, product.wholesale_price, product.minimum_order_quantity)
+                )
+        self.report('Products', total, started)
+
+        # Each wholesaler's catalogue in a random Zipf popularity order
+        self.product_cum = {}
+        for wholesaler_id, products in self.products_by_wholesaler.items():
+            self.rng.shuffle(products)
+            self.product_cum[wholesaler_id] = zipf_cum_weights(len(products))
+
+    def pick_wholesaler(self, town):
+        local = self.wholesalers_by_town.get(town)
+        if local and self.rng.random() < LOCAL_ORDER_SHARE:
+            return self.rng.choices(local, cum_weights=self.town_wholesalers_cum[town])[0]
+        return self.rng.choices(self.all_wholesalers, cum_weights=self.all_wholesalers_cum)[0]
+
+    def pick_status(self, created_at):
+        weights = RECENT_STATUSES if self.now - created_at < timedelta(days=RECENT_DAYS) else SETTLED_STATUSES
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def create_orders(self):
+        started = time.perf_counter()
+        total = self.counts['orders']
+        rows = Counter()
+        # Only wholesalers with products can receive orders
+        self.all_wholesalers = [w for w in self.all_wholesalers if self.products_by_wholesaler[w]]
+        self.all_wholesalers_cum = zipf_cum_weights(len(self.all_wholesalers))
+        for town, ids in list(self.wholesalers_by_town.items()):
+            ids[:] = [w for w in ids if self.products_by_wholesaler[w]]
+            self.town_wholesalers_cum[town] = zipf_cum_weights(len(ids))
+
+        with explicit_timestamps(Order, OrderStatusHistory, Delivery, DeliveryTracking):
+            for _, size in self.chunks(total):
+                with transaction.atomic():
+                    chunk_rows = self.create_order_chunk(size)
+                rows.update(chunk_rows)
+        self.report('Orders', total, started)
+        for label in ('items', 'history', 'deliveries', 'tracking'):
+            self.log(f"  {label}: {rows[label]:,} rows")
+
+    def create_order_chunk(self, size):
+        orders, lines_by_order = [], []
+        for _ in range(size):
+            shop_id, town, shop_lat, shop_lng, shop_address, shop_phone = self.rng.choice(self.shops)
+            wholesaler_id = self.pick_wholesaler(town)
+            catalogue = self.products_by_wholesaler[wholesaler_id]
+            picks = self.rng.choices(
+                catalogue, cum_weights=self.product_cum[wholesaler_id],
+                k=self.rng.randint(*ITEMS_PER_ORDER)
+            )
+            lines = {}
+            for product_id, unit_price, minimum in picks:
+                lines[product_id] = (unit_price, minimum * self.rng.randint(1, 10))
+
+            created_at = self.now - timedelta(seconds=self.rng.uniform(0, self.days * 86400))
+            status = self.pick_status(created_at)
+            subtotal = sum(price * quantity for price, quantity in lines.values())
+            delivery_fee = Decimal(self.rng.choice([0, 100, 150, 200, 300]))
+            order = Order(
+                order_number=order_numbers.next_number(),
+                shopkeeper_id=shop_id,
+                wholesaler_id=wholesaler_id,
+                status=status,
+                delivery_address=shop_address,
+                delivery_location=town,
+                delivery_latitude=shop_lat,
+                delivery_longitude=shop_lng,
+                payment_method=self.rng.choice(Order.PaymentMethod.values),
+                payment_status=(
+                    Order.PaymentStatus.PAID if status == Order.OrderStatus.DELIVERED
+                    else Order.PaymentStatus.PENDING
+                ),
+                subtotal=subtotal,
+                delivery_fee=delivery_fee,
+                total_amount=subtotal + delivery_fee,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            if status not in (Order.OrderStatus.PENDING, Order.OrderStatus.CANCELLED):
+                order.confirmed_at = self.after(created_at, 5, 240)
+            if status == Order.OrderStatus.DELIVERED:
+                order.delivered_at = self.after(order.confirmed_at, 90, 1200)
+            orders.append(order)
+            lines_by_order.append((order, lines, shop_phone))
+        Order.objects.bulk_create(orders)
+
+        items, history, deliveries = [], [], []
+        for order, lines, shop_phone in lines_by_order:
+            self.orders_by_wholesaler[order.wholesaler_id] += 1
+            self.orders_by_day[timezone.localdate(order.created_at)] += 1
+            items.extend(
+                OrderItem(
+                    order=order, product_id=product_id, quantity=quantity,
+                    unit_price=unit_price, total_price=unit_price * quantity
+                )
+                for product_id, (unit_price, quantity) in lines.items()
+            )
+            history.append(OrderStatusHistory(
+                order=order, status=Order.OrderStatus.PENDING, notes="Order created",
+                created_at=order.created_at
+            ))
+            if order.status != Order.OrderStatus.PENDING:
+                history.append(OrderStatusHistory(
+                    order=order, status=order.status, notes=f"Status changed to {order.status}",
+                    created_at=order.delivered_at or order.confirmed_at or self.after(order.created_at, 5, 60)
+                ))
+            delivery = self.build_delivery(order, shop_phone)
+            if delivery is not None:
+                deliveries.append(delivery)
+        OrderItem.objects.bulk_create(items)
+        OrderStatusHistory.objects.bulk_create(history)
+        Delivery.objects.bulk_create(deliveries)
+
+        tracking = []
+        for delivery in deliveries:
+            tracking.extend(self.build_tracking(delivery))
+        DeliveryTracking.objects.bulk_create(tracking)
+        return {'items': len(items), 'history': len(history), 'deliveries': len(deliveries), 'tracking': len(tracking)}
+
+    def build_delivery(self, order, shop_phone):
+        statuses = {
+            Order.OrderStatus.READY: [Delivery.DeliveryStatus.PENDING, Delivery.DeliveryStatus.ASSIGNED],
+            Order.OrderStatus.OUT_FOR_DELIVERY: [Delivery.DeliveryStatus.PICKED_UP, Delivery.DeliveryStatus.IN_TRANSIT],
+            Order.OrderStatus.DELIVERED: [Delivery.DeliveryStatus.DELIVERED],
+        }.get(order.status)
+        if statuses is None:
+            return None
+        status = self.rng.choice(statuses)
+        pickup_lat, pickup_lng, pickup_address = self.wholesaler_location[order.wholesaler_id]
+        if order.delivered_at:
+            # Work back from the delivery time recorded on the order
+            pickup_at = max(order.delivered_at - timedelta(minutes=self.rng.randint(15, 60)), order.confirmed_at)
+        else:
+            pickup_at = self.after(order.confirmed_at, 40, 600)
+        created_at = max(pickup_at - timedelta(minutes=self.rng.randint(10, 30)), order.confirmed_at)
+        delivery = Delivery(
+            order=order,
+            status=status,
+            pickup_address=pickup_address,
+            pickup_latitude=coordinate(pickup_lat),
+            pickup_longitude=coordinate(pickup_lng),
+            pickup_contact_name="Dispatch",
+            pickup_contact_phone="+254700000000",
+            delivery_address=order.delivery_address,
+            delivery_latitude=order.delivery_latitude,
+            delivery_longitude=order.delivery_longitude,
+            delivery_contact_name="Shop owner",
+            delivery_contact_phone=shop_phone,
+            estimated_delivery_time=created_at + timedelta(hours=3),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        if status != Delivery.DeliveryStatus.PENDING:
+            delivery.rider_id = self.rng.choice(self.riders)[0]
+        if status in (Delivery.DeliveryStatus.PICKED_UP, Delivery.DeliveryStatus.IN_TRANSIT, Delivery.DeliveryStatus.DELIVERED):
+            delivery.actual_pickup_time = pickup_at
+        if status == Delivery.DeliveryStatus.DELIVERED:
+            delivery.actual_delivery_time = order.delivered_at
+            delivery.updated_at = order.delivered_at
+            if self.rng.random() < RIDER_RATED_SHARE:
+                delivery.rider_rating = self.rng.choices([1, 2, 3, 4, 5], weights=[2, 3, 10, 35, 50])[0]
+            self.deliveries_by_rider[delivery.rider_id] += 1
+            self.deliveries_by_day[timezone.localdate(delivery.actual_delivery_time)] += 1
+        return delivery
+
+    def build_tracking(self, delivery):
+        """Points along the way from pickup to drop-off, for deliveries that have left"""
+        if delivery.actual_pickup_time is None or delivery.delivery_latitude is None:
+            return []
+        start = (float(delivery.pickup_latitude), float(delivery.pickup_longitude))
+        end = (float(delivery.delivery_latitude), float(delivery.delivery_longitude))
+        finished = delivery.actual_delivery_time or min(
+            delivery.actual_pickup_time + timedelta(hours=1), self.now
+        )
+        count = self.rng.randint(*TRACKING_POINTS)
+        points = []
+        for step in range(count):
+            share = step / max(count - 1, 1)
+            if delivery.actual_delivery_time is None:
+                # Still on the way
+                share *= 0.8
+            points.append(DeliveryTracking(
+                delivery=delivery,
+                latitude=coordinate(start[0] + (end[0] - start[0]) * share + self.rng.gauss(0, 0.002)),
+                longitude=coordinate(start[1] + (end[1] - start[1]) * share + self.rng.gauss(0, 0.002)),
+                status=Delivery.DeliveryStatus.IN_TRANSIT,
+                created_at=delivery.actual_pickup_time + (finished - delivery.actual_pickup_time) * share,
+            ))
+        return points
+
+    def update_counters(self):
+        """Bring profile totals, ratings and period counters in line with the new rows"""
+        with transaction.atomic():
+            increment_many(WholesalerProfile, 'total_orders', self.orders_by_wholesaler)
+            increment_many(RiderProfile, 'total_deliveries', self.deliveries_by_rider)
+            reconcile_rider_ratings()
+            for day, count in self.orders_by_day.items():
+                bump(ORDERS_PLACED, count, when=self._noon(day))
+            for day, count in self.deliveries_by_day.items():
+                bump(DELIVERIES_COMPLETED, count, when=self._noon(day))
+
+    def _noon(self, day):
+        return timezone.make_aware(datetime.combine(day, time_of_day(12)))
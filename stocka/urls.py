@@ -2,7 +2,7 @@
 URL configuration for Stocka project.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from .admin_views import (
@@ -11,7 +11,8 @@ from .admin_views import (
     ProductAnalyticsView,
     DeliveryAnalyticsView,
     UserGrowthAnalyticsView,
-    RevenueAnalyticsView
+    RevenueAnalyticsView,
+    DatabaseConnectionsView
 )
 
 urlpatterns = [
@@ -20,6 +21,7 @@ urlpatterns = [
     path('api/products/', include('products.urls')),
     path('api/orders/', include('orders.urls')),
     path('api/delivery/', include('delivery.urls')),
+    path('api/events/', include('events.urls')),
     
     path('api/admin/dashboard/', DashboardStatsView.as_view(), name='admin-dashboard'),
     path('api/admin/analytics/orders/', OrderAnalyticsView.as_view(), name='admin-order-analytics'),
@@ -27,8 +29,18 @@ urlpatterns = [
     path('api/admin/analytics/deliveries/', DeliveryAnalyticsView.as_view(), name='admin-delivery-analytics'),
     path('api/admin/analytics/users/', UserGrowthAnalyticsView.as_view(), name='admin-user-analytics'),
     path('api/admin/analytics/revenue/', RevenueAnalyticsView.as_view(), name='admin-revenue-analytics'),
+    path('api/admin/database/connections/', DatabaseConnectionsView.as_view(), name='admin-database-connections'),
+    path('api/admin/', include('profiling.urls')),
 ]
 
 if settings.DEBUG:
+    from mediastore.views import serve_immutable
+    urlpatterns += [
+        re_path(
+            r'^%scas/(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'),
+            serve_immutable,
+            {'document_root': settings.MEDIA_ROOT / 'cas'},
+        ),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
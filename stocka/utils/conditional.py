@@ -0,0 +1,121 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF views.
+
+The validators come from the database rather than from the rendered body, so
+a request whose If-None-Match or If-Modified-Since still matches gets its
+304 before anything is serialized:
+
+- a list's ETag hashes the row count and the latest `updated_at` of the
+  filtered queryset (a deletion changes the count) with the query string,
+  so each page and filter has its own;
+- an object's ETag and Last-Modified come from its own `updated_at`.
+
+`validator_lookups` names further timestamps that change the response, such
+as `items__product__updated_at` for products shown inside an order. On lists
+keep them to forward foreign keys, which add a join without multiplying rows.
+Changes that leave every listed timestamp alone (a renamed business, profile
+counters) are not seen until something else changes.
+"""
+import hashlib
+from calendar import timegm
+from typing import Any, Iterable, Optional
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """A quoted strong ETag from the parts a representation depends on"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest[:20])
+
+
+def timestamp(value) -> Optional[int]:
+    return timegm(value.utctimetuple()) if value is not None else None
+
+
+def not_modified(request, etag: Optional[str] = None, last_modified: Optional[int] = None) -> Optional[HttpResponse]:
+    """The 304 (or 412) answering the request's preconditions, or None to respond normally"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag: Optional[str] = None, last_modified: Optional[int] = None):
+    if etag:
+        response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalListMixin:
+    """list() with an ETag from the filtered queryset's count and latest timestamps"""
+
+    validator_lookups: Iterable[str] = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        latest = queryset.aggregate(
+            count=Count("pk"),
+            **{f"latest_{i}": Max(lookup) for i, lookup in enumerate(self.validator_lookups)},
+        )
+        # Pages and filters share the aggregate, so the query string is part
+        # of the tag; querysets differ per user
+        etag = make_etag(
+            request.user.pk,
+            request.get_full_path(),
+            request.accepted_media_type,
+            *latest.values(),
+        )
+        # No Last-Modified: a deletion lowers the count without moving the
+        # latest timestamp, which If-Modified-Since can't notice
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag)
+
+
+class ConditionalRetrieveMixin:
+    """retrieve() with an ETag and Last-Modified from the object's timestamps"""
+
+    validator_lookups: Iterable[str] = ("updated_at",)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        values = self.latest_values(instance)
+        last_modified = timestamp(max((value for value in values if value is not None), default=None))
+        etag = make_etag(instance.pk, request.accepted_media_type, *values)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+    def filter_queryset(self, queryset):
+        # The related timestamps are loaded with the object itself, a
+        # subquery per lookup so several to-many relations are joined
+        # separately instead of multiplying each other's rows
+        queryset = super().filter_queryset(queryset)
+        model = queryset.model
+        return queryset.annotate(**{
+            f"validator_{i}": Subquery(
+                model._base_manager.filter(pk=OuterRef("pk"))
+                .values("pk")
+                .annotate(latest=Max(lookup))
+                .values("latest")
+            )
+            for i, lookup in enumerate(self.validator_lookups)
+            if "__" in lookup
+        })
+
+    def latest_values(self, instance):
+        """The value of each validator lookup for this object"""
+        return [
+            getattr(instance, f"validator_{i}" if "__" in lookup else lookup)
+            for i, lookup in enumerate(self.validator_lookups)
+        ]
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+
+from django.db import connections
+
+
+def connection_mode(settings_dict: Dict[str, Any]) -> str:
+    """How a database alias reuses connections: pool, persistent or per_request"""
+    if settings_dict.get("OPTIONS", {}).get("pool"):
+        return "pool"
+    if settings_dict.get("CONN_MAX_AGE") != 0:
+        return "persistent"
+    return "per_request"
+
+
+def pool_stats(alias: str) -> Optional[Dict[str, int]]:
+    """psycopg_pool counters (pool_size, pool_available, requests_waiting, ...)"""
+    connection = connections[alias]
+    pool = getattr(connection, "pool", None)
+    return pool.get_stats() if pool is not None else None
+
+
+def server_connections(alias: str) -> Optional[Dict[str, Any]]:
+    """Connections PostgreSQL holds open to this database, by state"""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(state, 'unknown'), COUNT(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        by_state = dict(cursor.fetchall())
+        cursor.execute("SHOW max_connections")
+        max_connections = int(cursor.fetchone()[0])
+    return {
+        "total": sum(by_state.values()),
+        "by_state": by_state,
+        "max_connections": max_connections,
+    }
+
+
+def connection_stats(alias: str) -> Dict[str, Any]:
+    settings_dict = connections[alias].settings_dict
+    mode = connection_mode(settings_dict)
+    return {
+        "alias": alias,
+        "vendor": connections[alias].vendor,
+        "mode": mode,
+        "conn_max_age": settings_dict.get("CONN_MAX_AGE"),
+        "health_checks": settings_dict.get("CONN_HEALTH_CHECKS"),
+        "pool": pool_stats(alias) if mode == "pool" else None,
+        "server": server_connections(alias),
+    }
@@ -0,0 +1,91 @@
+import math
+from typing import List, Optional, Tuple
+
+from django.db.models import F, FloatField
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+
+# Grid size (in degrees) used to bucket locations into geocells.
+# 0.2 degrees is roughly 22km at the equator, so a typical city-wide
+# radius search touches only a handful of cells.
+GEOCELL_SIZE = 0.2
+
+_LAT_CELLS = int(180 / GEOCELL_SIZE)
+_LNG_CELLS = int(360 / GEOCELL_SIZE)
+
+
+def _cell_index(lat: float, lng: float) -> Tuple[int, int]:
+    lat_idx = int(math.floor((lat + 90) / GEOCELL_SIZE))
+    lng_idx = int(math.floor((lng + 180) / GEOCELL_SIZE))
+    return min(max(lat_idx, 0), _LAT_CELLS - 1), lng_idx % _LNG_CELLS
+
+
+def geocell_for(lat, lng) -> Optional[int]:
+    """Return the integer geocell containing the given coordinates.
+
+    Returns None when either coordinate is missing so profiles without a
+    location simply never match a geo query.
+    """
+
+    if lat is None or lng is None:
+        return None
+    lat_idx, lng_idx = _cell_index(float(lat), float(lng))
+    return lat_idx * _LNG_CELLS + lng_idx
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing the radius."""
+
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6:
+        lng_delta = 180.0
+    else:
+        lng_delta = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return (
+        max(lat - lat_delta, -90.0),
+        min(lat + lat_delta, 90.0),
+        lng - lng_delta,
+        lng + lng_delta,
+    )
+
+
+def geocells_for_radius(lat: float, lng: float, radius_km: float) -> List[int]:
+    """Return every geocell intersecting the bounding box of the radius."""
+
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    min_lat_idx, min_lng_idx = _cell_index(min_lat, min_lng)
+    max_lat_idx, _ = _cell_index(max_lat, max_lng)
+
+    lng_span = int(math.floor((max_lng + 180) / GEOCELL_SIZE)) - int(
+        math.floor((min_lng + 180) / GEOCELL_SIZE)
+    )
+    lng_indexes = {
+        (min_lng_idx + step) % _LNG_CELLS
+        for step in range(min(lng_span, _LNG_CELLS - 1) + 1)
+    }
+
+    return sorted(
+        lat_idx * _LNG_CELLS + lng_idx
+        for lat_idx in range(min_lat_idx, max_lat_idx + 1)
+        for lng_idx in lng_indexes
+    )
+
+
+def distance_km_expression(lat_field: str, lng_field: str, lat: float, lng: float):
+    """Build a haversine distance (in km) expression between a point and fields.
+
+    Uses only database math functions so it can be used in annotate(),
+    filter() and order_by() on both PostgreSQL and SQLite.
+    """
+
+    field_lat = Radians(Cast(F(lat_field), FloatField()))
+    field_lng = Radians(Cast(F(lng_field), FloatField()))
+    origin_lat = math.radians(lat)
+    origin_lng = math.radians(lng)
+
+    a = Power(Sin((field_lat - origin_lat) / 2), 2) + math.cos(origin_lat) * Cos(
+        field_lat
+    ) * Power(Sin((field_lng - origin_lng) / 2), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))